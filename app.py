@@ -1,73 +1,176 @@
+import functools
+import json
+from collections import deque
+
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from src.loader import cargar_datos_limpios, cargar_reporte_missings, cargar_datos_raw
+from src.loader import (
+    cargar_dataset, cargar_reporte_missings,
+    cargar_mascara_imputacion, cargar_rollups, cargar_correlaciones,
+    cargar_calibracion, cargar_modelo, cargar_modelos, version_datos, fuente_datos, RAW_DATA_PATH,
+    CATALOGO_ESTACIONES
+)
 from src.plots import configurar_estilo
-from src.config import DatasetConfig, TabConfig
-from src.plot_builder import PlotFactory
+from src.config import DatasetConfig, TabConfig, RLSConfig
+from src.plot_builder import PlotFactory, FIGURE_CACHE, HISTOGRAM_CACHE
+from src.densidad import CELDAS_BASE
+from src import trazas
 
 st.set_page_config(page_title="Lab 3: Air Quality Analysis", layout="wide")
 configurar_estilo()
+# Las vistas por sesión comparten buffers con el dataset; una escritura copia solo lo modificado
+pd.set_option("mode.copy_on_write", True)
+
+# Trazas por rerun (panel "Depuración" del sidebar). Desactivadas, cada tramo
+# cuesta una lectura de ContextVar; se descarta lo que haya quedado de un
+# rerun interrumpido en este hilo antes de decidir si grabar este.
+trazas.desactivar()
+grabacion = trazas.iniciar("rerun") if st.session_state.get("depurar") else None
+historial_trazas = st.session_state.setdefault("trazas", deque(maxlen=10))
 
 # ============ INICIALIZACIÓN DE DATOS (Inyección de Dependencias) ============
-@st.cache_data
-def cargar_datos_con_cache():
-    return cargar_datos_limpios()
+# La versión (huella del archivo) es parte de la clave: un append incremental
+# produce una versión nueva que se recarga desde la caché Arrow actualizada.
+# cache_resource comparte un único handle inmutable entre todas las sesiones
+# (cache_data serializaba y copiaba el frame completo para cada una)
+@st.cache_resource
+def cargar_dataset_compartido(version, ruta=None, columnas=None, estacion=None):
+    # `columnas` proyecta la lectura: lo que no se usa nunca se parsea
+    return cargar_dataset(ruta, columnas, estacion)
+
+@st.cache_resource
+def cargar_fuente_con_cache(version, estacion=None):
+    # Lectura por rango: una ventana solo lee sus bloques (índice disperso)
+    return fuente_datos(estacion=estacion)
+
+@st.cache_resource
+def cargar_mascara_con_cache(version):
+    # Máscara bit-empaquetada, calculada una vez y guardada junto al CSV limpio
+    return cargar_mascara_imputacion()
+
+@st.cache_resource
+def cargar_rollups_con_cache(version, estacion=None):
+    # Agregados diario/mensual: se comparten entre sesiones sin serializar
+    return cargar_rollups(estacion=estacion)
+
+@st.cache_resource
+def cargar_correlaciones_con_cache(version, estacion=None):
+    # Co-momentos de todos los pares: cada heatmap o métrica es un slice
+    return cargar_correlaciones(estacion=estacion)
 
 @st.cache_data
-def cargar_raw_con_cache():
-    return cargar_datos_raw()
+def cargar_calibracion_con_cache(version, pares, estacion=None):
+    return cargar_calibracion(pares, estacion=estacion)
 
 @st.cache_data
 def cargar_missings_con_cache():
     return cargar_reporte_missings()
 
-df_completo = cargar_datos_con_cache()
-df_raw = cargar_raw_con_cache()
-df_missings = cargar_missings_con_cache()
+st.sidebar.title("Panel de Control")
+st.sidebar.info("Ajusta los parámetros de visualización.")
 
-if df_completo is None:
-    st.error("Datos no encontrados. Ejecuta el notebook de limpieza primero.")
-    st.stop()
+# Estación: el archivo UCI local o una del catálogo particionado
+# (None = archivo local; las estaciones solo leen sus particiones)
+estaciones = CATALOGO_ESTACIONES.estaciones()
+estacion = st.sidebar.selectbox(
+    "Estación:", [None] + estaciones, format_func=lambda e: e or "UCI (archivo local)",
+    disabled=not estaciones, key="estacion",
+)
 
-# ============ CONFIGURACIÓN CENTRALIZADA ============
 dataset_config = DatasetConfig()
-tab_config = TabConfig()
+with trazas.tramo("datos", "app"):
+    version_actual = version_datos(estacion=estacion)
+    dataset = cargar_dataset_compartido(version_actual, estacion=estacion)
+    # El raw (con NaN) solo existe para el archivo local
+    dataset_raw = None if estacion else cargar_dataset_compartido(
+        version_datos(str(RAW_DATA_PATH)), str(RAW_DATA_PATH), tuple(dataset_config.get_columns_para_raw()))
+    df_missings = cargar_missings_con_cache()
+    rollups = cargar_rollups_con_cache(version_actual, estacion)
+    correlaciones = cargar_correlaciones_con_cache(version_actual, estacion)
+
+if dataset is None:
+    st.error("Datos no encontrados. Ejecuta el notebook de limpieza primero.")
+    st.stop()
 
-# Filtrar columnas según configuración para tabs 1 y 2
-df = dataset_config.filter_columns(df_completo)
+with trazas.tramo("datos.fuente", "app"):
+    fuente = cargar_fuente_con_cache(version_actual, estacion)
 
-# Filtrar columnas sin nombre o vacías
-df = df.loc[:, ~df.columns.str.contains('^Unnamed', na=False)]
-df = df.loc[:, df.columns.str.strip() != '']
+# Ventana temporal opcional: se empuja al loader en cada gráfico
+ventana = None
+if st.sidebar.checkbox("Filtrar por ventana temporal", key="filtrar_ventana"):
+    primer_dia, ultimo_dia = dataset.vista([]).index[[0, -1]].date
+    rango = st.sidebar.date_input("Ventana temporal:", (primer_dia, ultimo_dia),
+                                  min_value=primer_dia, max_value=ultimo_dia)
+    if len(rango) == 2:
+        ventana = (pd.Timestamp(rango[0]), pd.Timestamp(rango[1]) + pd.Timedelta(days=1))
 
-if df_raw is not None:
-    df_raw = dataset_config.filter_columns_raw(df_raw)
-    # Filtrar columnas sin nombre en raw también
-    df_raw = df_raw.loc[:, ~df_raw.columns.str.contains('^Unnamed', na=False)]
-    df_raw = df_raw.loc[:, df_raw.columns.str.strip() != '']
+# ============ CONFIGURACIÓN CENTRALIZADA ============
+tab_config = TabConfig()
 
-st.sidebar.title("Panel de Control")
-st.sidebar.info("Ajusta los parámetros de visualización.")
+# Vistas sin copia: columnas permitidas para tabs 1 y 2 (el loader ya
+# descarta desde la cabecera las columnas sin nombre o vacías)
+df_completo = dataset.vista()
+df = dataset.vista(dataset_config.columns_permitidas)
+df_raw = dataset_raw.vista() if dataset_raw is not None else None
 
 # Botón para limpiar caché y recargar datos
 if st.sidebar.button("🔄 Recargar Datos"):
     st.cache_data.clear()
+    st.cache_resource.clear()
+    FIGURE_CACHE.limpiar()
+    HISTOGRAM_CACHE.limpiar()
     st.rerun()
 
+metricas_figuras = FIGURE_CACHE.metricas()
+st.sidebar.caption(
+    f"Caché de figuras: {metricas_figuras['entradas']} figuras · "
+    f"{metricas_figuras['bytes'] / 1024 ** 2:.1f} MB · "
+    f"{metricas_figuras['tasa_hits']:.0%} hits"
+)
+
+@st.cache_data
+def clasificar_calidad(version, bins, labels):
+    # Categoría por fila calculada una vez por versión (sin copiar el frame)
+    return pd.cut(df_completo["CO(GT)"], bins=bins, labels=labels)
+
 st.title("Dashboard de Calidad del Aire")
 
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+# Solo se ejecuta la vista seleccionada; cada vista es un fragmento, así que
+# sus widgets re-ejecutan únicamente esa vista y no el script completo
+VISTAS = [
     "Distribuciones y Outliers", 
     "Análisis de Correlación", 
     "Comparativa Raw vs Clean",
     "Modelamiento I",
     "Modelamiento II",
     "Reporte Final"
-])
+]
+vista = st.segmented_control("Sección:", VISTAS, default=VISTAS[0], key="vista",
+                             label_visibility="collapsed") or VISTAS[0]
+
+
+def vista_trazada(funcion):
+    """Tramo `vista: <nombre>`; en un rerun solo del fragmento abre su propia grabación."""
+    @functools.wraps(funcion)
+    def envoltura():
+        propia = trazas.iniciar(f"fragmento: {funcion.__name__}") \
+            if st.session_state.get("depurar") and trazas.activa() is None else None
+        try:
+            with trazas.tramo(f"vista: {funcion.__name__}", "app"):
+                funcion()
+        finally:
+            if propia is not None:
+                historial_trazas.append(trazas.terminar(propia))
+    return envoltura
+
 
 # ============ TAB 1: DISTRIBUCIONES Y OUTLIERS ============
-with tab1:
+BINS_EXACTOS = [b for b in range(5, 101) if CELDAS_BASE % b == 0]
+
+
+@st.fragment
+@vista_trazada
+def vista_distribuciones():
     st.header("Análisis Univariable")
     
     col_izq, col_der = st.columns([1, 2])
@@ -78,23 +181,36 @@ with tab1:
         var_hist = st.selectbox("Variable a analizar:", df.columns.tolist(), index=0)
         
         # Actualizamos configuración dinámicamente
-        bins = st.slider("Cantidad de Bins:", 5, 100, tab_config.get_histogram_config().bins)
+        # Solo cantidades que dividen la grilla del histograma base: conteos exactos
+        bins = st.select_slider("Cantidad de Bins:", options=BINS_EXACTOS,
+                                value=tab_config.get_histogram_config().bins)
         color_hist = st.color_picker("Color del gráfico:", tab_config.get_histogram_config().color)
         escala_log = st.checkbox("Escala Logarítmica (eje Y)", value=tab_config.get_histogram_config().log_scale)
+        exacto = st.checkbox("Recalcular bins exactos", value=tab_config.get_histogram_config().exacto,
+                             help="Por defecto los bins se derivan de un histograma fino (25200 celdas) "
+                                  "calculado una vez por columna.")
         
         # Actualizar config
-        tab_config.update_histogram(bins=bins, color=color_hist, log_scale=escala_log)
+        tab_config.update_histogram(bins=bins, color=color_hist, log_scale=escala_log, exacto=exacto)
         
     # Construcción del gráfico (Desacoplada)
     with col_der:
-        hist_builder = PlotFactory.create_histogram_builder(df, tab_config.get_histogram_config())
-        sample_len = df[var_hist].dropna().shape[0]
+        hist_builder = PlotFactory.create_histogram_builder(df, tab_config.get_histogram_config(), fuente)
+        # Las filas no nulas salen del histograma base cacheado (sin recorrer la columna)
+        sample_len = hist_builder.base(var_hist, ventana).n
         altura_hist = max(450, min(900, 300 + sample_len // 400))
         tab_config.update_histogram(height=altura_hist)
         
-        fig_hist = hist_builder.build(var_hist)
+        fig_hist = hist_builder.build(var_hist, ventana)
         st.plotly_chart(fig_hist, use_container_width=True)
 
+        if rollups is not None and var_hist in rollups.columnas:
+            resumen = rollups.resumen([var_hist]).loc[var_hist]
+            st.caption(
+                f"n = {resumen['count']:,} · media = {resumen['mean']:.2f} · "
+                f"desv. = {resumen['std']:.2f} · rango = [{resumen['min']:.2f}, {resumen['max']:.2f}]"
+            )
+
     st.divider()
     
     # Boxplots
@@ -108,15 +224,17 @@ with tab1:
     
     tab_config.update_boxplot(log_scale=log_box)
     
-    box_builder = PlotFactory.create_boxplot_builder(df, tab_config.get_boxplot_config())
-    fig_box = box_builder.build(vars_box)
+    box_builder = PlotFactory.create_boxplot_builder(df, tab_config.get_boxplot_config(), rollups, fuente)
+    fig_box = box_builder.build(vars_box, ventana)
     st.plotly_chart(fig_box, use_container_width=True)
     
     if not vars_box:
         st.info("Selecciona al menos una variable para visualizar.")
 
 # ============ TAB 2: ANÁLISIS BIVARIABLE ============
-with tab2:
+@st.fragment
+@vista_trazada
+def vista_correlacion():
     st.header("Análisis Bivariable")
 
     c1, c2, c3, c4 = st.columns(4)
@@ -129,20 +247,27 @@ with tab2:
     y_axis = c2.selectbox("Eje Y (Sensor):", vars_pt08, index=0 if vars_pt08 else None)
     color_var = c3.selectbox("Colorear por:", ['Ninguno'] + vars_gt + vars_pt08, index=0)
 
-    alpha_val = st.sidebar.slider("Transparencia", 0.1, 1.0, tab_config.get_scatter_config().alpha)
-    size_val = st.sidebar.slider("Tamaño de Puntos", 2, 20, tab_config.get_scatter_config().size)
+    # Dentro del fragmento (un fragmento no puede escribir en el sidebar)
+    with c4.popover("Estilo de puntos"):
+        alpha_val = st.slider("Transparencia", 0.1, 1.0, tab_config.get_scatter_config().alpha)
+        size_val = st.slider("Tamaño de Puntos", 2, 20, tab_config.get_scatter_config().size)
     
     tab_config.update_scatter(alpha=alpha_val, size=size_val)
     
     if x_axis and y_axis:
         st.markdown(f"**Visualización:** `{x_axis}` vs `{y_axis}`")
         
-        scatter_builder = PlotFactory.create_scatter_builder(df, tab_config.get_scatter_config())
-        fig_scatter = scatter_builder.build(x_axis, y_axis, color_var)
+        scatter_builder = PlotFactory.create_scatter_builder(df, tab_config.get_scatter_config(), fuente)
+        fig_scatter = scatter_builder.build(x_axis, y_axis, color_var, ventana)
         st.plotly_chart(fig_scatter, use_container_width=True)
         
         if x_axis != y_axis:
-            corr_val = df[[x_axis, y_axis]].corr().iloc[0, 1]
+            if correlaciones is not None and ventana is None:
+                corr_val = correlaciones.par(x_axis, y_axis)
+            elif ventana is not None:
+                corr_val = fuente.leer(*ventana, [x_axis, y_axis]).corr().iloc[0, 1]
+            else:
+                corr_val = df[[x_axis, y_axis]].corr().iloc[0, 1]
             st.metric("Coeficiente de Correlación (Pearson)", f"{corr_val:.4f}")
         else:
             st.info("Selecciona variables distintas para calcular correlación.")
@@ -153,16 +278,22 @@ with tab2:
     st.subheader("Heatmap de Correlación")
     columnas_recom = ['CO(GT)','PT08.S1(CO)', 'C6H6(GT)','PT08.S2(NMHC)','NOx(GT)', 'PT08.S3(NOx)', 'NO2(GT)', 'PT08.S4(NO2)', 'PT08.S5(O3)', 'T', 'RH', 'AH']
     cols_heatmap = st.multiselect("Columnas para el heatmap:", df.columns.tolist(), default=[c for c in columnas_recom if c in df.columns])
+    metodo_corr = st.radio("Método:", ["pearson", "spearman"], horizontal=True,
+                           format_func=str.capitalize)
+    tab_config.update_heatmap(metodo=metodo_corr)
     
-    heatmap_builder = PlotFactory.create_heatmap_builder(df, tab_config.get_heatmap_config())
-    fig_heatmap = heatmap_builder.build(cols_heatmap)
+    heatmap_builder = PlotFactory.create_heatmap_builder(df, tab_config.get_heatmap_config(), correlaciones,
+                                                         fuente)
+    fig_heatmap = heatmap_builder.build(cols_heatmap, ventana)
     st.plotly_chart(fig_heatmap, use_container_width=True)
     
     if len(cols_heatmap) < 2:
         st.info("Selecciona al menos dos columnas para el heatmap.")
 
 # ============ TAB 3: COMPARATIVA RAW VS CLEAN ============
-with tab3:
+@st.fragment
+@vista_trazada
+def vista_comparativa():
     st.header("Comparativa: Dataset Raw vs Clean")
     st.markdown("Análisis de datos faltantes antes y después del procesamiento.")
     
@@ -204,6 +335,22 @@ with tab3:
         
         st.divider()
         
+        # Serie interpolada vs datos originales (desde la máscara de imputación)
+        st.subheader("🔍 Impacto de la Interpolación")
+        mascara = cargar_mascara_con_cache(version_actual)
+        var_imp = st.selectbox("Variable:", mascara.columnas, key="var_imputacion")
+        n_imputados = mascara.conteo(var_imp)
+        st.caption(f"Valores imputados en {var_imp}: {n_imputados} "
+                   f"({n_imputados / mascara.n_filas * 100:.2f}%)")
+        
+        # Solo se leen los días visibles (la ventana del sidebar o los primeros días)
+        imp_builder = PlotFactory.create_imputation_comparison_builder(
+            None, None, tab_config.get_imputation_config(), mascara=mascara, fuente=fuente
+        )
+        st.pyplot(imp_builder.build(var_imp, *(ventana or (None, None))))
+        
+        st.divider()
+        
         # Resumen de Calidad de Datos
         st.subheader("📋 Resumen de Calidad de Datos")
         
@@ -216,12 +363,16 @@ with tab3:
         with col2:
             st.metric("Columnas Raw", len(df_raw.columns))
             st.metric("Columnas Clean", len(df_completo.columns))
+    elif estacion is not None:
+        st.info("La comparativa raw vs clean solo está disponible para el archivo UCI local.")
     else:
         st.warning("No se encontraron los datos necesarios para la comparación.")
 
 
 # ============ TAB 4: MODELAMIENTO I ============
-with tab4:
+@st.fragment
+@vista_trazada
+def vista_modelamiento():
     st.header("Modelamiento I – Ajuste de Sensores MOX a Concentraciones Reales")
 
     st.markdown("""
@@ -235,38 +386,79 @@ with tab4:
         ("PT08.S4(NO2)", "NO2(GT)")
     ]
 
-    # Modelos univariables
-    for sensor, gt in sensores:
+    # Todos los pares se ajustan en una sola pasada vectorizada
+    calibracion = cargar_calibracion_con_cache(version_actual, tuple(sensores), estacion)
+    if calibracion is not None:
+        st.dataframe(calibracion.style.format(precision=4), use_container_width=True)
+
+    # Modelos univariables: coeficientes desde el registro (solo se re-ajusta si
+    # cambian datos o spec); los pares que faltan se ajustan en un solo lote
+    modelos = cargar_modelos([(gt, [sensor]) for sensor, gt in sensores], estacion=estacion) \
+        or [None] * len(sensores)
+    for (sensor, gt), modelo in zip(sensores, modelos):
         st.subheader(f"{sensor} → {gt}")
-        fig = PlotFactory.create_regression_plot(df_completo, sensor, gt)
+        fig = PlotFactory.create_regression_plot(df_completo, sensor, gt, modelo, fuente, ventana)
         st.plotly_chart(fig, use_container_width=True)
         st.markdown("---")
 
     # Modelo multivariable
     st.subheader("Modelo Multivariable: CO(GT) ~ Sensores + Ambiente")
+    m1, m2 = st.columns(2)
+    modo_mv = m1.radio("Modo de ajuste:", ["lote", "rls"], horizontal=True,
+                       format_func={"lote": "Lote (mínimos cuadrados)", "rls": "En línea (RLS)"}.get)
+    olvido = m2.slider("Factor de olvido λ:", 0.990, 1.0, RLSConfig().olvido, step=0.001,
+                       format="%.3f", disabled=modo_mv != "rls")
+    predictores_mv = ["PT08.S1(CO)", "T", "RH", "AH"]
+    config_rls = RLSConfig(olvido=olvido) if modo_mv == "rls" else None
+    modelo_mv = cargar_modelo("CO(GT)", predictores_mv, "rls" if modo_mv == "rls" else "ols", config_rls,
+                              estacion=estacion)
     fig_mv = PlotFactory.create_multivariable_regression_plot(
         df_completo,
         target="CO(GT)",
-        predictors=["PT08.S1(CO)", "T", "RH", "AH"]
+        predictors=predictores_mv,
+        modo=modo_mv,
+        config=config_rls,
+        modelo=modelo_mv,
+        fuente=fuente,
+        ventana=ventana
     )
     st.plotly_chart(fig_mv, use_container_width=True)
 
 
 # ============ TAB 5: DRIFT ============
-with tab5:
+@st.fragment
+@vista_trazada
+def vista_drift():
     st.header("Modelamiento II – Análisis de Drift del Sensor")
 
     st.markdown("""
     El drift corresponde a la variación en el comportamiento del sensor a lo largo del tiempo.
-    Aquí se ajusta un modelo por mes y se observa cómo cambia la pendiente.
+    Aquí se ajusta un modelo en ventanas móviles y se observa cómo cambia la pendiente,
+    con su intervalo de confianza y los puntos donde el cambio es significativo.
     """)
 
-    fig_drift = PlotFactory.create_drift_plot(df_completo, "PT08.S1(CO)", "CO(GT)")
+    d1, d2 = st.columns(2)
+    par_drift = d1.selectbox(
+        "Par sensor → referencia:", dataset_config.pares_calibracion,
+        format_func=lambda p: f"{p[0]} → {p[1]}"
+    )
+    ventana_drift = d2.select_slider("Ventana:", ["7D", "14D", "30D", "60D"],
+                                     value=tab_config.get_drift_config().ventana)
+    tab_config.update_drift(ventana=ventana_drift)
+
+    sensor_drift, gt_drift = par_drift
+    modelo_drift = cargar_modelo(gt_drift, [sensor_drift], "deriva", tab_config.get_drift_config(),
+                                 estacion=estacion)
+    fig_drift = PlotFactory.create_drift_plot(df_completo, sensor_drift, gt_drift,
+                                              tab_config.get_drift_config(), modelo_drift,
+                                              fuente, ventana)
     st.plotly_chart(fig_drift, use_container_width=True)
 
 
 # ============ TAB 6: REPORTE FINAL ============
-with tab6:
+@st.fragment
+@vista_trazada
+def vista_reporte():
     st.header("Reporte Final – Clasificación de la Calidad del Aire")
 
     st.markdown("""
@@ -276,25 +468,54 @@ with tab6:
     - > 3 mg/m³ → Mala  
     """)
 
-    df_rep = df_completo.copy()
-    bins = [-1, 1, 3, 50]
-    labels = ["Buena", "Regular", "Mala"]
-    df_rep["Calidad"] = pd.cut(df_rep["CO(GT)"], bins=bins, labels=labels)
+    bins = (-1, 1, 3, 50)
+    labels = ("Buena", "Regular", "Mala")
+    calidad = clasificar_calidad(version_actual, bins, labels)
+    df_rep = df_completo[["CO(GT)"]].assign(Calidad=calidad)
 
-    opcion = st.selectbox("Filtrar por categoría:", ["Todas"] + labels)
+    opcion = st.selectbox("Filtrar por categoría:", ["Todas", *labels])
 
     if opcion != "Todas":
         df_plot = df_rep[df_rep["Calidad"] == opcion]
     else:
         df_plot = df_rep
 
-    fig = go.Figure()
-    for label in labels:
-        subset = df_plot[df_plot["Calidad"] == label]
-        fig.add_trace(go.Scatter(
-            x=subset.index, y=subset["CO(GT)"],
-            mode="markers", name=label
-        ))
-
-    fig.update_layout(title="Calidad del aire según CO(GT)", xaxis_title="Tiempo", yaxis_title="CO(GT)")
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    # Reducción en el servidor (envolvente min/max: conserva los picos de CO):
+    # el payload queda acotado por ScatterConfig.max_points
+    fig = PlotFactory.create_quality_report_plot(
+        df_plot, "CO(GT)", "Calidad", list(labels), tab_config.get_scatter_config()
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
+VISTAS_RENDER = {
+    "Distribuciones y Outliers": vista_distribuciones,
+    "Análisis de Correlación": vista_correlacion,
+    "Comparativa Raw vs Clean": vista_comparativa,
+    "Modelamiento I": vista_modelamiento,
+    "Modelamiento II": vista_drift,
+    "Reporte Final": vista_reporte,
+}
+VISTAS_RENDER[vista]()
+
+# ============ DEPURACIÓN: TRAZAS DEL RERUN ============
+if grabacion is not None:
+    historial_trazas.append(trazas.terminar(grabacion))
+
+with st.sidebar.expander("Depuración"):
+    st.checkbox("Trazas por rerun", key="depurar",
+                help="Mide loaders, builders y vistas en cada rerun (se aplica desde el siguiente).")
+    if historial_trazas:
+        grabaciones = list(reversed(historial_trazas))
+        elegida = st.selectbox(
+            "Grabación:", range(len(grabaciones)),
+            format_func=lambda i: f"{grabaciones[i].nombre} · {grabaciones[i].duracion_ms:.0f} ms",
+        )
+        traza = grabaciones[elegida]
+        st.caption(f"{len(traza.tramos)} tramos · {traza.duracion_ms:.1f} ms en total")
+        st.dataframe(traza.resumen(), use_container_width=True)
+        # Chrome trace: abrir en chrome://tracing o ui.perfetto.dev
+        st.download_button("Descargar Chrome trace", json.dumps(traza.a_chrome(), default=str),
+                           file_name="traza_chrome.json", mime="application/json")
+        st.download_button("Descargar JSON", json.dumps(traza.a_json(), default=str),
+                           file_name="traza.json", mime="application/json")
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Benchmark: escalamiento de la capa de ejecución (`src.ejecutor`) con 1..N
+trabajadores en hilos y procesos, contra el ejecutor serial, sobre trabajo
+por columna y por par: lote de calibraciones (OLS y RLS) de `--sensores`
+sensores sintéticos, histogramas base de todas las columnas, drift de todos
+los pares y sketches mensuales de los rollups. Cada resultado se compara con
+el serial (termina con código 1 si alguno difiere). Los pools se arrancan
+antes de medir.
+
+Uso: python benchmarks/bench_ejecutor.py --filas 200000 --sensores 200 --trabajadores 1 2 4 8
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import EjecucionConfig, HistogramConfig, RLSConfig  # noqa: E402
+from src.drift import deriva_pares  # noqa: E402
+from src.ejecutor import SERIAL, Ejecutor, ejecutor_de, trabajadores_disponibles  # noqa: E402
+from src.plot_builder import HISTOGRAM_CACHE, PlotFactory  # noqa: E402
+from src.registry import RegistroModelos, parametros_de  # noqa: E402
+from src.rollups import RollupStore  # noqa: E402
+
+from sintetico import generar_estacion  # noqa: E402
+
+MOX = ['PT08.S1(CO)', 'PT08.S2(NMHC)', 'PT08.S3(NOx)', 'PT08.S4(NO2)', 'PT08.S5(O3)']
+REFERENCIAS = ['CO(GT)', 'C6H6(GT)', 'NOx(GT)', 'NO2(GT)']
+
+
+def red_de_sensores(filas: int, sensores: int, semilla: int = 0) -> pd.DataFrame:
+    """Estación sintética más `sensores` réplicas ruidosas de los sensores MOX (una red de equipos)."""
+    df = generar_estacion(filas, semilla)
+    rng = np.random.default_rng(semilla)
+    replicas = {}
+    for i in range(sensores):
+        base = df[MOX[i % len(MOX)]].to_numpy()
+        replicas[f'S{i:04d}'] = (base * rng.uniform(0.9, 1.1) * (1 + 0.02 * rng.standard_normal(filas))
+                                 ).astype(np.float32)
+    datos = pd.concat([df, pd.DataFrame(replicas, index=df.index)], axis=1)
+    datos.attrs['version'] = f'red-{filas}-{sensores}-{semilla}'
+    return datos
+
+
+def _pares(df: pd.DataFrame) -> List[tuple]:
+    sensores = [c for c in df.columns if c.startswith('S')]
+    return [(s, REFERENCIAS[i % len(REFERENCIAS)]) for i, s in enumerate(sensores)]
+
+
+def calibraciones(df: pd.DataFrame, ejecutor: Ejecutor):
+    pares = _pares(df)
+    # RLS es ~100x más caro por fila que OLS: uno de cada 20 sensores
+    rls = pares[:max(1, len(pares) // 20)]
+    specs = ([(ref, [s], 'ols', None) for s, ref in pares]
+             + [(ref, [s], 'rls', parametros_de(RLSConfig())) for s, ref in rls])
+    with tempfile.TemporaryDirectory() as directorio:
+        modelos = RegistroModelos(Path(directorio)).obtener_o_ajustar_varios(df, df.attrs['version'], specs,
+                                                                              ejecutor)
+    return np.array([np.r_[m.coeficientes, m.intercepto] for m in modelos])
+
+
+def histogramas(df: pd.DataFrame, ejecutor: Ejecutor):
+    HISTOGRAM_CACHE.limpiar()
+    bases = PlotFactory.create_histogram_builder(df, HistogramConfig()).precalcular(list(df.columns), None,
+                                                                                    ejecutor)
+    return np.array([b.finos for b in bases.values()])
+
+
+def drift(df: pd.DataFrame, ejecutor: Ejecutor):
+    return deriva_pares(df, _pares(df), ejecutor=ejecutor).to_numpy(dtype=np.float64)
+
+
+def rollups(df: pd.DataFrame, ejecutor: Ejecutor):
+    store = RollupStore(df, list(df.columns), ejecutor=ejecutor)
+    return np.array([store.caja(c).mediana for c in store.columnas])
+
+
+CASOS: Dict[str, Callable[[pd.DataFrame, Ejecutor], np.ndarray]] = {
+    'calibraciones': calibraciones, 'histogramas': histogramas, 'drift': drift, 'rollups': rollups,
+}
+
+
+def _calentar(_, tarea):
+    return tarea
+
+
+def medir(funcion, df, ejecutor, repeticiones: int):
+    mejor, resultado = float('inf'), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(df, ejecutor)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--sensores', type=int, default=100)
+    parser.add_argument('--trabajadores', type=int, nargs='+', default=None,
+                        help='por defecto 1, 2, 4, ... hasta los núcleos disponibles')
+    parser.add_argument('--modos', nargs='+', default=['hilos', 'procesos'], choices=['hilos', 'procesos'])
+    parser.add_argument('--casos', nargs='+', default=list(CASOS), choices=list(CASOS))
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    nucleos = trabajadores_disponibles()
+    trabajadores = args.trabajadores or sorted({min(2 ** i, nucleos) for i in range(1, nucleos.bit_length() + 1)})
+    df = red_de_sensores(args.filas, args.sensores)
+
+    resultados, distintos = [], []
+    for caso in args.casos:
+        funcion = CASOS[caso]
+        t_serial, referencia = medir(funcion, df, SERIAL, args.repeticiones)
+        resultados.append({'caso': caso, 'modo': 'serial', 'trabajadores': 1,
+                           'segundos': round(t_serial, 4), 'aceleracion': 1.0})
+        for modo in args.modos:
+            # Con un trabajador `ejecutor_de` entrega el serial (la fila de referencia)
+            for n in [n for n in trabajadores if n > 1]:
+                ejecutor = ejecutor_de(EjecucionConfig(modo, n))
+                # Arranque del pool (procesos que importan src) fuera de la medición
+                ejecutor.mapear(_calentar, range(n))
+                segundos, resultado = medir(funcion, df, ejecutor, args.repeticiones)
+                iguales = bool(np.array_equal(resultado, referencia, equal_nan=True))
+                if not iguales:
+                    distintos.append(f'{caso}/{modo}/{n}')
+                resultados.append({'caso': caso, 'modo': modo, 'trabajadores': n, 'segundos': round(segundos, 4),
+                                   'aceleracion': round(t_serial / segundos, 2), 'igual_a_serial': iguales})
+    print(json.dumps({'filas': args.filas, 'columnas': df.shape[1], 'nucleos': nucleos,
+                      'resultados': resultados, 'distintos': distintos}, indent=2))
+    sys.exit(1 if distintos else 0)
+
+
+if __name__ == '__main__':
+    main()
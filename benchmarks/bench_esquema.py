@@ -0,0 +1,52 @@
+"""
+Benchmark: memoria del dataset limpio antes y después del esquema compacto
+(`DatasetConfig.aplicar_esquema`). Reporta bytes por columna (strings
+incluidos) y el total, con el dataset replicado `--factor` veces.
+
+Uso: python benchmarks/bench_esquema.py --factor 10
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import DatasetConfig  # noqa: E402
+from src.dataset import reporte_memoria  # noqa: E402
+from src.loader import CLEANED_DATA_PATH  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--factor', type=int, default=1, help='copias del dataset limpio')
+    parser.add_argument('--detalle', action='store_true', help='incluye el detalle por columna')
+    args = parser.parse_args()
+
+    antes = pd.read_csv(CLEANED_DATA_PATH, index_col='DateTime', parse_dates=['DateTime'])
+    if args.factor > 1:
+        paso = antes.index[-1] - antes.index[0] + pd.Timedelta(hours=1)
+        antes = pd.concat([antes.set_axis(antes.index + i * paso) for i in range(args.factor)])
+        # El calendario se recalcula para que siga coincidiendo con el índice desplazado
+        fechas = antes.index
+        antes = antes.assign(Date=fechas.strftime('%d/%m/%Y'), Time=fechas.strftime('%H:%M:%S'),
+                             dia=fechas.day_name(), hora=fechas.hour.astype('int64'),
+                             mes=fechas.month.astype('int64'), fin_de_semana=fechas.dayofweek >= 5)
+    despues = DatasetConfig().aplicar_esquema(antes)
+    tabla = reporte_memoria(antes, despues)
+
+    resultado = {
+        'filas': len(antes),
+        'mb_antes': round(tabla.loc['total', 'bytes_antes'] / 2**20, 2),
+        'mb_despues': round(tabla.loc['total', 'bytes_despues'] / 2**20, 2),
+        'reduccion': float(tabla.loc['total', 'reduccion']),
+    }
+    if args.detalle:
+        resultado['columnas'] = tabla.drop(index='total').reset_index(names='columna').to_dict('records')
+    print(json.dumps(resultado, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
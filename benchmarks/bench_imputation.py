@@ -0,0 +1,84 @@
+"""
+Benchmark: motor de imputación (`src.imputation.imputar`) vs el tratamiento
+del Notebook 01 (`interpolate(method='time')` + `bfill().ffill()` de pandas)
+sobre un frame sintético regular con rachas de NaN de largo geométrico.
+
+Uso: python benchmarks/bench_imputation.py --filas 10000000 --columnas 13
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.imputation import imputar  # noqa: E402
+
+
+def frame_con_huecos(filas: int, columnas: int, fraccion: float = 0.1,
+                     largo_medio: float = 6.0, freq: str = 'min', semilla: int = 0) -> pd.DataFrame:
+    """
+    Serie regular con ~`fraccion` de NaN agrupados en rachas. Por defecto es
+    minutal: 10M filas horarias exceden el rango de datetime64[ns].
+    """
+    rng = np.random.default_rng(semilla)
+    indice = pd.date_range('2004-03-10 18:00', periods=filas, freq=freq, name='DateTime')
+    X = rng.normal(size=(filas, columnas)).cumsum(axis=0)
+    n_rachas = int(filas * fraccion / largo_medio)
+    for j in range(columnas):
+        inicios = rng.integers(0, filas, n_rachas)
+        largos = rng.geometric(1 / largo_medio, n_rachas)
+        fines = np.minimum(inicios + largos, filas)
+        cobertura = np.zeros(filas + 1, dtype=np.int32)
+        np.add.at(cobertura, inicios, 1)
+        np.add.at(cobertura, fines, -1)
+        X[np.cumsum(cobertura[:-1]) > 0, j] = np.nan
+    return pd.DataFrame(X, index=indice, columns=[f'c{j}' for j in range(columnas)])
+
+
+def cronometrar(funcion, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filas', type=int, default=10_000_000)
+    parser.add_argument('--columnas', type=int, default=13)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    df = frame_con_huecos(args.filas, args.columnas)
+    cols = df.columns.tolist()
+
+    def pandas_notebook():
+        return df[cols].interpolate(method='time').bfill().ffill()
+
+    t_pandas = cronometrar(pandas_notebook, args.repeticiones)
+    t_motor = cronometrar(lambda: imputar(df, cols), args.repeticiones)
+
+    esperado = pandas_notebook()
+    obtenido = imputar(df, cols).valores
+    error = float(np.nanmax(np.abs(esperado.to_numpy() - obtenido.to_numpy())))
+
+    print(json.dumps({
+        'filas': args.filas,
+        'columnas': args.columnas,
+        'fraccion_nan': round(float(df.isna().to_numpy().mean()), 4),
+        'pandas_s': round(t_pandas, 4),
+        'motor_s': round(t_motor, 4),
+        'speedup': round(t_pandas / t_motor, 2),
+        'error_max': error,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
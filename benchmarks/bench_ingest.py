@@ -0,0 +1,82 @@
+"""
+Benchmark: ingesta en streaming (`src.ingest`) vs `pd.read_csv` de una sola vez
+(el flujo del Notebook 01). Replica el archivo crudo UCI `--factor` veces para
+simular feeds más grandes y reporta tiempo, throughput y memoria pico.
+
+Uso: python benchmarks/bench_ingest.py --factor 20 --chunksize 50000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.ingest import ContadoresIngesta, FORMATO_FECHA_UCI, iterar_raw_uci  # noqa: E402
+from src.loader import RAW_UCI_PATH  # noqa: E402
+
+
+def generar_archivo(factor: int, destino: Path) -> Path:
+    """Concatena `factor` copias del cuerpo del archivo crudo bajo una cabecera."""
+    lineas = RAW_UCI_PATH.read_text().splitlines(keepends=True)
+    cabecera, cuerpo = lineas[0], lineas[1:]
+    with open(destino, 'w') as f:
+        f.write(cabecera)
+        for _ in range(factor):
+            f.writelines(cuerpo)
+    return destino
+
+
+def medir(funcion) -> dict:
+    """Tiempo en una pasada limpia y memoria pico en otra (tracemalloc distorsiona el tiempo)."""
+    inicio = time.perf_counter()
+    filas = funcion()
+    segundos = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'filas': filas, 'segundos': round(segundos, 4),
+            'filas_por_segundo': round(filas / segundos, 1), 'pico_mb': round(pico / 2**20, 1)}
+
+
+def una_sola_vez(path: Path) -> int:
+    df = pd.read_csv(path, sep=';', decimal=',', na_values=['-200'])
+    df = df.dropna(how='all', axis=1).dropna(how='all', axis=0)
+    df['DateTime'] = pd.to_datetime(df['Date'] + ' ' + df['Time'], format=FORMATO_FECHA_UCI)
+    return len(df.set_index('DateTime'))
+
+
+def streaming(path: Path, chunksize: int, contadores: ContadoresIngesta) -> int:
+    for _ in iterar_raw_uci(path, chunksize=chunksize, contadores=contadores):
+        pass
+    return contadores.filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--factor', type=int, default=20)
+    parser.add_argument('--chunksize', type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generar_archivo(args.factor, Path(tmp) / 'AirQualityUCI_x.csv')
+        resultados = {
+            'archivo_mb': round(path.stat().st_size / 2**20, 1),
+            'read_csv': medir(lambda: una_sola_vez(path)),
+            'streaming': medir(lambda: streaming(path, args.chunksize, ContadoresIngesta())),
+        }
+        contadores = ContadoresIngesta()
+        streaming(path, args.chunksize, contadores)
+        resultados['streaming']['contadores'] = contadores.resumen()
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: KDE del histograma (`src.densidad.histograma_densidad`, binning
+lineal + FFT) contra `scipy.stats.gaussian_kde` evaluado en los mismos 200
+puntos. Usa columnas de un dataset sintético con forma UCI y reporta tiempos
+y el error máximo relativo al pico de la curva de scipy (termina con código
+1 si supera `--tolerancia`). Los conteos deben coincidir con `np.histogram`.
+scipy es O(n·puntos): sobre `--max-scipy` filas se evalúa en una muestra.
+
+Uso: python benchmarks/bench_kde.py --filas 100000 1000000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.densidad import histograma_densidad  # noqa: E402
+
+from sintetico import generar_estacion  # noqa: E402
+
+COLUMNAS = ['CO(GT)', 'PT08.S1(CO)', 'NOx(GT)', 'T', 'AH']
+
+
+def cronometrar(funcion, repeticiones: int = 3):
+    """Mejor tiempo y resultado de la última pasada."""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def comparar_columna(valores: np.ndarray, bins: int, max_scipy: int) -> dict:
+    t_binned, hd = cronometrar(lambda: histograma_densidad(valores, bins))
+    t_hist, (conteos, _) = cronometrar(lambda: np.histogram(valores, bins))
+    muestra = valores
+    if len(valores) > max_scipy:
+        muestra = np.random.default_rng(0).choice(valores, max_scipy, replace=False)
+    # Misma muestra, grilla y ancho de banda: solo se compara la aproximación
+    hd_muestra = histograma_densidad(muestra, bins) if len(muestra) < len(valores) else hd
+    kde = stats.gaussian_kde(muestra)
+    t_scipy, referencia = cronometrar(lambda: kde(hd_muestra.x), repeticiones=1)
+    return {
+        'filas': len(valores),
+        'filas_scipy': len(muestra),
+        'segundos_binned': round(t_binned, 5),
+        'segundos_np_histogram': round(t_hist, 5),
+        'segundos_scipy': round(t_scipy, 5),
+        'aceleracion': round(t_scipy * len(valores) / len(muestra) / t_binned, 1),
+        'error_relativo': float(np.abs(hd_muestra.densidad - referencia).max() / referencia.max()),
+        'conteos_iguales': bool(np.array_equal(conteos, hd.conteos)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, nargs='+', default=[100_000])
+    parser.add_argument('--bins', type=int, default=30)
+    parser.add_argument('--tolerancia', type=float, default=1e-2)
+    parser.add_argument('--max-scipy', type=int, default=200_000,
+                        help='filas máximas evaluadas con gaussian_kde')
+    args = parser.parse_args()
+
+    resultados, fallos = {}, []
+    for filas in args.filas:
+        df = generar_estacion(filas)
+        for columna in COLUMNAS:
+            valores = df[columna].dropna().to_numpy(dtype=np.float64)
+            r = comparar_columna(valores, args.bins, args.max_scipy)
+            resultados[f'{filas}/{columna}'] = r
+            if r['error_relativo'] > args.tolerancia or not r['conteos_iguales']:
+                fallos.append(f'{filas}/{columna}')
+    print(json.dumps({'resultados': resultados, 'fuera_de_tolerancia': fallos}, indent=2))
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: costo de una interacción con un slider del dashboard sobre una
+estación sintética de `--filas` filas (por defecto 1M). Corre `app.py` con
+el `AppTest` de Streamlit y las trazas por rerun activadas ("Depuración"),
+mueve el slider de bins del histograma y el de transparencia del scatter y,
+por cada movimiento, reporta:
+- `fragmento_ms`: el tramo `vista: <función>`, lo que re-ejecuta el
+  fragmento de la vista en el navegador;
+- `rerun_ms`: el rerun completo del script que hace `AppTest` (no re-ejecuta
+  solo el fragmento): cota superior que incluye sidebar y cargas cacheadas.
+Termina con código 1 si la mediana de `fragmento_ms` supera `--objetivo`.
+
+Uso: python benchmarks/bench_rerun.py --filas 1000000 --objetivo 150
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from src import loader  # noqa: E402
+from src.densidad import CELDAS_BASE  # noqa: E402
+
+from bench_suite import loaders_aislados  # noqa: E402
+from sintetico import generar_estacion  # noqa: E402
+
+APP = str(Path(__file__).resolve().parent.parent / 'app.py')
+ESTACION = 'BENCH-RERUN'
+
+
+def _vista_del_rerun(at: AppTest, funcion: str) -> float:
+    """Duración (ms) del tramo de la vista en la última grabación."""
+    grabacion = at.session_state['trazas'][-1]
+    return next(t.duracion / 1e6 for t in grabacion.tramos if t.nombre == f'vista: {funcion}')
+
+
+def mover(at: AppTest, vista: str, funcion: str, mover_widget: Callable[[AppTest, object], None],
+          valores: List) -> dict:
+    fragmento, rerun = [], []
+    # Cambio de sección fuera de la medición (construye las figuras de la vista)
+    at.button_group[0].set_value([vista]).run()
+    for valor in valores:
+        # AppTest re-envía el estado de todos los widgets: la sección se fija en cada rerun
+        at.button_group[0].set_value([vista])
+        mover_widget(at, valor)
+        inicio = time.perf_counter()
+        at.run()
+        rerun.append((time.perf_counter() - inicio) * 1e3)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        fragmento.append(_vista_del_rerun(at, funcion))
+    return {
+        'movimientos': len(valores),
+        'fragmento_ms_mediana': round(statistics.median(fragmento), 1),
+        'fragmento_ms_max': round(max(fragmento), 1),
+        'rerun_ms_mediana': round(statistics.median(rerun), 1),
+        'rerun_ms_max': round(max(rerun), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--objetivo', type=float, default=150.0, help='ms por movimiento del slider')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio, loaders_aislados(Path(directorio)):
+        loader.CATALOGO_ESTACIONES.escribir(generar_estacion(args.filas), ESTACION)
+        at = AppTest.from_file(APP, default_timeout=600)
+        at.session_state['estacion'] = ESTACION
+        at.session_state['depurar'] = True
+        at.session_state['vista'] = 'Distribuciones y Outliers'
+        inicio = time.perf_counter()
+        at.run()
+        primer_rerun = (time.perf_counter() - inicio) * 1e3
+
+        bins = [b for b in range(5, 101) if CELDAS_BASE % b == 0 and b != 30]
+        resultados = {
+            'bins_histograma': mover(at, 'Distribuciones y Outliers', 'vista_distribuciones',
+                                     lambda at, b: at.select_slider[0].set_value(b), bins),
+            'transparencia_scatter': mover(at, 'Análisis de Correlación', 'vista_correlacion',
+                                           lambda at, a: at.slider[0].set_value(a),
+                                           [round(0.1 * i, 1) for i in range(1, 11)]),
+        }
+    fuera = [caso for caso, r in resultados.items() if r['fragmento_ms_mediana'] > args.objetivo]
+    print(json.dumps({'filas': args.filas, 'objetivo_ms': args.objetivo,
+                      'primer_rerun_ms': round(primer_rerun, 1), 'resultados': resultados,
+                      'sobre_objetivo': fuera}, indent=2))
+    sys.exit(1 if fuera else 0)
+
+
+if __name__ == '__main__':
+    main()
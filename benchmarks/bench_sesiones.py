@@ -0,0 +1,89 @@
+"""
+Benchmark: memoria con N sesiones concurrentes del dashboard.
+Compara el esquema anterior (`st.cache_data`: cada sesión recibe una copia
+deserializada del frame y re-filtra columnas) con el handle compartido
+(`DatasetCompartido` vía `st.cache_resource`: vistas sin copia y columnas
+derivadas con copy-on-write). Las sesiones se mantienen vivas a la vez y se
+mide la memoria retenida con tracemalloc.
+
+Uso: python benchmarks/bench_sesiones.py --sesiones 50 --factor 10
+"""
+import argparse
+import json
+import pickle
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import DatasetConfig  # noqa: E402
+from src.dataset import DatasetCompartido  # noqa: E402
+from src.loader import cargar_datos_limpios  # noqa: E402
+
+
+def replicar(df: pd.DataFrame, factor: int) -> pd.DataFrame:
+    """Concatena `factor` copias del dataset desplazando el índice temporal."""
+    if factor <= 1:
+        return df
+    paso = df.index[-1] - df.index[0] + pd.Timedelta(hours=1)
+    partes = [df.set_axis(df.index + i * paso) for i in range(factor)]
+    return pd.concat(partes)
+
+
+def sesion_cache_data(df: pd.DataFrame, config: DatasetConfig):
+    # st.cache_data devuelve una copia deserializada por llamada
+    copia = pickle.loads(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+    vista = config.filter_columns(copia)
+    vista = vista.loc[:, ~vista.columns.str.contains('^Unnamed', na=False)]
+    vista = vista.loc[:, vista.columns.str.strip() != '']
+    reporte = copia.copy()
+    reporte['Calidad'] = pd.cut(reporte['CO(GT)'], bins=[-1, 1, 3, 50])
+    return copia, vista, reporte
+
+
+def sesion_compartida(handle: DatasetCompartido, config: DatasetConfig):
+    completo = handle.vista()
+    vista = handle.vista(config.columns_permitidas)
+    reporte = handle.con_columnas(['CO(GT)'], Calidad=pd.cut(completo['CO(GT)'], bins=[-1, 1, 3, 50]))
+    return completo, vista, reporte
+
+
+def medir(crear_sesion, sesiones: int) -> dict:
+    tracemalloc.start()
+    vivas = [crear_sesion() for _ in range(sesiones)]
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del vivas
+    return {'retenida_mb': round(actual / 2**20, 1), 'pico_mb': round(pico / 2**20, 1),
+            'por_sesion_mb': round(actual / sesiones / 2**20, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sesiones', type=int, default=50)
+    parser.add_argument('--factor', type=int, default=10, help='copias del dataset limpio')
+    args = parser.parse_args()
+
+    pd.set_option('mode.copy_on_write', True)
+    config = DatasetConfig()
+    df = replicar(cargar_datos_limpios(), args.factor)
+    df.attrs['version'] = 'bench'
+    handle = DatasetCompartido(df)
+
+    resultado = {
+        'filas': len(df),
+        'sesiones': args.sesiones,
+        'dataset_mb': round(handle.nbytes / 2**20, 1),
+        'cache_data': medir(lambda: sesion_cache_data(df, config), args.sesiones),
+        'compartido': medir(lambda: sesion_compartida(handle, config), args.sesiones),
+    }
+    resultado['reduccion'] = round(
+        resultado['cache_data']['retenida_mb'] / max(resultado['compartido']['retenida_mb'], 0.1), 1)
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == '__main__':
+    main()
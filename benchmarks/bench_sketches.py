@@ -0,0 +1,68 @@
+"""
+Benchmark: boxplots desde los rollups (`RollupStore.caja`, sketches KLL y
+extremos mensuales fusionados) contra los estadísticos exactos de cada
+columna de un dataset sintético con forma UCI. Verifica que fusionar los
+extremos mensuales dé lo mismo que `ExtremosAcotados.desde_valores` sobre la
+columna completa y que el conteo de outliers (con los límites del sketch)
+sea el exacto; termina con código 1 si alguno difiere.
+
+Uso: python benchmarks/bench_sketches.py --filas 100000 1000000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.rollups import RollupStore  # noqa: E402
+from src.sketches import ExtremosAcotados  # noqa: E402
+
+from sintetico import SENSORES, generar_estacion  # noqa: E402
+
+
+def comparar_columna(store: RollupStore, valores: np.ndarray, columna: str) -> dict:
+    inicio = time.perf_counter()
+    caja = store.caja(columna)
+    segundos = time.perf_counter() - inicio
+    fusion = ExtremosAcotados(store.m)
+    for parte in store.extremos[columna].values():
+        fusion.fusionar(parte)
+    directo = ExtremosAcotados.desde_valores(valores, store.m)
+    iqr = caja.q3 - caja.q1
+    exactos = int(((valores < caja.q1 - 1.5 * iqr) | (valores > caja.q3 + 1.5 * iqr)).sum())
+    return {
+        'segundos_caja': round(segundos, 5),
+        'n_outliers': caja.n_outliers,
+        'n_outliers_exacto': exactos,
+        'error_mediana': float(abs(caja.mediana - np.median(valores))),
+        'fusion_igual': bool(np.array_equal(fusion.bajos, directo.bajos)
+                             and np.array_equal(fusion.altos, directo.altos)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, nargs='+', default=[100_000])
+    args = parser.parse_args()
+
+    resultados, fallos = {}, []
+    for filas in args.filas:
+        df = generar_estacion(filas)
+        inicio = time.perf_counter()
+        store = RollupStore(df, SENSORES)
+        resultados[f'{filas}/materializar'] = round(time.perf_counter() - inicio, 4)
+        for columna in SENSORES:
+            r = comparar_columna(store, df[columna].dropna().to_numpy(dtype=np.float64), columna)
+            resultados[f'{filas}/{columna}'] = r
+            if not r['fusion_igual'] or r['n_outliers'] != r['n_outliers_exacto']:
+                fallos.append(f'{filas}/{columna}')
+    print(json.dumps({'resultados': resultados, 'distintos': fallos}, indent=2))
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""
+Suite de benchmarks: loaders, builders del PlotFactory y modelos sobre
+datasets sintéticos con forma UCI (`benchmarks/sintetico.py`) de varios
+tamaños. Cada caso reporta el mejor tiempo de N repeticiones y la memoria
+pico (tracemalloc, en una pasada aparte). El resultado se guarda como JSON
+(entorno, commit y una entrada por tamaño y caso) para comparar corridas;
+`--base` compara contra un JSON previo y termina con código 1 si algún caso
+es más lento que `--umbral` veces su tiempo base.
+
+Los loaders se apuntan a un directorio temporal (caché Arrow, catálogo de
+estaciones y registro de modelos), así que la suite no toca `Data/`. Sin red.
+
+Uso: python benchmarks/bench_suite.py --tamanos 10k 1M
+     python benchmarks/bench_suite.py --tamanos 10M 100M --grupos loaders --repeticiones 1
+     python benchmarks/bench_suite.py --tamanos 1M --base benchmarks/resultados/bench-<fecha>.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.loader as loader  # noqa: E402
+from src.calibration import calibrar_pares  # noqa: E402
+from src.config import DatasetConfig, TabConfig  # noqa: E402
+from src.correlation import MotorCorrelacion  # noqa: E402
+from src.estaciones import CatalogoEstaciones  # noqa: E402
+from src.imputation import imputar  # noqa: E402
+from src.ingest import iterar_raw_uci  # noqa: E402
+from src.plot_builder import FIGURE_CACHE, HISTOGRAM_CACHE, DriftBuilder, PlotFactory  # noqa: E402
+from src.registry import RegistroModelos  # noqa: E402
+
+from sintetico import (FILAS_POR_ESTACION, SENSORES, _calendario, escribir_procesados,  # noqa: E402
+                       escribir_raw_uci, estaciones)
+
+GRUPOS = ('loaders', 'builders', 'modelos')
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class Caso:
+    grupo: str
+    nombre: str
+    funcion: Callable[[], object]
+    filas: int
+    preparar: Optional[Callable[[], None]] = None   # fuera del tiempo medido
+    calentar: bool = False                          # una pasada sin medir (p. ej. caché en disco)
+
+
+def tamano(valor: str) -> int:
+    """'10k', '1M', '100M' o un entero."""
+    multiplos = {'k': 10 ** 3, 'M': 10 ** 6, 'G': 10 ** 9}
+    if valor[-1] in multiplos:
+        return int(float(valor[:-1]) * multiplos[valor[-1]])
+    return int(valor)
+
+
+def medir(caso: Caso, repeticiones: int, memoria: bool) -> dict:
+    """Mejor tiempo de `repeticiones` pasadas limpias y memoria pico en una pasada aparte."""
+    tiempos = []
+    if caso.calentar:
+        caso.funcion()
+    for _ in range(repeticiones):
+        if caso.preparar:
+            caso.preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        caso.funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    segundos = min(tiempos)
+    resultado = {'grupo': caso.grupo, 'caso': caso.nombre, 'filas': caso.filas,
+                 'segundos': round(segundos, 5), 'filas_por_segundo': round(caso.filas / segundos, 1)}
+    if memoria:
+        if caso.preparar:
+            caso.preparar()
+        gc.collect()
+        tracemalloc.start()
+        caso.funcion()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        resultado['pico_mb'] = round(pico / 2 ** 20, 2)
+    return resultado
+
+
+@contextmanager
+def loaders_aislados(directorio: Path) -> Iterator[None]:
+    """Apunta la caché, el catálogo y el registro del loader a `directorio`."""
+    previos = (loader.CACHE_DIR, loader.CATALOGO_ESTACIONES, loader.REGISTRO_MODELOS)
+    loader.CACHE_DIR = directorio / 'cache'
+    loader.CATALOGO_ESTACIONES = CatalogoEstaciones(directorio / 'estaciones')
+    loader.REGISTRO_MODELOS = RegistroModelos(directorio / 'modelos')
+    loader.clear_cache()
+    try:
+        yield
+    finally:
+        loader.CACHE_DIR, loader.CATALOGO_ESTACIONES, loader.REGISTRO_MODELOS = previos
+        loader.clear_cache()
+
+
+def _sin_cache_disco() -> None:
+    loader.clear_cache()
+    loader.clear_disk_cache()
+
+
+def _sin_cache_figuras() -> None:
+    FIGURE_CACHE.limpiar()
+    HISTOGRAM_CACHE.limpiar()
+
+
+def _semana(df: pd.DataFrame) -> tuple:
+    """Ventana de 7 días al medio del rango."""
+    centro = df.index[len(df) // 2].normalize()
+    return centro, centro + pd.Timedelta(days=7)
+
+
+def casos_loaders(rutas: Dict[str, Path], nombres: List[str], filas: int, filas_0: int,
+                  semana: tuple) -> List[Caso]:
+    limpio, raw = str(rutas['limpio']), str(rutas['raw'])
+    ultima = nombres[-1]
+
+    def ingesta():
+        for _ in iterar_raw_uci(rutas['raw_uci']):
+            pass
+
+    return [
+        Caso('loaders', 'ingesta_raw_uci', ingesta, filas_0),
+        Caso('loaders', 'limpio_csv_frio', lambda: loader.cargar_datos_limpios(limpio), filas_0,
+             _sin_cache_disco),
+        # Caché Arrow ya escrita: solo se vacía la caché en memoria
+        Caso('loaders', 'limpio_arrow_mmap', lambda: loader.cargar_datos_limpios(limpio), filas_0,
+             loader.clear_cache, calentar=True),
+        Caso('loaders', 'limpio_proyeccion_2col',
+             lambda: loader.cargar_datos_limpios(limpio, ['CO(GT)', 'PT08.S1(CO)']), filas_0, loader.clear_cache,
+             calentar=True),
+        Caso('loaders', 'limpio_rango_semana', lambda: loader.cargar_datos_limpios(limpio, None, *semana), filas_0,
+             loader.clear_cache, calentar=True),
+        Caso('loaders', 'raw_csv_frio', lambda: loader.cargar_datos_raw(raw), filas_0, _sin_cache_disco),
+        Caso('loaders', 'estaciones_completo', lambda: loader.cargar_estaciones(nombres), filas,
+             loader.clear_cache),
+        Caso('loaders', 'estacion_rango_semana', lambda: loader.cargar_estacion(ultima, *semana), filas,
+             loader.clear_cache),
+    ]
+
+
+def casos_builders(df: pd.DataFrame, df_0: pd.DataFrame) -> List[Caso]:
+    tab = TabConfig()
+    permitidas = [c for c in DatasetConfig().columns_permitidas if c in df.columns]
+
+    def imputacion():
+        builder = PlotFactory.create_imputation_comparison_builder(df_0, None, tab.get_imputation_config())
+        plt.close(builder.build('CO(GT)'))
+
+    casos = [
+        ('histograma', lambda: PlotFactory.create_histogram_builder(df, tab.get_histogram_config())
+         .build('CO(GT)')),
+        ('boxplot_3col', lambda: PlotFactory.create_boxplot_builder(df, tab.get_boxplot_config())
+         .build(['CO(GT)', 'PT08.S1(CO)', 'NOx(GT)'])),
+        ('scatter', lambda: PlotFactory.create_scatter_builder(df, tab.get_scatter_config())
+         .build('CO(GT)', 'PT08.S1(CO)', 'NOx(GT)')),
+        ('heatmap_12col', lambda: PlotFactory.create_heatmap_builder(df, tab.get_heatmap_config())
+         .build(permitidas)),
+        ('imputacion_30_dias', imputacion),
+    ]
+    # Cada repetición renderiza: las cachés de figuras e histogramas se vacían antes de medir
+    resultado = [Caso('builders', nombre, funcion, len(df), _sin_cache_figuras) for nombre, funcion in casos]
+    # Mover el slider de bins: el histograma base ya existe, solo se re-agrega
+    bins = iter(range(10**9))
+    config_bins = tab.get_histogram_config()
+    histograma = PlotFactory.create_histogram_builder(df, config_bins)
+
+    def mover_slider():
+        config_bins.bins = 5 + next(bins) % 96
+        histograma.build('CO(GT)')
+
+    resultado.append(Caso('builders', 'histograma_cambio_bins', mover_slider, len(df), FIGURE_CACHE.limpiar,
+                          calentar=True))
+    return resultado
+
+
+def casos_modelos(df: pd.DataFrame, df_0: pd.DataFrame) -> List[Caso]:
+    config = DatasetConfig()
+    predictores = ['PT08.S1(CO)', 'T', 'RH', 'AH']
+    permitidas = [c for c in config.columns_permitidas if c in df.columns]
+    n_0 = len(df_0)
+    return [
+        Caso('modelos', 'correlaciones_12col', lambda: MotorCorrelacion(df, permitidas), len(df)),
+        Caso('modelos', 'calibracion_pares',
+             lambda: calibrar_pares(MotorCorrelacion(df, permitidas), config.pares_calibracion), len(df)),
+        Caso('modelos', 'regresion_univariable',
+             lambda: PlotFactory.create_regression_plot(df_0, 'PT08.S1(CO)', 'CO(GT)'), n_0),
+        Caso('modelos', 'multivariable_lote',
+             lambda: PlotFactory.create_multivariable_regression_plot(df_0, 'CO(GT)', predictores), n_0),
+        Caso('modelos', 'multivariable_rls',
+             lambda: PlotFactory.create_multivariable_regression_plot(df_0, 'CO(GT)', predictores, 'rls'), n_0),
+        Caso('modelos', 'drift_30D', lambda: DriftBuilder(df_0, 'PT08.S1(CO)', 'CO(GT)').build(), n_0),
+    ]
+
+
+def preparar_datos(filas: int, directorio: Path, filas_por_estacion: int, con_uci: bool) -> dict:
+    """
+    Genera las estaciones sintéticas: la primera también como CSV (raw UCI,
+    raw procesado y limpio) y todas como particiones del catálogo aislado.
+    """
+    config = DatasetConfig()
+    nombres, rutas, inicio = [], {}, time.perf_counter()
+    for estacion, df in estaciones(filas, filas_por_estacion=filas_por_estacion):
+        if not nombres:
+            rutas = escribir_procesados(df, directorio / estacion, config.columns_permitidas)
+            if con_uci:
+                rutas['raw_uci'] = escribir_raw_uci(df, directorio / estacion / 'AirQualityUCI.csv')
+            limpio = loader.cargar_datos_limpios(str(rutas['limpio']))
+        else:
+            limpias = [c for c in SENSORES if c in config.columns_permitidas]
+            limpio = config.aplicar_esquema(_calendario(imputar(df, limpias).valores))
+        loader.CATALOGO_ESTACIONES.escribir(limpio, estacion)
+        nombres.append(estacion)
+    loader.clear_cache()
+    return {'nombres': nombres, 'rutas': rutas, 'segundos': round(time.perf_counter() - inicio, 2)}
+
+
+def correr_tamano(filas: int, args, directorio: Path) -> dict:
+    print(f"[{filas:,} filas] generando datos...", file=sys.stderr)
+    datos = preparar_datos(filas, directorio, args.filas_por_estacion, 'loaders' in args.grupos)
+    nombres, rutas = datos['nombres'], datos['rutas']
+    filas_0 = min(filas, args.filas_por_estacion)
+
+    df_0 = loader.cargar_datos_limpios(str(rutas['limpio']))
+    casos = []
+    if 'loaders' in args.grupos:
+        casos += casos_loaders(rutas, nombres, filas, filas_0, _semana(df_0))
+    if 'builders' in args.grupos or 'modelos' in args.grupos:
+        # Con varias estaciones, los builders y agregados usan todas las filas
+        df = df_0 if len(nombres) == 1 else loader.cargar_estaciones(nombres)
+        if 'builders' in args.grupos:
+            casos += casos_builders(df, df_0)
+        if 'modelos' in args.grupos:
+            casos += casos_modelos(df, df_0)
+
+    resultados = []
+    for caso in casos:
+        if args.casos and not any(patron in caso.nombre for patron in args.casos):
+            continue
+        print(f"[{filas:,} filas] {caso.grupo}/{caso.nombre}", file=sys.stderr)
+        resultados.append({'tamano': filas, **medir(caso, args.repeticiones, not args.sin_memoria)})
+    return {'filas': filas, 'estaciones': len(nombres), 'generacion_s': datos['segundos'],
+            'resultados': resultados}
+
+
+def entorno() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'plataforma': platform.platform(),
+            'cpus': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'pyarrow': pa.__version__}
+
+
+def comparar(actual: dict, base: dict, umbral: float) -> List[dict]:
+    """Casos (mismo tamaño y nombre) cuyo tiempo supera `umbral` veces el de la base."""
+    previos = {(r['tamano'], r['grupo'], r['caso']): r['segundos']
+               for t in base['tamanos'] for r in t['resultados']}
+    regresiones = []
+    for t in actual['tamanos']:
+        for r in t['resultados']:
+            previo = previos.get((r['tamano'], r['grupo'], r['caso']))
+            if previo and r['segundos'] > umbral * previo:
+                regresiones.append({'tamano': r['tamano'], 'caso': f"{r['grupo']}/{r['caso']}",
+                                    'base_s': previo, 'actual_s': r['segundos'],
+                                    'razon': round(r['segundos'] / previo, 2)})
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tamanos', nargs='+', type=tamano, default=[10_000, 1_000_000],
+                        help='filas por corrida: 10k 1M 10M 100M')
+    parser.add_argument('--grupos', nargs='+', choices=GRUPOS, default=list(GRUPOS))
+    parser.add_argument('--casos', nargs='*', help='solo los casos cuyo nombre contiene alguno de estos textos')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--sin-memoria', action='store_true', help='omite la pasada con tracemalloc')
+    parser.add_argument('--filas-por-estacion', type=int, default=FILAS_POR_ESTACION)
+    parser.add_argument('--salida', type=Path, default=RAIZ / 'benchmarks' / 'resultados',
+                        help='archivo .json o directorio')
+    parser.add_argument('--base', type=Path, help='JSON previo contra el que comparar')
+    parser.add_argument('--umbral', type=float, default=1.25)
+    args = parser.parse_args()
+
+    pd.set_option('mode.copy_on_write', True)
+    reporte = {'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'entorno': entorno(),
+               'parametros': {'repeticiones': args.repeticiones, 'grupos': args.grupos,
+                              'filas_por_estacion': args.filas_por_estacion},
+               'tamanos': []}
+    for filas in args.tamanos:
+        with tempfile.TemporaryDirectory(prefix='bench_suite_') as tmp, loaders_aislados(Path(tmp)):
+            reporte['tamanos'].append(correr_tamano(filas, args, Path(tmp)))
+
+    salida = args.salida
+    if salida.suffix != '.json':
+        salida.mkdir(parents=True, exist_ok=True)
+        salida = salida / f"bench-{reporte['fecha'].replace(':', '')[:17]}.json"
+    regresiones = comparar(reporte, json.loads(args.base.read_text()), args.umbral) if args.base else []
+    if args.base:
+        reporte['regresiones'] = regresiones
+    salida.write_text(json.dumps(reporte, indent=2))
+    print(json.dumps({'salida': str(salida), 'casos': sum(len(t['resultados']) for t in reporte['tamanos']),
+                      'regresiones': regresiones}, indent=2))
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Generador de datasets sintéticos con la forma del archivo UCI: las mismas 13
+columnas de sensores, índice DateTime horario y huecos `-200` en rachas con
+la fracción y el largo medio medidos sobre el archivo original (caídas del
+equipo que afectan todas las columnas y huecos propios de los analizadores
+GT). Las señales siguen ciclos diario/semanal/estacional con ruido AR(1) y
+los sensores MOX responden a los gases de referencia con una deriva lenta,
+así que las calibraciones y el drift tienen algo que medir.
+
+Un rango horario desde 2004 cabe en datetime64[ns] hasta ~2.2M filas: los
+tamaños mayores se reparten en estaciones de a lo sumo `FILAS_POR_ESTACION`.
+
+Uso: python benchmarks/sintetico.py --filas 1000000 --destino /tmp/uci_sintetico
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+from scipy import signal
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import DatasetConfig  # noqa: E402
+from src.imputation import imputar  # noqa: E402
+
+SENSORES = ['CO(GT)', 'PT08.S1(CO)', 'NMHC(GT)', 'C6H6(GT)', 'PT08.S2(NMHC)', 'NOx(GT)',
+            'PT08.S3(NOx)', 'NO2(GT)', 'PT08.S4(NO2)', 'PT08.S5(O3)', 'T', 'RH', 'AH']
+INICIO = '2004-03-10 18:00'
+FILAS_POR_ESTACION = 1_000_000
+
+# (columnas, fracción de filas, largo medio en horas) medidos sobre AirQualityUCI.csv;
+# las fracciones se suman a las caídas del equipo (CO 19%, NOx/NO2 18%, NMHC 90%)
+HUECOS = [
+    (SENSORES, 0.05, 23.0),                 # caída del equipo: todas las columnas
+    (['CO(GT)'], 0.15, 9.0),
+    (['NOx(GT)', 'NO2(GT)'], 0.14, 4.8),    # mismo analizador
+    (['NMHC(GT)'], 0.89, 1400.0),
+]
+# Decimales con que el archivo UCI publica cada columna
+DECIMALES = {**{c: 1 for c in SENSORES if '(GT)' in c}, **{c: 0 for c in SENSORES if 'PT08' in c},
+             'T': 1, 'RH': 1, 'AH': 4}
+
+
+def _ar1(rng: np.random.Generator, n: int, phi: float) -> np.ndarray:
+    """Ruido AR(1) de varianza unitaria."""
+    return signal.lfilter([np.sqrt(1 - phi ** 2)], [1, -phi], rng.standard_normal(n))
+
+
+def _rachas(rng: np.random.Generator, n: int, fraccion: float, largo_medio: float) -> np.ndarray:
+    """Máscara que cubre ~`fraccion` de las filas con rachas de largo geométrico."""
+    # Las rachas se solapan: la cobertura esperada es 1 - exp(-rachas * largo / n)
+    n_rachas = max(int(-n * np.log1p(-fraccion) / largo_medio), 1)
+    inicios = rng.integers(0, n, n_rachas)
+    fines = np.minimum(inicios + rng.geometric(1 / largo_medio, n_rachas), n)
+    cobertura = np.zeros(n + 1, dtype=np.int32)
+    np.add.at(cobertura, inicios, 1)
+    np.add.at(cobertura, fines, -1)
+    return np.cumsum(cobertura[:-1]) > 0
+
+
+def generar_estacion(filas: int, semilla: int = 0, inicio: str = INICIO) -> pd.DataFrame:
+    """Frame horario de una estación con NaN en los huecos (lo que el notebook lee de `-200`)."""
+    rng = np.random.default_rng(semilla)
+    indice = pd.date_range(inicio, periods=filas, freq='h', name='DateTime')
+    hora = indice.hour.to_numpy()
+    fin_de_semana = indice.dayofweek.to_numpy() >= 5
+    anios = np.arange(filas) / (24 * 365.25)
+
+    # Nivel de contaminación: horas punta, menos tráfico el fin de semana, persistencia AR(1)
+    trafico = 1 + 0.6 * np.exp(-((hora - 8) / 2) ** 2) + 0.8 * np.exp(-((hora - 19) / 2.5) ** 2)
+    trafico = np.where(fin_de_semana, 0.7 * trafico, trafico)
+    nivel = trafico * np.exp(0.45 * _ar1(rng, filas, 0.97) - 0.3)
+
+    def ruido(escala: float) -> np.ndarray:
+        return 1 + escala * rng.standard_normal(filas)
+
+    t = (18 + 8 * np.sin(2 * np.pi * (anios - 0.3)) + 4 * np.sin(2 * np.pi * (hora - 9) / 24)
+         + 2 * _ar1(rng, filas, 0.95))
+    rh = np.clip(50 - 1.2 * (t - 18) + 10 * _ar1(rng, filas, 0.9), 9, 89)
+    # Humedad absoluta (Magnus) llevada a la escala del archivo UCI
+    ah = 0.135 * rh / 100 * 6.112 * np.exp(17.67 * t / (t + 243.5)) * 2.1674 / (273.15 + t) * 100
+
+    co = np.clip(1.6 * nivel * ruido(0.1), 0.1, None)
+    c6h6 = np.clip(4.6 * co ** 1.1 * ruido(0.1), 0.1, None)
+    nox = np.clip(190 * nivel * ruido(0.15), 2, None)
+    no2 = np.clip((50 + 0.25 * nox) * ruido(0.1), 2, None)
+    nmhc = np.clip(100 * co * ruido(0.2), 7, None)
+    # Deriva lenta y común de los sensores MOX
+    deriva = 1 + 0.05 * np.sin(2 * np.pi * anios / 2)
+
+    datos = {
+        'CO(GT)': co, 'PT08.S1(CO)': (650 + 300 * co ** 0.6) * deriva * ruido(0.03),
+        'NMHC(GT)': nmhc, 'C6H6(GT)': c6h6,
+        'PT08.S2(NMHC)': (400 + 120 * c6h6 ** 0.7) * deriva * ruido(0.03),
+        'NOx(GT)': nox, 'PT08.S3(NOx)': 2600 * (nox + 50) ** -0.2 * deriva * ruido(0.03),
+        'NO2(GT)': no2, 'PT08.S4(NO2)': (1150 + 2.5 * no2 + 15 * (t - 18)) * deriva * ruido(0.03),
+        'PT08.S5(O3)': (500 + 250 * nivel) * deriva * ruido(0.05),
+        'T': t, 'RH': rh, 'AH': ah,
+    }
+    df = pd.DataFrame({c: np.round(datos[c], DECIMALES[c]) for c in SENSORES}, index=indice)
+
+    for columnas, fraccion, largo_medio in HUECOS:
+        df.loc[_rachas(rng, filas, fraccion, largo_medio), columnas] = np.nan
+    return df
+
+
+def estaciones(filas: int, semilla: int = 0,
+               filas_por_estacion: int = FILAS_POR_ESTACION) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Reparte `filas` en estaciones `sint-000`, `sint-001`, ... (una a la vez en memoria)."""
+    for i, desde in enumerate(range(0, filas, filas_por_estacion)):
+        yield f'sint-{i:03d}', generar_estacion(min(filas_por_estacion, filas - desde), semilla + i)
+
+
+def _formatear(fechas: pd.DatetimeIndex, formato: str, periodo: str) -> np.ndarray:
+    """`strftime` una vez por día u hora distinta (strftime por fila domina la escritura)."""
+    codigos, unicos = pd.factorize(fechas.floor(periodo) if periodo == 'D' else fechas.hour)
+    if periodo != 'D':
+        unicos = pd.to_datetime(unicos, unit='h')
+    return np.asarray(unicos.strftime(formato))[codigos]
+
+
+def _calendario(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas Date/Time y temporales con el formato de los CSV procesados."""
+    fechas = df.index
+    return df.assign(Date=_formatear(fechas, '%d/%m/%Y', 'D'), Time=_formatear(fechas, '%H:%M:%S', 'h'),
+                     dia=_formatear(fechas, '%A', 'D'), hora=fechas.hour, mes=fechas.month,
+                     fin_de_semana=fechas.dayofweek >= 5)
+
+
+def escribir_raw_uci(df: pd.DataFrame, destino: Path) -> Path:
+    """CSV con el formato de AirQualityUCI.csv (`;`, coma decimal, `-200` y dos columnas vacías)."""
+    salida = pd.DataFrame({'Date': _formatear(df.index, '%d/%m/%Y', 'D'),
+                           'Time': _formatear(df.index, '%H.%M.%S', 'h')})
+    # Los sensores MOX se publican como enteros
+    valores = df.reset_index(drop=True).astype({c: 'Int64' for c, d in DECIMALES.items() if d == 0})
+    salida = pd.concat([salida, valores], axis=1).assign(_a='', _b='')
+    salida.to_csv(destino, sep=';', decimal=',', na_rep='-200', index=False,
+                  header=['Date', 'Time'] + SENSORES + ['', ''], chunksize=100_000)
+    return destino
+
+
+def _escribir_csv(df: pd.DataFrame, destino: Path) -> None:
+    """
+    Igual que `df.to_csv(destino)` para estos frames, con el escritor CSV de
+    Arrow (~10x más rápido en millones de filas).
+    """
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    fechas = pc.strftime(pa.array(df.index.as_unit('s')), format='%Y-%m-%d %H:%M:%S')
+    tabla = tabla.add_column(0, df.index.name, fechas)
+    with open(destino, 'wb') as f:
+        f.write((','.join(tabla.column_names) + '\n').encode())
+        pcsv.write_csv(tabla, f, pcsv.WriteOptions(include_header=False, quoting_style='none'))
+
+
+def escribir_procesados(df: pd.DataFrame, directorio: Path, columnas_limpias: List[str]) -> Dict[str, Path]:
+    """
+    Los dos CSV que consume el loader: el raw procesado (con NaN) y el limpio
+    (imputado con `src.imputation.imputar`, sin NMHC(GT) como en el notebook).
+    """
+    directorio.mkdir(parents=True, exist_ok=True)
+    rutas = {'raw': directorio / 'raw.csv', 'limpio': directorio / 'limpio.csv'}
+    columnas = ['Date', 'Time'] + SENSORES + ['dia', 'hora', 'mes', 'fin_de_semana']
+    _escribir_csv(_calendario(df)[columnas], rutas['raw'])
+
+    limpias = [c for c in SENSORES if c in columnas_limpias]
+    limpio = imputar(df, limpias).valores
+    _escribir_csv(_calendario(limpio)[[c for c in columnas if c in limpias or c not in SENSORES]],
+                  rutas['limpio'])
+    return rutas
+
+
+def resumen_huecos(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Fracción de NaN y largo medio de racha por columna (para compararlos con el UCI)."""
+    resumen = {}
+    for columna in df.columns:
+        faltantes = df[columna].isna().to_numpy().astype(np.int8)
+        bordes = np.diff(np.r_[0, faltantes, 0])
+        largos = np.flatnonzero(bordes == -1) - np.flatnonzero(bordes == 1)
+        resumen[columna] = {'fraccion': round(float(faltantes.mean()), 4),
+                            'largo_medio': round(float(largos.mean()), 1) if len(largos) else 0.0}
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--destino', type=Path, required=True)
+    parser.add_argument('--filas-por-estacion', type=int, default=FILAS_POR_ESTACION)
+    args = parser.parse_args()
+
+    archivos = {}
+    for estacion, df in estaciones(args.filas, args.semilla, args.filas_por_estacion):
+        directorio = args.destino / estacion
+        rutas = escribir_procesados(df, directorio, DatasetConfig().columns_permitidas)
+        rutas['raw_uci'] = escribir_raw_uci(df, directorio / 'AirQualityUCI.csv')
+        archivos[estacion] = {'filas': len(df), 'huecos': resumen_huecos(df),
+                              **{k: str(v) for k, v in rutas.items()}}
+    print(json.dumps(archivos, indent=2))
+
+
+if __name__ == '__main__':
+    main()
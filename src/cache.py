@@ -0,0 +1,291 @@
+"""
+Caché columnar persistente para los datasets CSV.
+El primer arranque parsea el CSV y guarda el resultado como archivo Arrow IPC
+sin compresión; los arranques siguientes lo mapean en memoria (mmap) y evitan
+el parseo. La clave es ruta + mtime + tamaño del archivo fuente: si el CSV
+cambia, la entrada se invalida y se reescribe automáticamente.
+La tabla se escribe en record batches de `FILAS_BLOQUE` filas y los metadatos
+guardan un índice disperso (primer timestamp y fila de cada bloque), de modo
+que una lectura por rango temporal solo mapea los bloques que lo cubren.
+`leer_tabla`, `escribir_tabla` y `escribir_meta` son la E/S atómica que
+comparte con el catálogo de estaciones.
+"""
+import bisect
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from .trazas import tramo
+
+# Incrementar cuando cambie la limpieza aplicada por los loaders
+VERSION_FORMATO = 2
+# Cantidad de segmentos delta antes de compactar la entrada en un solo archivo
+MAX_DELTAS = 8
+# Filas por record batch (bloque del índice disperso)
+FILAS_BLOQUE = 4096
+
+
+def huella_archivo(path: Path) -> str:
+    """Retorna la huella (ruta + mtime + tamaño) de un archivo fuente."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    clave = f"{path}|{stat.st_mtime_ns}|{stat.st_size}|{VERSION_FORMATO}"
+    return hashlib.sha1(clave.encode()).hexdigest()[:16]
+
+
+def _rutas_cache(path: Path, cache_dir: Path, variante: Optional[str] = None):
+    """
+    Una entrada por archivo fuente (y variante, p. ej. una proyección de
+    columnas): datos (.arrow) y metadatos (.json).
+    """
+    path = Path(path).resolve()
+    clave = str(path) if variante is None else f"{path}|{variante}"
+    nombre = f"{path.stem}-{hashlib.sha1(clave.encode()).hexdigest()[:8]}"
+    return cache_dir / f"{nombre}.arrow", cache_dir / f"{nombre}.json"
+
+
+def leer_tabla(arrow_path: Path) -> pa.Table:
+    """Tabla Arrow IPC mapeada en memoria (sin copiar los buffers)."""
+    with pa.memory_map(str(arrow_path), 'r') as source:
+        return ipc.open_file(source).read_all()
+
+
+def escribir_tabla(arrow_path: Path, tabla: pa.Table, filas_bloque: Optional[int] = None) -> List[int]:
+    """Escribe la tabla en batches de a lo sumo `filas_bloque` filas; retorna la fila inicial de cada uno."""
+    tmp_path = arrow_path.with_suffix('.arrow.tmp')
+    inicios, fila = [], 0
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with ipc.new_file(sink, tabla.schema) as writer:
+            for batch in tabla.to_batches(max_chunksize=filas_bloque):
+                if batch.num_rows:
+                    inicios.append(fila)
+                    writer.write_batch(batch)
+                    fila += batch.num_rows
+    os.replace(tmp_path, arrow_path)
+    return inicios
+
+
+def _indice_disperso(df: pd.DataFrame, inicios: List[int]) -> Optional[List[List[int]]]:
+    """[timestamp ns, fila] del inicio de cada bloque; None si el índice no es temporal y ordenado."""
+    if not isinstance(df.index, pd.DatetimeIndex) or not df.index.is_monotonic_increasing:
+        return None
+    tiempos = df.index.as_unit('ns').asi8
+    return [[int(tiempos[f]), f] for f in inicios]
+
+
+def escribir_meta(meta_path: Path, meta: dict) -> None:
+    """Escribe el JSON de forma atómica (archivo temporal + rename)."""
+    tmp_meta = meta_path.with_suffix('.json.tmp')
+    tmp_meta.write_text(json.dumps(meta))
+    os.replace(tmp_meta, meta_path)
+
+
+def _aplicar_deltas(tabla: pa.Table, deltas: List[dict], cache_dir: Path) -> pa.Table:
+    """
+    Cada delta reemplaza las filas con índice >= `desde` de la tabla previa.
+    El recorte es un slice sin copia sobre el índice DateTime ordenado.
+    """
+    indice = _columna_indice(tabla.schema)
+    for delta in deltas:
+        segmento = leer_tabla(cache_dir / delta['archivo'])
+        fechas = tabla.column(indice).to_numpy()
+        corte = int(np.searchsorted(fechas, np.datetime64(delta['desde'])))
+        tabla = pa.concat_tables([tabla.slice(0, corte), segmento.cast(tabla.schema)])
+    return tabla
+
+
+def leer_cache(path: Path, cache_dir: Path, variante: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Lee la entrada mapeada en memoria; None si no existe o está obsoleta."""
+    arrow_path, meta_path = _rutas_cache(path, cache_dir, variante)
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get('huella') != huella_archivo(path):
+            return None
+        with tramo('arrow.mmap', 'cache', archivo=arrow_path.name):
+            tabla = leer_tabla(arrow_path)
+            tabla = _aplicar_deltas(tabla, meta.get('deltas', []), cache_dir)
+    except (FileNotFoundError, ValueError, KeyError, pa.ArrowInvalid):
+        return None
+
+    with tramo('arrow.to_pandas', 'cache', filas=tabla.num_rows):
+        df = tabla.to_pandas(split_blocks=True)
+    df.attrs['version'] = meta['huella']
+    return df
+
+
+def _ns(valor) -> int:
+    return pd.Timestamp(valor).as_unit('ns').value
+
+
+def _filas_antes(ns: int, meta: dict, lector, cache_dir: Path, n_deltas: Optional[int] = None) -> int:
+    """
+    Filas de la entrada (base + deltas) con índice < `ns`. Lee a lo sumo un
+    bloque de la base y los segmentos delta posteriores al corte.
+    """
+    deltas = meta.get('deltas', [])[:n_deltas]
+    if deltas:
+        desde = _ns(deltas[-1]['desde'])
+        if ns <= desde:
+            return _filas_antes(ns, meta, lector, cache_dir, len(deltas) - 1)
+        segmento = leer_tabla(cache_dir / deltas[-1]['archivo']).column(_columna_indice(lector.schema))
+        previas = _filas_antes(desde, meta, lector, cache_dir, len(deltas) - 1)
+        return previas + int(np.searchsorted(segmento.to_numpy(), np.datetime64(ns, 'ns')))
+    tiempos = [b[0] for b in meta['bloques']]
+    k = bisect.bisect_right(tiempos, ns) - 1
+    if k < 0:
+        return 0
+    indice = lector.get_batch(k).column(_columna_indice(lector.schema)).to_numpy()
+    return meta['bloques'][k][1] + int(np.searchsorted(indice, np.datetime64(ns, 'ns')))
+
+
+def _columna_indice(schema: pa.Schema) -> str:
+    return schema.pandas_metadata['index_columns'][0]
+
+
+def leer_rango_cache(path: Path, cache_dir: Path, inicio=None, fin=None,
+                     columnas: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Filas con índice en [inicio, fin) de la entrada principal de `path`: el
+    índice disperso elige los bloques a mapear y `columnas` se proyecta antes
+    de convertir a pandas. `attrs['fila_inicio']` es la posición de la primera
+    fila en el dataset completo. None si la entrada no existe, está obsoleta
+    o no tiene índice disperso.
+    """
+    arrow_path, meta_path = _rutas_cache(path, cache_dir)
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get('huella') != huella_archivo(path) or 'bloques' not in meta:
+            return None
+        with pa.memory_map(str(arrow_path), 'r') as source:
+            lector = ipc.open_file(source)
+            tiempos = [b[0] for b in meta['bloques']]
+            b0 = 0 if inicio is None else max(bisect.bisect_right(tiempos, _ns(inicio)) - 1, 0)
+            b1 = len(tiempos) if fin is None else bisect.bisect_left(tiempos, _ns(fin))
+            tabla = pa.Table.from_batches([lector.get_batch(i) for i in range(b0, b1)], lector.schema)
+            fila_inicio = 0 if inicio is None else _filas_antes(_ns(inicio), meta, lector, cache_dir)
+        tabla = _aplicar_deltas(tabla, meta.get('deltas', []), cache_dir)
+    except (FileNotFoundError, ValueError, KeyError, pa.ArrowInvalid):
+        return None
+
+    if columnas is not None:
+        indice = _columna_indice(tabla.schema)
+        tabla = tabla.select([c for c in tabla.column_names if c in columnas or c == indice])
+    df = tabla.to_pandas(split_blocks=True)
+    # Solo los bloques de los bordes (y los deltas) traen filas fuera del rango
+    i0 = 0 if inicio is None else df.index.searchsorted(pd.Timestamp(inicio), 'left')
+    i1 = len(df) if fin is None else df.index.searchsorted(pd.Timestamp(fin), 'left')
+    df = df.iloc[i0:i1]
+    df.attrs.update(version=meta['huella'], fila_inicio=fila_inicio)
+    return df
+
+
+def primer_indice(path: Path, cache_dir: Path) -> Optional[pd.Timestamp]:
+    """Primera marca de tiempo de la entrada según el índice disperso (sin leer datos)."""
+    _, meta_path = _rutas_cache(path, cache_dir)
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get('huella') != huella_archivo(path) or not meta.get('bloques'):
+        return None
+    return pd.Timestamp(meta['bloques'][0][0])
+
+
+def escribir_cache(path: Path, df: pd.DataFrame, cache_dir: Path,
+                   variante: Optional[str] = None) -> None:
+    """Escribe la entrada de forma atómica (archivo temporal + rename)."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    arrow_path, meta_path = _rutas_cache(path, cache_dir, variante)
+    _eliminar_deltas(meta_path, cache_dir)
+
+    with tramo('arrow.escribir', 'cache', filas=len(df)):
+        inicios = escribir_tabla(arrow_path, pa.Table.from_pandas(df, preserve_index=True), FILAS_BLOQUE)
+    meta = {'fuente': str(Path(path).resolve()), 'huella': huella_archivo(path), 'filas': len(df)}
+    bloques = _indice_disperso(df, inicios)
+    if bloques is not None:
+        meta['bloques'] = bloques
+    escribir_meta(meta_path, meta)
+
+
+def _eliminar_deltas(meta_path: Path, cache_dir: Path) -> None:
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (FileNotFoundError, ValueError):
+        return
+    for delta in meta.get('deltas', []):
+        (cache_dir / delta['archivo']).unlink(missing_ok=True)
+
+
+def anexar_cache(path: Path, delta: pd.DataFrame, desde: pd.Timestamp,
+                 huella_anterior: str, cache_dir: Path) -> bool:
+    """
+    Actualiza en sitio una entrada tras un append al archivo fuente: guarda
+    `delta` (filas con índice >= `desde`) como segmento y rota la clave a la
+    huella actual del archivo. Si la entrada no correspondía a
+    `huella_anterior` no se toca y retorna False (se reconstruirá desde el CSV).
+    """
+    arrow_path, meta_path = _rutas_cache(path, cache_dir)
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (FileNotFoundError, ValueError):
+        return False
+    if meta.get('huella') != huella_anterior:
+        return False
+
+    deltas = meta.get('deltas', [])
+    if len(deltas) >= MAX_DELTAS:
+        # Compactación: la entrada vuelve a ser un único archivo
+        tabla = _aplicar_deltas(leer_tabla(arrow_path), deltas, cache_dir)
+        df = tabla.to_pandas(split_blocks=True)
+        df = pd.concat([df[df.index < desde], delta])
+        escribir_cache(path, df, cache_dir)
+        return True
+
+    nombre = f"{arrow_path.stem}.delta-{len(deltas):03d}.arrow"
+    escribir_tabla(cache_dir / nombre, pa.Table.from_pandas(delta, preserve_index=True))
+    deltas.append({'archivo': nombre, 'desde': pd.Timestamp(desde).isoformat()})
+    meta.update(huella=huella_archivo(path), deltas=deltas)
+    escribir_meta(meta_path, meta)
+    return True
+
+
+def cargar_con_cache(path: Path, lector: Callable[[Path], pd.DataFrame],
+                     cache_dir: Path, variante: Optional[str] = None) -> pd.DataFrame:
+    """
+    Retorna el DataFrame desde la caché o, si falta, lo construye con `lector`
+    y lo persiste. Propaga FileNotFoundError si el archivo fuente no existe.
+    Las variantes (proyecciones) no reciben deltas: tras un append se
+    reconstruyen desde el archivo fuente.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(path)
+
+    df = leer_cache(path, cache_dir, variante)
+    if df is not None:
+        return df
+
+    df = lector(path)
+    try:
+        escribir_cache(path, df, cache_dir, variante)
+    except OSError:
+        # Sin permisos de escritura: se sirve el dato sin persistirlo
+        pass
+    df.attrs['version'] = huella_archivo(path)
+    return df
+
+
+def limpiar_cache(cache_dir: Path) -> None:
+    """Elimina todas las entradas de la caché en disco."""
+    if not cache_dir.exists():
+        return
+    for archivo in cache_dir.glob('*'):
+        if archivo.suffix in ('.arrow', '.json', '.tmp'):
+            archivo.unlink()
@@ -0,0 +1,60 @@
+"""
+Calibración lineal sensor → referencia en forma cerrada y por lotes.
+Reutiliza los co-momentos pairwise-complete de `MotorCorrelacion`: para un
+arreglo de pares, pendiente, intercepto, R², RMSE y errores estándar salen
+de operaciones vectorizadas sobre esos acumuladores, sin volver a leer las
+filas ni un ajuste por par en Python.
+"""
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .correlation import MotorCorrelacion
+
+COLUMNAS_CALIBRACION = ('n', 'pendiente', 'intercepto', 'r2', 'rmse', 'ee_pendiente', 'ee_intercepto')
+
+
+def calibrar_pares(motor: MotorCorrelacion, pares: Iterable[Tuple[str, str]]) -> pd.DataFrame:
+    """
+    Ajusta y = pendiente·x + intercepto para cada par (x=sensor, y=referencia)
+    sobre sus filas completas. Retorna un frame indexado por (sensor, referencia).
+    """
+    pares = [tuple(p) for p in pares]
+    i = motor._indices([x for x, _ in pares])
+    j = motor._indices([y for _, y in pares])
+
+    n = motor.n[i, j]
+    # Sumas sobre las filas completas del par, relativas al centro del motor
+    sx, sy = motor.sx[i, j], motor.sx[j, i]
+    sxx, syy, sxy = motor.sxx[i, j], motor.sxx[j, i], motor.sxy[i, j]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_x, media_y = sx / n, sy / n
+        ssx = sxx - sx * media_x
+        ssy = syy - sy * media_y
+        spxy = sxy - sx * media_y
+
+        pendiente = spxy / ssx
+        intercepto = (media_y + motor.centro[j]) - pendiente * (media_x + motor.centro[i])
+        sse = np.clip(ssy - pendiente * spxy, 0.0, None)
+        r2 = 1.0 - sse / ssy
+        rmse = np.sqrt(sse / n)
+        # Varianza residual con n - 2 grados de libertad
+        s2 = sse / (n - 2)
+        ee_pendiente = np.sqrt(s2 / ssx)
+        ee_intercepto = np.sqrt(s2 * (1.0 / n + (media_x + motor.centro[i]) ** 2 / ssx))
+
+    resultado = pd.DataFrame({
+        'n': n.astype(np.int64), 'pendiente': pendiente, 'intercepto': intercepto,
+        'r2': r2, 'rmse': rmse, 'ee_pendiente': ee_pendiente, 'ee_intercepto': ee_intercepto,
+    }, index=pd.MultiIndex.from_tuples(pares, names=['sensor', 'referencia']))
+    resultado.loc[resultado['n'] < 3, list(COLUMNAS_CALIBRACION[1:])] = np.nan
+    return resultado
+
+
+def calibrar_todos(motor: MotorCorrelacion, sensores: Sequence[str],
+                   referencias: Sequence[str]) -> pd.DataFrame:
+    """Calibra todas las combinaciones sensor × referencia en una pasada."""
+    pares: List[Tuple[str, str]] = [(s, r) for s in sensores for r in referencias if s != r]
+    return calibrar_pares(motor, pares)
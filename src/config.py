@@ -3,7 +3,12 @@ Configuración centralizada de la aplicación.
 Sigue el principio Single Responsibility: cada cambio afecta solo este módulo.
 """
 from dataclasses import dataclass, field
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DIAS_SEMANA = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
 
 @dataclass
 class HistogramConfig:
@@ -12,6 +17,8 @@ class HistogramConfig:
     color: str = "#4C72B0"
     log_scale: bool = False
     height: int = 600
+    # False: los bins se derivan del histograma base cacheado (sin releer la columna)
+    exacto: bool = False
     
 
 @dataclass
@@ -27,12 +34,18 @@ class ScatterConfig:
     alpha: float = 0.5
     size: int = 5
     height: int = 800
+    # Presupuesto de puntos enviados al navegador (~2 por píxel en 2000 px)
+    max_points: int = 4000
+    density_bins: int = 120
+    # Reducción de series temporales: 'minmax' conserva los picos de cada bucket, 'lttb' la forma
+    series_downsampling: str = 'minmax'
 
 
 @dataclass
 class HeatmapConfig:
     """Configuración para heatmaps."""
     height: int = 600
+    metodo: str = 'pearson'
 
 
 @dataclass
@@ -43,6 +56,41 @@ class ImputationComparisonConfig:
     figsize: tuple = (12, 6)
 
 
+@dataclass
+class ImputationConfig:
+    """Configuración del motor de imputación temporal."""
+    estrategia: str = 'time'
+    estrategias: Dict[str, str] = field(default_factory=dict)
+    max_gap: Optional[Union[int, str]] = None
+    rellenar_extremos: bool = True
+
+
+@dataclass
+class RLSConfig:
+    """Configuración de la calibración en línea (mínimos cuadrados recursivos)."""
+    olvido: float = 0.999   # λ: 1.0 = sin olvido (equivale al ajuste en lote)
+    delta: float = 1e4      # escala inicial de la covarianza P
+
+
+@dataclass
+class EjecucionConfig:
+    """Configuración de la capa de ejecución (ver `src.ejecutor`)."""
+    modo: str = 'serial'                # 'serial', 'hilos' o 'procesos'
+    trabajadores: Optional[int] = None  # None: todos los núcleos disponibles
+    contexto: str = 'spawn'             # arranque de los procesos (seguro con hilos activos)
+
+
+@dataclass
+class DriftConfig:
+    """Configuración del análisis de drift por ventanas móviles."""
+    ventana: str = '30D'
+    paso: str = '1D'
+    min_filas: int = 20
+    nivel_confianza: float = 0.95
+    umbral_cambio: float = 3.0      # |z| mínimo entre ventanas sin solapamiento
+    cambio_relativo: float = 0.25   # cambio mínimo de pendiente respecto a la previa
+
+
 @dataclass
 class DatasetConfig:
     """Configuración de datos permitidos."""
@@ -52,6 +100,20 @@ class DatasetConfig:
         'PT08.S5(O3)', 'T', 'RH', 'AH'
     ])
     columns_raw_extra: List[str] = field(default_factory=lambda: ['NMHC(GT)'])
+    # Pares (sensor, referencia) usados en calibración y drift
+    pares_calibracion: List[tuple] = field(default_factory=lambda: [
+        ('PT08.S1(CO)', 'CO(GT)'), ('PT08.S2(NMHC)', 'C6H6(GT)'),
+        ('PT08.S3(NOx)', 'NOx(GT)'), ('PT08.S4(NO2)', 'NO2(GT)')
+    ])
+
+    # Esquema compacto que aplica el loader: sensores en float32, calendario
+    # en tipos pequeños y Date/Time derivados del índice en vez de guardados
+    dtype_sensores: str = 'float32'
+    dtypes_calendario: Dict[str, Any] = field(default_factory=lambda: {
+        'dia': pd.CategoricalDtype(DIAS_SEMANA), 'hora': 'int8',
+        'mes': 'int8', 'fin_de_semana': 'bool',
+    })
+    columnas_derivadas: List[str] = field(default_factory=lambda: ['Date', 'Time'])
 
     def get_columns_para_raw(self) -> List[str]:
         """Retorna las columnas permitidas para raw (incluye extra)."""
@@ -67,6 +129,59 @@ class DatasetConfig:
         cols_validas = [col for col in self.get_columns_para_raw() if col in df.columns]
         return df[cols_validas]
 
+    def dtypes_lectura(self, columnas: List[str]) -> Dict[str, Any]:
+        """dtypes para `read_csv`: el esquema se aplica al parsear, sin convertir después."""
+        sensores = set(self.get_columns_para_raw())
+        return {c: self.dtypes_calendario.get(c, self.dtype_sensores) for c in columnas
+                if c in self.dtypes_calendario or c in sensores}
+
+    def esquema(self, df) -> Dict[str, Any]:
+        """dtype destino de cada columna guardada de `df`."""
+        esquema = {}
+        for col in df.columns:
+            if col in self.columnas_derivadas:
+                continue
+            if col in self.dtypes_calendario:
+                esquema[col] = self.dtypes_calendario[col]
+            elif pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+                esquema[col] = self.dtype_sensores
+        return esquema
+
+    def aplicar_esquema(self, df):
+        """Descarta Date/Time, convierte al esquema compacto y lo valida."""
+        df = df.drop(columns=[c for c in self.columnas_derivadas if c in df.columns])
+        df = df.astype(self.esquema(df))
+        problemas = self.validar_esquema(df)
+        if problemas:
+            raise ValueError("El dataset no cumple el esquema: " + "; ".join(problemas))
+        return df
+
+    def validar_esquema(self, df) -> List[str]:
+        """Lista de problemas (vacía si `df` cumple el esquema)."""
+        problemas = [f"{col}: {df[col].dtype} en lugar de {dtype}"
+                     for col, dtype in self.esquema(df).items() if df[col].dtype != dtype]
+        problemas += [f"{col} debería derivarse del índice" for col in self.columnas_derivadas
+                      if col in df.columns]
+        if problemas:
+            return problemas
+        # El calendario debe coincidir con el índice (detecta desbordes de int8)
+        fechas = df.index
+        calendario = {'dia': fechas.day_name(), 'hora': fechas.hour,
+                      'mes': fechas.month, 'fin_de_semana': fechas.dayofweek >= 5}
+        for col, esperado in calendario.items():
+            if col in df.columns and not np.array_equal(df[col].to_numpy(), np.asarray(esperado)):
+                problemas.append(f"{col} no coincide con el índice DateTime")
+        sensores = [c for c, d in self.esquema(df).items() if d == self.dtype_sensores]
+        if sensores and np.isinf(df[sensores].to_numpy()).any():
+            problemas.append(f"valores fuera de rango para {self.dtype_sensores}")
+        return problemas
+
+    @staticmethod
+    def fecha_hora(df):
+        """Columnas Date/Time del CSV original, derivadas del índice."""
+        return pd.DataFrame({'Date': df.index.strftime('%d/%m/%Y'),
+                             'Time': df.index.strftime('%H:%M:%S')}, index=df.index)
+
 
 class TabConfig:
     """Configuración mutable para cada tab de visualización."""
@@ -83,6 +198,9 @@ class TabConfig:
         self.tab3_config = {
             'imputation': ImputationComparisonConfig(),
         }
+        self.tab5_config = {
+            'drift': DriftConfig(),
+        }
 
     def update_histogram(self, **kwargs):
         """Permite actualizar configuración de histograma."""
@@ -114,6 +232,12 @@ class TabConfig:
             if hasattr(self.tab3_config['imputation'], key):
                 setattr(self.tab3_config['imputation'], key, value)
 
+    def update_drift(self, **kwargs):
+        """Permite actualizar configuración de drift."""
+        for key, value in kwargs.items():
+            if hasattr(self.tab5_config['drift'], key):
+                setattr(self.tab5_config['drift'], key, value)
+
     def get_histogram_config(self) -> HistogramConfig:
         return self.tab1_config['histogram']
 
@@ -128,3 +252,6 @@ class TabConfig:
 
     def get_imputation_config(self) -> ImputationComparisonConfig:
         return self.tab3_config['imputation']
+
+    def get_drift_config(self) -> DriftConfig:
+        return self.tab5_config['drift']
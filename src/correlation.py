@@ -0,0 +1,109 @@
+"""
+Motor de correlaciones basado en acumuladores de co-momentos.
+Para todas las parejas de columnas mantiene n, Σx, Σy, Σx², Σy² y Σxy sobre
+las filas donde ambas son válidas (semántica pairwise-complete, igual que
+`DataFrame.corr()`), calculados en una sola pasada de productos matriciales
+(BLAS). Cualquier sub-matriz o par es un slice y las filas nuevas se suman a
+los acumuladores. Spearman reutiliza el mismo motor sobre los rangos del
+dataset completo: se re-rankean todas las filas (O(n log n)) la primera vez
+que se pide tras cada cambio, y el resultado queda cacheado.
+"""
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+METODOS = ('pearson', 'spearman')
+
+
+class MotorCorrelacion:
+    """Acumuladores de co-momentos para todas las parejas de `columnas`."""
+
+    def __init__(self, df: pd.DataFrame, columnas: Optional[List[str]] = None):
+        if columnas is None:
+            columnas = df.select_dtypes('number').columns.tolist()
+        self.columnas = list(columnas)
+        self._posicion = {c: j for j, c in enumerate(self.columnas)}
+        k = len(self.columnas)
+        X = df[self.columnas].to_numpy(dtype=np.float64)
+        # Desplazamiento fijo (media inicial): la correlación no cambia y se
+        # evita la cancelación numérica de Σx² - (Σx)²/n
+        with np.errstate(all='ignore'):
+            self.centro = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(k)
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+        self.filas = 0
+        # Referencia (sin copia) al dataset completo, solo para los rangos
+        self._datos: Optional[pd.DataFrame] = df
+        self._acumular(X)
+        self._rangos: Optional['MotorCorrelacion'] = None
+
+    def _acumular(self, X: np.ndarray) -> None:
+        validos = ~np.isnan(X)
+        M = validos.astype(np.float64)
+        X0 = np.where(validos, X - self.centro, 0.0)
+        # sx[i, j] = Σ x_i sobre las filas donde x_i y x_j son válidas
+        self.n += M.T @ M
+        self.sx += X0.T @ M
+        self.sxx += (X0 * X0).T @ M
+        self.sxy += X0.T @ X0
+        self.filas += len(X)
+
+    def actualizar(self, nuevas: pd.DataFrame, datos: Optional[pd.DataFrame] = None) -> 'MotorCorrelacion':
+        """
+        Incorpora filas nuevas sin recalcular las anteriores. `datos` es el
+        dataset completo tras el append (el que ya tiene quien llama): sin
+        él, Pearson sigue disponible pero Spearman no.
+        """
+        self._acumular(nuevas.reindex(columns=self.columnas).to_numpy(dtype=np.float64))
+        # Los rangos dependen de todas las filas: se recalculan al pedirlos
+        self._datos = datos
+        self._rangos = None
+        return self
+
+    def _indices(self, columnas: Optional[List[str]]) -> np.ndarray:
+        columnas = self.columnas if columnas is None else columnas
+        return np.array([self._posicion[c] for c in columnas], dtype=np.int64)
+
+    def _pearson(self, idx: np.ndarray) -> np.ndarray:
+        sub = np.ix_(idx, idx)
+        n, sx, sxx, sxy = self.n[sub], self.sx[sub], self.sxx[sub], self.sxy[sub]
+        sy, syy = sx.T, sxx.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = n * sxy - sx * sy
+            r = cov / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+        r = np.clip(r, -1.0, 1.0)
+        r[n < 2] = np.nan
+        # La diagonal es 1 salvo columnas constantes o vacías
+        diagonal = np.diag(r).copy()
+        np.fill_diagonal(r, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return r
+
+    def _motor_rangos(self) -> 'MotorCorrelacion':
+        # Rangos por columna sobre todos sus valores válidos: con NaN es una
+        # aproximación (pandas re-rankea cada par sobre sus filas completas)
+        if self._rangos is None:
+            if self._datos is None:
+                raise ValueError("Spearman tras `actualizar` requiere el dataset completo (argumento `datos`).")
+            self._rangos = MotorCorrelacion(self._datos.reindex(columns=self.columnas).rank(), self.columnas)
+        return self._rangos
+
+    def matriz(self, columnas: Optional[List[str]] = None, metodo: str = 'pearson') -> pd.DataFrame:
+        """Matriz de correlación de `columnas` (por defecto, todas)."""
+        if metodo not in METODOS:
+            raise ValueError(f"Método no soportado: {metodo}. Usa uno de {METODOS}.")
+        columnas = self.columnas if columnas is None else list(columnas)
+        motor = self if metodo == 'pearson' else self._motor_rangos()
+        return pd.DataFrame(motor._pearson(self._indices(columnas)), index=columnas, columns=columnas)
+
+    def par(self, x: str, y: str, metodo: str = 'pearson') -> float:
+        """Correlación de un par de columnas."""
+        return float(self.matriz([x, y], metodo).iloc[0, 1])
+
+    def conteos(self, columnas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Filas completas usadas por cada par."""
+        columnas = self.columnas if columnas is None else list(columnas)
+        idx = self._indices(columnas)
+        return pd.DataFrame(self.n[np.ix_(idx, idx)].astype(np.int64), index=columnas, columns=columnas)
@@ -0,0 +1,89 @@
+"""
+Handle de solo lectura sobre un dataset cargado, pensado para compartirse
+entre todas las sesiones del dashboard (`st.cache_resource`). Los buffers
+vienen de la caché Arrow mapeada en memoria (de solo lectura); cada sesión
+obtiene vistas de columnas sin copiar datos y las columnas derivadas se
+agregan con copy-on-write (requiere `mode.copy_on_write`).
+`FuenteDatos` ofrece la misma lectura por rango (`leer(inicio, fin, columnas)`)
+sin tener el frame en memoria: el rango se empuja al loader.
+"""
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def recortar(df: pd.DataFrame, inicio=None, fin=None) -> pd.DataFrame:
+    """Filas con índice en [inicio, fin) sobre un índice ordenado (slice sin copia)."""
+    i0 = 0 if inicio is None else df.index.searchsorted(pd.Timestamp(inicio), 'left')
+    i1 = len(df) if fin is None else df.index.searchsorted(pd.Timestamp(fin), 'left')
+    recorte = df.iloc[i0:i1]
+    recorte.attrs['fila_inicio'] = df.attrs.get('fila_inicio', 0) + int(i0)
+    return recorte
+
+
+class FuenteDatos:
+    """Lectura perezosa por rango de una fuente versionada (ver `loader.fuente_datos`)."""
+
+    def __init__(self, leer: Callable[..., pd.DataFrame], version: Optional[str] = None,
+                 inicio: Optional[pd.Timestamp] = None):
+        self._leer = leer
+        self.version = version
+        self.inicio = inicio    # primera marca de tiempo (sin leer datos)
+
+    def leer(self, inicio=None, fin=None, columnas: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Filas de [inicio, fin) con las `columnas` pedidas; solo se leen los bloques del rango."""
+        return self._leer(inicio, fin, columnas)
+
+
+class DatasetCompartido:
+    """Un solo frame inmutable por versión de los datos."""
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        self.version: Optional[str] = df.attrs.get('version')
+
+    @property
+    def columnas(self) -> List[str]:
+        return self._df.columns.tolist()
+
+    @property
+    def filas(self) -> int:
+        return len(self._df)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._df.memory_usage(index=True, deep=False).sum())
+
+    def vista(self, columnas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Frame con las `columnas` indicadas (existentes) que comparte los buffers."""
+        if columnas is None:
+            vista = self._df[self._df.columns]
+        else:
+            vista = self._df[[c for c in columnas if c in self._df.columns]]
+        vista.attrs['version'] = self.version
+        return vista
+
+    def leer(self, inicio=None, fin=None, columnas: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Misma interfaz que `FuenteDatos.leer`, como slice del frame en memoria."""
+        return recortar(self.vista(None if columnas is None else list(columnas)), inicio, fin)
+
+    def con_columnas(self, columnas: Optional[List[str]] = None, **derivadas) -> pd.DataFrame:
+        """Vista más columnas derivadas; solo las nuevas ocupan memoria."""
+        return self.vista(columnas).assign(**derivadas)
+
+
+def reporte_memoria(antes: pd.DataFrame, despues: pd.DataFrame) -> pd.DataFrame:
+    """Bytes por columna (strings e índice incluidos) antes/después de un cambio de esquema."""
+    columnas = antes.columns.union(despues.columns, sort=False)
+    tabla = pd.DataFrame({
+        'dtype_antes': antes.dtypes.astype(str), 'dtype_despues': despues.dtypes.astype(str),
+        'bytes_antes': antes.memory_usage(index=False, deep=True),
+        'bytes_despues': despues.memory_usage(index=False, deep=True),
+    }).reindex(columnas)
+    tabla.loc['(índice)'] = ['', '', antes.index.memory_usage(deep=True), despues.index.memory_usage(deep=True)]
+    tabla[['dtype_antes', 'dtype_despues']] = tabla[['dtype_antes', 'dtype_despues']].fillna('-')
+    tabla[['bytes_antes', 'bytes_despues']] = tabla[['bytes_antes', 'bytes_despues']].fillna(0).astype(np.int64)
+    tabla.loc['total'] = ['', '', tabla['bytes_antes'].sum(), tabla['bytes_despues'].sum()]
+    tabla['reduccion'] = (tabla['bytes_antes'] / tabla['bytes_despues'].replace(0, np.nan)).round(2)
+    return tabla
@@ -0,0 +1,182 @@
+"""
+Histograma y KDE gaussiano en una sola pasada sobre los datos.
+Los valores se ubican una vez en una grilla fina de `g` celdas sobre
+[min, max]: la parte entera de la posición da el histograma fino (los bins
+del gráfico son sumas de celdas contiguas) y la parte fraccionaria reparte
+cada valor entre los dos nodos vecinos (binning lineal). La densidad es la
+convolución de esos pesos con el kernel gaussiano vía FFT: O(n + g log g)
+en lugar de las O(n·puntos) evaluaciones de `scipy.stats.gaussian_kde`.
+`HistogramaBase` guarda esa grilla (25200 celdas) por columna: cualquier
+cantidad de bins y la curva se derivan de ella sin volver a leer los datos.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+# Celdas mínimas de la grilla fina: el error del binning lineal es O((dx/h)²)
+CELDAS_MIN = 1024
+# Celdas del histograma base cacheado: 2⁴·3²·5²·7 tiene 34 divisores entre 5 y
+# 100 (los valores del slider de bins, cuyos conteos salen exactos)
+CELDAS_BASE = 25200
+# Columnas discretas (sensores publicados con 0-1 decimales): hasta estos valores
+# distintos se guardan sus conteos y cualquier cantidad de bins es exacta
+MAX_UNICOS = 16384
+
+
+@dataclass
+class HistogramaDensidad:
+    """Conteos por bin y la curva KDE (densidad de probabilidad) sobre `x`."""
+    conteos: np.ndarray
+    bordes: np.ndarray
+    x: np.ndarray
+    densidad: Optional[np.ndarray]    # None si los datos no tienen dispersión
+    ancho: float                      # ancho de banda del kernel (0 sin densidad)
+    aproximado: bool = False          # conteos interpolados dentro de celdas (no los de np.histogram)
+
+
+def _factor_ancho(n: int, metodo: Union[str, float]) -> float:
+    if metodo == 'scott':
+        return n ** -0.2
+    if metodo == 'silverman':
+        return (n * 3 / 4) ** -0.2
+    if isinstance(metodo, (int, float)):
+        return float(metodo)
+    raise ValueError(f"Ancho de banda no soportado: {metodo}. Usa 'scott', 'silverman' o un número.")
+
+
+def ancho_banda(valores: np.ndarray, metodo: Union[str, float] = 'scott') -> float:
+    """Ancho de banda con las reglas de `gaussian_kde` (Scott, Silverman) o un factor fijo."""
+    n = len(valores)
+    factor = _factor_ancho(n, metodo)
+    return float(np.std(valores, ddof=1)) * factor if n > 1 else 0.0
+
+
+def _convolucion_gaussiana(pesos: np.ndarray, dx: float, ancho: float) -> np.ndarray:
+    """Pesos en los nodos convolucionados con N(0, ancho²) muestreada en la grilla."""
+    radio = min(int(np.ceil(4 * ancho / dx)), len(pesos) - 1)
+    desplazamientos = np.arange(-radio, radio + 1) * dx
+    kernel = np.exp(-0.5 * (desplazamientos / ancho) ** 2) / (ancho * np.sqrt(2 * np.pi))
+    # Relleno con ceros hasta cubrir el soporte del kernel: sin aliasing circular
+    largo = len(pesos) + len(kernel) - 1
+    tamano = 1 << (largo - 1).bit_length()
+    conv = np.fft.irfft(np.fft.rfft(pesos, tamano) * np.fft.rfft(kernel, tamano), tamano)
+    return np.maximum(conv[radio:radio + len(pesos)], 0)
+
+
+class HistogramaBase:
+    """
+    Conteos de una columna en `celdas` celdas iguales sobre [min, max], con
+    los pesos del binning lineal en los nodos y la desviación estándar (para
+    el ancho de banda). Derivar un histograma o la curva cuesta O(celdas).
+    Si la columna tiene pocos valores distintos también guarda sus conteos.
+    """
+
+    def __init__(self, finos: np.ndarray, pesos: np.ndarray, minimo: float, maximo: float,
+                 desviacion: float, unicos: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        self.finos = finos
+        self.pesos = pesos
+        self.minimo = minimo
+        self.maximo = maximo
+        self.desviacion = desviacion
+        self.unicos = unicos        # (valores, conteos) o None
+        self.n = int(finos.sum())
+
+    @property
+    def celdas(self) -> int:
+        return len(self.finos)
+
+    @property
+    def nbytes(self) -> int:
+        extra = sum(a.nbytes for a in self.unicos) if self.unicos is not None else 0
+        return self.finos.nbytes + self.pesos.nbytes + extra
+
+    @classmethod
+    def calcular(cls, valores, celdas: int = CELDAS_BASE, bins: Optional[int] = None) -> 'HistogramaBase':
+        """
+        Una pasada sobre `valores`. Con `bins` (divisor de `celdas`) los
+        valores sobre un borde de bin se asignan como en np.histogram y no se
+        guardan los valores distintos (el histograma es para esos bins).
+        """
+        x = np.asarray(valores, dtype=np.float64)
+        if not len(x):
+            return cls(np.zeros(celdas, dtype=np.int64), np.zeros(celdas + 1), 0.0, 1.0, 0.0)
+        minimo, maximo = float(x.min()), float(x.max())
+        if not (np.isfinite(minimo) and np.isfinite(maximo)):
+            raise ValueError('El histograma requiere valores finitos')
+        if maximo == minimo:
+            # Mismo criterio que np.histogram para un rango vacío
+            minimo, maximo = minimo - 0.5, maximo + 0.5
+        dx = (maximo - minimo) / celdas
+
+        posicion = (x - minimo) / dx
+        celda = np.minimum(posicion.astype(np.int64), celdas - 1)   # el máximo cae en la última
+        if bins is not None:
+            # Valores sobre un borde: se corrigen contra los bordes como lo hace np.histogram
+            por_bin = celdas // bins
+            bordes = np.linspace(minimo, maximo, bins + 1)
+            bin_ = celda // por_bin
+            celda[x < bordes[bin_]] -= 1
+            celda[(x >= bordes[bin_ + 1]) & (bin_ != bins - 1)] += 1
+        fraccion = np.clip(posicion - celda, 0, 1)
+        finos = np.bincount(celda, minlength=celdas)
+        pesos = (np.bincount(celda, weights=1 - fraccion, minlength=celdas + 1)
+                 + np.bincount(celda + 1, weights=fraccion, minlength=celdas + 1))
+        desviacion = float(np.std(x, ddof=1)) if len(x) > 1 else 0.0
+        unicos = None
+        if bins is None:
+            valores, repeticiones = np.unique(x, return_counts=True)
+            unicos = (valores, repeticiones) if len(valores) <= MAX_UNICOS else None
+        return cls(finos, pesos, minimo, maximo, desviacion, unicos)
+
+    def es_exacto(self, bins: int) -> bool:
+        """Si `conteos(bins)` coincide con np.histogram."""
+        return self.unicos is not None or self.celdas % bins == 0
+
+    def conteos(self, bins: int) -> np.ndarray:
+        """
+        Conteos de `bins` bins iguales. Con los valores distintos guardados
+        son los de np.histogram; si no, y `bins` divide las celdas, es una
+        suma de celdas; si no, los bordes que caen dentro de una celda
+        reparten su conteo linealmente (error de a lo sumo una celda por borde).
+        """
+        if self.unicos is not None:
+            valores, repeticiones = self.unicos
+            bordes = np.linspace(self.minimo, self.maximo, bins + 1)
+            return np.histogram(valores, bordes, weights=repeticiones)[0].astype(np.int64)
+        if self.celdas % bins == 0:
+            return self.finos.reshape(bins, -1).sum(axis=1)
+        acumulado = np.concatenate([[0], np.cumsum(self.finos)])
+        en_bordes = np.interp(np.linspace(0, self.celdas, bins + 1), np.arange(self.celdas + 1), acumulado)
+        # Redondear el acumulado conserva el total
+        return np.diff(np.rint(en_bordes)).astype(np.int64)
+
+    def densidad(self, puntos: int = 200,
+                 ancho: Union[str, float] = 'scott') -> Tuple[np.ndarray, Optional[np.ndarray], float]:
+        """(eje, densidad en el eje, ancho de banda); sin dispersión la densidad es None."""
+        eje = np.linspace(self.minimo, self.maximo, puntos)
+        n = self.n
+        h = self.desviacion * _factor_ancho(n, ancho) if n > 1 else 0.0
+        if h <= 0:
+            return eje, None, 0.0
+        dx = (self.maximo - self.minimo) / self.celdas
+        densidad = _convolucion_gaussiana(self.pesos, dx, h) / n
+        nodos = self.minimo + np.arange(self.celdas + 1) * dx
+        return eje, np.interp(eje, nodos, densidad), h
+
+    def resultado(self, bins: int, puntos: int = 200, ancho: Union[str, float] = 'scott') -> HistogramaDensidad:
+        eje, densidad, h = self.densidad(puntos, ancho)
+        return HistogramaDensidad(self.conteos(bins), np.linspace(self.minimo, self.maximo, bins + 1),
+                                  eje, densidad, h, not self.es_exacto(bins))
+
+
+def histograma_densidad(valores, bins: int, puntos: int = 200, ancho: Union[str, float] = 'scott',
+                        celdas_min: int = CELDAS_MIN) -> HistogramaDensidad:
+    """
+    Histograma de `bins` bins iguales sobre [min, max] (los conteos de
+    np.histogram) y KDE evaluado en `puntos` valores equiespaciados del mismo
+    rango, desde una única pasada.
+    """
+    # Celdas por bin: los bordes de los bins coinciden con nodos de la grilla
+    celdas = bins * -(-celdas_min // bins)
+    return HistogramaBase.calcular(valores, celdas, bins).resultado(bins, puntos, ancho)
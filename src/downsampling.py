@@ -0,0 +1,116 @@
+"""
+Reducción de puntos en el servidor antes de construir las figuras.
+El payload enviado al navegador queda acotado por el presupuesto de puntos
+(proporcional al ancho de pantalla) y no por el tamaño de los datos:
+- LTTB (Largest-Triangle-Three-Buckets) para series de línea.
+- Envolvente min/max por bucket para series con picos que no deben perderse.
+- Binning de densidad 2D para scatter plots.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+METODOS_REDUCCION = ('lttb', 'minmax')
+
+
+def _eje_numerico(x) -> np.ndarray:
+    """Convierte fechas a float (ns relativos al inicio) para calcular áreas."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+        return (x - x[0]).astype(np.float64) if len(x) else x.astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb(x, y, n_salida: int) -> np.ndarray:
+    """
+    Índices de los `n_salida` puntos que mejor preservan la forma visual de
+    la serie (x ordenado). Conserva siempre el primer y el último punto.
+    """
+    n = len(y)
+    if n_salida >= n or n_salida < 3:
+        return np.arange(n)
+    xf, yf = _eje_numerico(x), np.asarray(y, dtype=np.float64)
+
+    # n_salida - 2 buckets entre el primer y el último punto
+    bordes = np.linspace(1, n - 1, n_salida - 1).astype(np.int64)
+    inicios, fines = bordes[:-1], bordes[1:]
+    largos = np.maximum(fines - inicios, 1)
+    # Promedio de cada bucket (se usa como tercer vértice del triángulo)
+    prom_x = np.add.reduceat(xf, inicios) / largos
+    prom_y = np.add.reduceat(yf, inicios) / largos
+    prom_x = np.append(prom_x[1:], xf[-1])
+    prom_y = np.append(prom_y[1:], yf[-1])
+
+    indices = np.empty(n_salida, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_salida - 2):
+        lo, hi = inicios[i], fines[i]
+        area = np.abs(
+            (xf[a] - prom_x[i]) * (yf[lo:hi] - yf[a])
+            - (xf[a] - xf[lo:hi]) * (prom_y[i] - yf[a])
+        )
+        a = lo + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def envolvente_minmax(y, n_buckets: int) -> np.ndarray:
+    """Índices (ordenados) del mínimo y máximo de cada bucket contiguo."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    bucket = np.arange(n) * n_buckets // n
+    orden = np.lexsort((y, bucket))
+    limites = np.searchsorted(bucket[orden], np.arange(n_buckets + 1))
+    minimos = orden[limites[:-1]]
+    maximos = orden[limites[1:] - 1]
+    return np.unique(np.concatenate([minimos, maximos]))
+
+
+def reducir_serie(serie: pd.Series, max_puntos: int, metodo: str = 'lttb') -> pd.Series:
+    """
+    Reduce una serie indexada por tiempo a lo sumo a `max_puntos` puntos con
+    LTTB (`'lttb'`) o la envolvente min/max por bucket (`'minmax'`).
+    """
+    if metodo not in METODOS_REDUCCION:
+        raise ValueError(f"Reducción no soportada: {metodo}. Usa uno de {METODOS_REDUCCION}.")
+    serie = serie.dropna()
+    if len(serie) <= max_puntos:
+        return serie
+    if metodo == 'minmax':
+        indices = envolvente_minmax(serie.to_numpy(), max_puntos // 2)
+    else:
+        indices = lttb(serie.index.to_numpy(), serie.to_numpy(), max_puntos)
+    return serie.iloc[indices]
+
+
+def densidad_2d(x, y, bins: int, valores=None
+                ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Agrega un scatter en una grilla `bins` x `bins`. Retorna los centros de
+    las celdas ocupadas, su conteo y, si se entregan `valores`, su promedio.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    validos = np.isfinite(x) & np.isfinite(y)
+    if valores is not None:
+        valores = np.asarray(valores, dtype=np.float64)
+        validos &= np.isfinite(valores)
+        valores = valores[validos]
+    x, y = x[validos], y[validos]
+
+    conteos, bx, by = np.histogram2d(x, y, bins=bins)
+    ocupadas = conteos > 0
+    cx = (bx[:-1] + bx[1:]) / 2
+    cy = (by[:-1] + by[1:]) / 2
+    gx, gy = np.meshgrid(cx, cy, indexing='ij')
+
+    promedio = None
+    if valores is not None:
+        sumas, _, _ = np.histogram2d(x, y, bins=[bx, by], weights=valores)
+        promedio = sumas[ocupadas] / conteos[ocupadas]
+    return gx[ocupadas], gy[ocupadas], conteos[ocupadas], promedio
@@ -0,0 +1,95 @@
+"""
+Motor de drift por ventanas móviles.
+Sobre las filas donde sensor y referencia son válidos arma arreglos prefijo
+(sumas acumuladas de x, y, x², y², xy); la regresión de cualquier ventana
+temporal sale de dos restas por acumulador, así que cada ventana cuesta O(1)
+y el total es O(filas + ventanas). Entrega pendiente, intercepto, banda de
+confianza de la pendiente y una marca de cambio contra la ventana anterior
+sin solapamiento.
+"""
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .config import DriftConfig
+from .ejecutor import Ejecutor, ejecutor_de
+
+
+def _prefijos(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Sumas acumuladas (con un cero inicial) de 1, x, y, x², y², xy."""
+    terminos = np.stack([np.ones_like(x), x, y, x * x, y * y, x * y])
+    prefijos = np.zeros((6, len(x) + 1))
+    np.cumsum(terminos, axis=1, out=prefijos[:, 1:])
+    return prefijos
+
+
+def deriva_ventanas(df: pd.DataFrame, sensor: str, referencia: str,
+                    config: Optional[DriftConfig] = None) -> pd.DataFrame:
+    """
+    Regresión referencia ~ sensor en ventanas [t - ventana, t) cada `paso`.
+    Las ventanas con menos de `min_filas` filas completas quedan en NaN.
+    """
+    config = config or DriftConfig()
+    datos = df[[sensor, referencia]].dropna()
+    if datos.empty:
+        return pd.DataFrame(columns=['n', 'pendiente', 'intercepto', 'ee_pendiente',
+                                     'banda_inf', 'banda_sup', 'r2', 'cambio'])
+    t = datos.index.asi8
+    x = datos[sensor].to_numpy(dtype=np.float64)
+    y = datos[referencia].to_numpy(dtype=np.float64)
+    # Centrar antes de acumular evita cancelación en las sumas de cuadrados
+    cx, cy = x.mean(), y.mean()
+    P = _prefijos(x - cx, y - cy)
+
+    ventana, paso = pd.Timedelta(config.ventana), pd.Timedelta(config.paso)
+    fines = pd.date_range(datos.index[0] + ventana, datos.index[-1] + paso, freq=paso)
+    i1 = np.searchsorted(t, fines.asi8, side='left')
+    i0 = np.searchsorted(t, (fines - ventana).asi8, side='left')
+    n, sx, sy, sxx, syy, sxy = P[:, i1] - P[:, i0]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ssx = sxx - sx * sx / n
+        ssy = syy - sy * sy / n
+        spxy = sxy - sx * sy / n
+        pendiente = spxy / ssx
+        intercepto = (sy / n + cy) - pendiente * (sx / n + cx)
+        sse = np.clip(ssy - pendiente * spxy, 0.0, None)
+        r2 = 1.0 - sse / ssy
+        ee = np.sqrt(sse / (n - 2) / ssx)
+        t_critico = stats.t.ppf(0.5 + config.nivel_confianza / 2, np.maximum(n - 2, 1))
+
+    resultado = pd.DataFrame({
+        'n': n.astype(np.int64), 'pendiente': pendiente, 'intercepto': intercepto,
+        'ee_pendiente': ee, 'banda_inf': pendiente - t_critico * ee,
+        'banda_sup': pendiente + t_critico * ee, 'r2': r2,
+    }, index=fines)
+    resultado.loc[resultado['n'] < config.min_filas, resultado.columns[1:]] = np.nan
+
+    # Cambio: la pendiente difiere de la de la ventana anterior sin solapamiento
+    # de forma significativa y relevante; se marca solo el inicio de cada tramo
+    desfase = max(1, int(round(ventana / paso)))
+    previa = resultado['pendiente'].shift(desfase)
+    ee_previo = resultado['ee_pendiente'].shift(desfase)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = resultado['pendiente'] - previa
+        z = delta / np.sqrt(resultado['ee_pendiente'] ** 2 + ee_previo ** 2)
+        relativo = delta.abs() / previa.abs()
+    fuera = ((z.abs() > config.umbral_cambio) & (relativo > config.cambio_relativo)).to_numpy()
+    resultado['cambio'] = fuera & ~np.concatenate([[False], fuera[:-1]])
+    return resultado
+
+
+def _deriva_par(df: pd.DataFrame, tarea: Tuple[str, str, Optional[DriftConfig]]) -> pd.DataFrame:
+    sensor, referencia, config = tarea
+    return deriva_ventanas(df, sensor, referencia, config)
+
+
+def deriva_pares(df: pd.DataFrame, pares: Iterable[Tuple[str, str]],
+                 config: Optional[DriftConfig] = None, ejecutor: Optional[Ejecutor] = None) -> pd.DataFrame:
+    """Drift de varios pares (repartidos en `ejecutor`); columnas MultiIndex (sensor, métrica)."""
+    pares = [tuple(p) for p in pares]
+    columnas = list(dict.fromkeys(c for par in pares for c in par))
+    resultados = ejecutor_de(ejecutor).mapear(_deriva_par, [(s, r, config) for s, r in pares], df, columnas)
+    return pd.concat({sensor: r for (sensor, _), r in zip(pares, resultados)}, axis=1)
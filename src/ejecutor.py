@@ -0,0 +1,277 @@
+"""
+Capa de ejecución para trabajo independiente por columna o por par
+(histogramas base, ajustes de modelos, drift, sketches de rollups).
+`ejecutor_de(config)` entrega un ejecutor serial (determinista, el de
+referencia), de hilos o de procesos con la misma interfaz:
+`mapear(funcion, tareas, df)` llama `funcion(frame, tarea)` por tarea y
+devuelve los resultados en el orden de `tareas`.
+
+En el pool de procesos las columnas numéricas no se serializan:
+`TablaCompartida` las copia una vez a un bloque de memoria compartida (una
+matriz por dtype más el índice) y cada proceso arma un DataFrame que apunta
+a ese bloque, sin copiar. Las columnas sin dtype nativo de numpy
+(categóricas, texto, extensiones de pandas) viajan serializadas con cada
+lote; son las pocas de calendario, no los sensores.
+"""
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .config import EjecucionConfig
+from .trazas import tramo
+
+MODOS = ('serial', 'hilos', 'procesos')
+
+
+@dataclass(frozen=True)
+class DescriptorTabla:
+    """Lo que un proceso necesita para adjuntar una `TablaCompartida` (picklable)."""
+    nombre: str
+    filas: int
+    columnas: Tuple[str, ...]
+    grupos: Tuple[Tuple[str, int, Tuple[int, ...]], ...]   # (dtype, offset en bytes, posiciones)
+    indice: Optional[Tuple[str, int, Optional[str]]]       # (dtype, offset, nombre del índice)
+    resto: Optional[pd.DataFrame] = None                   # columnas no nativas, sin índice
+
+
+def _nativo(dtype) -> bool:
+    """dtype que cabe en una matriz de numpy sin objetos de Python."""
+    return isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM'
+
+
+def _alinear(offset: int) -> int:
+    return (offset + 63) // 64 * 64
+
+
+class TablaCompartida:
+    """
+    Columnas de dtype nativo de numpy de un frame (y su índice) en un bloque
+    de memoria compartida; las demás se copian al descriptor.
+    """
+
+    def __init__(self, df: pd.DataFrame, columnas: Optional[Sequence[str]] = None):
+        columnas = list(df.columns if columnas is None else dict.fromkeys(columnas))
+        filas = len(df)
+        # Una matriz (columnas, filas) por dtype: el frame del proceso es un bloque por dtype
+        por_dtype: Dict[str, List[int]] = {}
+        otras = []
+        for posicion, columna in enumerate(columnas):
+            if _nativo(df[columna].dtype):
+                por_dtype.setdefault(df[columna].dtype.str, []).append(posicion)
+            else:
+                otras.append(columna)
+        offset, grupos = 0, []
+        for dtype, posiciones in por_dtype.items():
+            grupos.append((dtype, offset, tuple(posiciones)))
+            offset = _alinear(offset + len(posiciones) * filas * np.dtype(dtype).itemsize)
+        indice = None
+        if isinstance(df.index, pd.DatetimeIndex):
+            indice = (df.index.dtype.str, offset, df.index.name)
+            offset += filas * 8
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        resto = df[otras].reset_index(drop=True) if otras else None
+        self.descriptor = DescriptorTabla(self._shm.name, filas, tuple(columnas), tuple(grupos), indice, resto)
+        for dtype, inicio, posiciones in grupos:
+            matriz = np.ndarray((len(posiciones), filas), dtype=dtype, buffer=self._shm.buf, offset=inicio)
+            for fila, posicion in enumerate(posiciones):
+                matriz[fila] = df[columnas[posicion]].to_numpy()
+        if indice is not None:
+            np.ndarray(filas, dtype=np.int64, buffer=self._shm.buf, offset=indice[1])[:] = df.index.asi8
+
+    def cerrar(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> 'TablaCompartida':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+
+def _frame_compartido(shm: shared_memory.SharedMemory, descriptor: DescriptorTabla) -> pd.DataFrame:
+    """DataFrame de solo lectura sobre el bloque compartido (sin copiar los datos)."""
+    filas = descriptor.filas
+    indice = None
+    if descriptor.indice is not None:
+        dtype, offset, nombre = descriptor.indice
+        valores = np.ndarray(filas, dtype=np.int64, buffer=shm.buf, offset=offset)
+        indice = pd.DatetimeIndex(valores.view(dtype), name=nombre)
+    partes = []
+    for dtype, offset, posiciones in descriptor.grupos:
+        matriz = np.ndarray((len(posiciones), filas), dtype=dtype, buffer=shm.buf, offset=offset)
+        matriz.flags.writeable = False
+        partes.append(pd.DataFrame(matriz.T, index=indice, columns=[descriptor.columnas[p] for p in posiciones],
+                                   copy=False))
+    if descriptor.resto is not None:
+        resto = descriptor.resto
+        partes.append(resto.set_axis(indice) if indice is not None else resto)
+    if len(partes) == 1:
+        return partes[0]
+    return pd.concat(partes, axis=1, copy=False)[list(descriptor.columnas)]
+
+
+def _con_tabla(descriptor: DescriptorTabla, funcion: Callable, tareas: Sequence) -> List[Any]:
+    shm = shared_memory.SharedMemory(descriptor.nombre)
+    try:
+        frame = _frame_compartido(shm, descriptor)
+        resultados = [funcion(frame, tarea) for tarea in tareas]
+        del frame
+        return resultados
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # Quedan vistas vivas (p. ej. en un ciclo de referencias): el mapeo se libera con ellas
+            pass
+
+
+def _sin_tabla(funcion: Callable, tareas: Sequence) -> List[Any]:
+    return [funcion(None, tarea) for tarea in tareas]
+
+
+def _lotes(tareas: Sequence, cantidad: int) -> List[Sequence]:
+    tamano = max(1, math.ceil(len(tareas) / cantidad))
+    return [tareas[i:i + tamano] for i in range(0, len(tareas), tamano)]
+
+
+class Ejecutor(ABC):
+    """Aplica una función a cada tarea; los resultados respetan el orden de las tareas."""
+
+    modo: str = 'serial'
+    trabajadores: int = 1
+
+    @abstractmethod
+    def mapear(self, funcion: Callable[[Optional[pd.DataFrame], Any], Any], tareas: Sequence,
+               df: Optional[pd.DataFrame] = None, columnas: Optional[Sequence[str]] = None) -> List[Any]:
+        """
+        `funcion(frame, tarea)` para cada tarea, con `frame` = `df[columnas]`
+        (None si no hay `df`). En procesos, `funcion` debe ser importable.
+        """
+
+    def cerrar(self) -> None:
+        pass
+
+
+class EjecutorSerial(Ejecutor):
+    """En el hilo actual y en orden: el resultado de referencia."""
+
+    def mapear(self, funcion, tareas, df=None, columnas=None):
+        frame = df if df is None or columnas is None else df[list(columnas)]
+        return [funcion(frame, tarea) for tarea in tareas]
+
+
+class EjecutorHilos(Ejecutor):
+    """Pool de hilos: comparte el frame sin copias; rinde cuando numpy libera el GIL."""
+
+    modo = 'hilos'
+
+    def __init__(self, trabajadores: int):
+        self.trabajadores = trabajadores
+        self._pool = ThreadPoolExecutor(trabajadores, thread_name_prefix='ejecutor')
+
+    def mapear(self, funcion, tareas, df=None, columnas=None):
+        frame = df if df is None or columnas is None else df[list(columnas)]
+        return list(self._pool.map(lambda tarea: funcion(frame, tarea), tareas))
+
+    def cerrar(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+class EjecutorProcesos(Ejecutor):
+    """Pool de procesos; el frame viaja por memoria compartida, las tareas en lotes."""
+
+    modo = 'procesos'
+
+    def __init__(self, trabajadores: int, contexto: str = 'spawn'):
+        self.trabajadores = trabajadores
+        self.contexto = contexto
+        self.fallos = 0
+        self._pool = self._nuevo_pool()
+
+    def _nuevo_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.trabajadores, mp_context=multiprocessing.get_context(self.contexto))
+
+    def mapear(self, funcion, tareas, df=None, columnas=None):
+        tareas = list(tareas)
+        if not tareas:
+            return []
+        try:
+            return self._mapear(funcion, tareas, df, columnas)
+        except BrokenProcessPool:
+            # Un proceso murió (memoria, señal) o no pudo arrancar: esta llamada
+            # se resuelve en serie (mismo resultado) y el pool se recrea
+            self.fallos += 1
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._nuevo_pool()
+            return SERIAL.mapear(funcion, tareas, df, columnas)
+
+    def _mapear(self, funcion, tareas, df, columnas):
+        # Varios lotes por proceso reparten mejor tareas de costo desigual
+        lotes = _lotes(tareas, 4 * self.trabajadores)
+        if df is None:
+            futuros = [self._pool.submit(_sin_tabla, funcion, lote) for lote in lotes]
+            return [r for futuro in futuros for r in futuro.result()]
+        with tramo('ejecutor.memoria_compartida', 'ejecutor', filas=len(df)):
+            tabla = TablaCompartida(df, columnas)
+        with tabla:
+            futuros = [self._pool.submit(_con_tabla, tabla.descriptor, funcion, lote) for lote in lotes]
+            return [r for futuro in futuros for r in futuro.result()]
+
+    def cerrar(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+SERIAL = EjecutorSerial()
+_POOLS: Dict[Tuple[str, int, str], Ejecutor] = {}
+_LOCK = threading.Lock()
+
+
+def trabajadores_disponibles() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def ejecutor_de(config: Union[EjecucionConfig, Ejecutor, None] = None) -> Ejecutor:
+    """
+    Ejecutor para la configuración (los pools se crean una vez y se reutilizan).
+    Con un solo trabajador, o sin configuración, es el serial.
+    """
+    if isinstance(config, Ejecutor):
+        return config
+    config = config or EjecucionConfig()
+    if config.modo not in MODOS:
+        raise ValueError(f"Modo de ejecución no soportado: {config.modo}. Usa uno de {MODOS}.")
+    trabajadores = config.trabajadores or trabajadores_disponibles()
+    if config.modo == 'serial' or trabajadores <= 1:
+        return SERIAL
+    clave = (config.modo, trabajadores, config.contexto)
+    with _LOCK:
+        if clave not in _POOLS:
+            _POOLS[clave] = (EjecutorHilos(trabajadores) if config.modo == 'hilos'
+                             else EjecutorProcesos(trabajadores, config.contexto))
+        return _POOLS[clave]
+
+
+@atexit.register
+def cerrar_pools() -> None:
+    with _LOCK:
+        for ejecutor in _POOLS.values():
+            ejecutor.cerrar()
+        _POOLS.clear()
@@ -0,0 +1,164 @@
+"""
+Almacenamiento particionado para múltiples estaciones de monitoreo.
+Cada estación se guarda como archivos Arrow IPC mensuales
+(`<raiz>/<estacion>/<año>/<mes>.arrow`) y un catálogo JSON registra por
+partición el rango temporal, las filas y la huella del archivo. Las lecturas
+filtran el catálogo por estación (diccionario) y rango (búsqueda binaria
+sobre las particiones ordenadas) y solo mapean en memoria los archivos que
+coinciden, así que el costo es proporcional a las particiones tocadas.
+"""
+import bisect
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from .cache import escribir_meta, escribir_tabla, huella_archivo, leer_tabla
+
+NOMBRE_CATALOGO = 'catalogo.json'
+_ESTACION_VALIDA = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+@dataclass
+class Particion:
+    """Entrada del catálogo: un mes de una estación."""
+    estacion: str
+    anio: int
+    mes: int
+    archivo: str    # relativo a la raíz
+    filas: int
+    inicio: str     # primera marca de tiempo (ISO)
+    fin: str        # última marca de tiempo (ISO)
+    huella: str
+
+    @property
+    def clave(self) -> tuple:
+        return (self.anio, self.mes)
+
+
+def _timestamp(valor) -> Optional[pd.Timestamp]:
+    return None if valor is None else pd.Timestamp(valor)
+
+
+class CatalogoEstaciones:
+    """Catálogo e I/O de las particiones estación/año/mes bajo `raiz`."""
+
+    def __init__(self, raiz: Path):
+        self.raiz = Path(raiz)
+        self._particiones: Optional[Dict[str, List[Particion]]] = None
+        self._mtime: Optional[int] = None
+
+    @property
+    def ruta_catalogo(self) -> Path:
+        return self.raiz / NOMBRE_CATALOGO
+
+    def _catalogo(self) -> Dict[str, List[Particion]]:
+        """Catálogo en memoria; se recarga si otro proceso lo reescribió."""
+        try:
+            mtime = self.ruta_catalogo.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._particiones, self._mtime = {}, None
+            return self._particiones
+        if self._particiones is None or mtime != self._mtime:
+            datos = json.loads(self.ruta_catalogo.read_text())
+            self._particiones = {
+                estacion: [Particion(**p) for p in entradas]
+                for estacion, entradas in datos['particiones'].items()
+            }
+            self._mtime = mtime
+        return self._particiones
+
+    def _guardar_catalogo(self, particiones: Dict[str, List[Particion]]) -> None:
+        datos = {'particiones': {e: [asdict(p) for p in ps] for e, ps in sorted(particiones.items())}}
+        escribir_meta(self.ruta_catalogo, datos)
+        self._particiones, self._mtime = particiones, self.ruta_catalogo.stat().st_mtime_ns
+
+    def estaciones(self) -> List[str]:
+        return sorted(self._catalogo())
+
+    def particiones(self, estacion: str, inicio=None, fin=None) -> List[Particion]:
+        """Particiones de `estacion` que se solapan con [inicio, fin)."""
+        entradas = self._catalogo().get(estacion)
+        if entradas is None:
+            raise KeyError(f"Estación desconocida: {estacion}")
+        inicio, fin = _timestamp(inicio), _timestamp(fin)
+        claves = [p.clave for p in entradas]
+        i0 = 0 if inicio is None else bisect.bisect_left(claves, (inicio.year, inicio.month))
+        i1 = len(entradas) if fin is None else bisect.bisect_right(claves, (fin.year, fin.month))
+        seleccion = entradas[i0:i1]
+        # Los meses de los bordes solo cuentan si tienen filas dentro del rango
+        if inicio is not None and seleccion and pd.Timestamp(seleccion[0].fin) < inicio:
+            seleccion = seleccion[1:]
+        if fin is not None and seleccion and pd.Timestamp(seleccion[-1].inicio) >= fin:
+            seleccion = seleccion[:-1]
+        return seleccion
+
+    def version(self, estacion: str, inicio=None, fin=None) -> str:
+        """Huella de los datos de una lectura: cambia si cambia alguna partición tocada."""
+        huellas = [p.huella for p in self.particiones(estacion, inicio, fin)]
+        clave = json.dumps([estacion, str(inicio), str(fin), huellas])
+        return hashlib.sha1(clave.encode()).hexdigest()[:16]
+
+    def escribir(self, df: pd.DataFrame, estacion: str) -> List[Particion]:
+        """
+        Guarda `df` (índice DateTime) como particiones mensuales de `estacion`.
+        Los meses presentes en `df` reemplazan a los existentes; el resto del
+        catálogo no se toca.
+        """
+        if not _ESTACION_VALIDA.match(estacion):
+            raise ValueError(f"Nombre de estación inválido: {estacion!r}")
+        df = df.sort_index()
+        nuevas = []
+        for (anio, mes), parte in df.groupby([df.index.year, df.index.month], sort=True):
+            relativa = Path(estacion) / f'{anio:04d}' / f'{mes:02d}.arrow'
+            ruta = self.raiz / relativa
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            escribir_tabla(ruta, pa.Table.from_pandas(parte, preserve_index=True))
+            nuevas.append(Particion(estacion, int(anio), int(mes), relativa.as_posix(), len(parte),
+                                    parte.index[0].isoformat(), parte.index[-1].isoformat(),
+                                    huella_archivo(ruta)))
+
+        particiones = {e: list(ps) for e, ps in self._catalogo().items()}
+        reemplazos = {p.clave: p for p in nuevas}
+        previas = [p for p in particiones.get(estacion, []) if p.clave not in reemplazos]
+        particiones[estacion] = sorted(previas + nuevas, key=lambda p: p.clave)
+        self._guardar_catalogo(particiones)
+        return nuevas
+
+    def _tabla(self, particion: Particion, columnas: Optional[Sequence[str]]) -> pa.Table:
+        tabla = leer_tabla(self.raiz / particion.archivo)
+        if columnas is not None:
+            indice = tabla.schema.pandas_metadata['index_columns']
+            tabla = tabla.select([c for c in tabla.column_names if c in columnas or c in indice])
+        return tabla
+
+    def leer(self, estaciones: Union[str, Sequence[str]], inicio=None, fin=None,
+             columnas: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Filas de [inicio, fin) de una estación o de varias. Con varias se agrega
+        la columna categórica `estacion`. Solo se abren las particiones que
+        coinciden y `columnas` se proyecta antes de convertir a pandas.
+        """
+        una = isinstance(estaciones, str)
+        partes = []
+        for estacion in ([estaciones] if una else estaciones):
+            tablas = [self._tabla(p, columnas) for p in self.particiones(estacion, inicio, fin)]
+            if not tablas:
+                continue
+            df = pa.concat_tables(tablas).to_pandas(split_blocks=True)
+            # Solo las particiones de los bordes tienen filas fuera del rango
+            i0 = 0 if inicio is None else df.index.searchsorted(pd.Timestamp(inicio), 'left')
+            i1 = len(df) if fin is None else df.index.searchsorted(pd.Timestamp(fin), 'left')
+            df = df.iloc[i0:i1]
+            partes.append(df if una else df.assign(estacion=estacion))
+        if not partes:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='DateTime'))
+        df = partes[0] if una else pd.concat(partes)
+        if not una:
+            df['estacion'] = pd.Categorical(df['estacion'], categories=list(estaciones))
+        return df
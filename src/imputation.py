@@ -0,0 +1,197 @@
+"""
+Motor de imputación temporal vectorizado y consciente de huecos.
+Calcula una sola vez el índice run-length de rachas de NaN de todas las
+columnas y rellena cada racha en una única pasada NumPy, con límite de hueco
+máximo y estrategia por columna. Devuelve la máscara de imputación junto a
+los valores para que las vistas no tengan que re-derivarla comparando frames.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .config import ImputationConfig
+
+# Estrategias soportadas por columna
+ESTRATEGIAS = ('time', 'linear', 'ffill', 'none')
+
+
+@dataclass
+class RachasFaltantes:
+    """Índice run-length de huecos: una entrada por racha de NaN consecutivos."""
+    columna: np.ndarray   # posición de la columna de la racha
+    inicio: np.ndarray    # primera fila faltante
+    largo: np.ndarray     # cantidad de filas faltantes
+    n_filas: int
+
+    @property
+    def fin(self) -> np.ndarray:
+        return self.inicio + self.largo
+
+    def de_columna(self, j: int) -> pd.DataFrame:
+        sel = self.columna == j
+        return pd.DataFrame({'inicio': self.inicio[sel], 'largo': self.largo[sel]})
+
+
+@dataclass
+class ResultadoImputacion:
+    """Valores imputados y máscara booleana (True = valor rellenado)."""
+    valores: pd.DataFrame
+    mascara: pd.DataFrame
+    rachas: RachasFaltantes
+
+
+def calcular_rachas(faltantes: np.ndarray) -> RachasFaltantes:
+    """Detecta todas las rachas de una matriz booleana (filas x columnas) a la vez."""
+    n, k = faltantes.shape
+    # Columna por fila, con un False de relleno a cada lado: los cambios de
+    # estado alternan inicio/fin de racha y salen ordenados por columna
+    relleno = np.zeros((k, n + 2), dtype=bool)
+    relleno[:, 1:-1] = faltantes.T
+    bordes = np.flatnonzero(relleno[:, 1:] != relleno[:, :-1])
+    inicios, fines = bordes[0::2], bordes[1::2]
+    columna, fila_ini = np.divmod(inicios, n + 1)
+    return RachasFaltantes(columna, fila_ini, fines - inicios, n)
+
+
+def _filas_expandidas(inicio: np.ndarray, largo: np.ndarray) -> np.ndarray:
+    """Expande rachas (inicio, largo) a los índices de fila que cubren."""
+    desplazamiento = np.arange(largo.sum()) - np.repeat(np.cumsum(largo) - largo, largo)
+    return np.repeat(inicio, largo) + desplazamiento
+
+
+def imputar(df: pd.DataFrame, columnas: Optional[List[str]] = None,
+            config: Optional[ImputationConfig] = None,
+            max_gap: Union[int, str, pd.Timedelta, None] = None,
+            estrategias: Optional[Dict[str, str]] = None) -> ResultadoImputacion:
+    """
+    Rellena los NaN de `columnas` (por defecto, todas las float) según la
+    estrategia de cada columna. `max_gap` limita el largo de hueco rellenable:
+    un entero cuenta filas; un string/Timedelta mide el tiempo entre las
+    observaciones válidas que lo rodean. Los huecos más largos quedan en NaN.
+    """
+    config = config or ImputationConfig()
+    max_gap = max_gap if max_gap is not None else config.max_gap
+    estrategias = {**config.estrategias, **(estrategias or {})}
+    if columnas is None:
+        columnas = [c for c in df.columns if pd.api.types.is_float_dtype(df[c])]
+
+    X = df[columnas].to_numpy(dtype=np.float64, copy=True)
+    n, k = X.shape
+    rachas = calcular_rachas(np.isnan(X))
+    mascara = np.zeros((n, k), dtype=bool)
+    es_temporal = isinstance(df.index, pd.DatetimeIndex)
+
+    codigos = np.array([ESTRATEGIAS.index(estrategias.get(c, config.estrategia)) for c in columnas],
+                       dtype=np.int8)
+    cod = codigos[rachas.columna]
+    ini, largo, col = rachas.inicio, rachas.largo, rachas.columna
+    previo, siguiente = ini - 1, ini + largo
+    tiene_previo, tiene_siguiente = previo >= 0, siguiente < n
+
+    # Qué rachas se rellenan: estrategia, extremos (bfill/ffill) y hueco máximo
+    rellenable = cod != ESTRATEGIAS.index('none')
+    rellenable &= (tiene_previo & tiene_siguiente) | (
+        config.rellenar_extremos & (tiene_previo | tiene_siguiente))
+    if max_gap is not None:
+        if isinstance(max_gap, (int, np.integer)):
+            rellenable &= largo <= max_gap
+        else:
+            if not es_temporal:
+                raise ValueError("Un max_gap temporal requiere un índice DatetimeIndex.")
+            # Tiempo entre las observaciones válidas que rodean el hueco
+            # (en los extremos, hasta la fila faltante más lejana)
+            t = df.index.asi8
+            desde = t[np.where(tiene_previo, previo, ini)]
+            hasta = t[np.where(tiene_siguiente, siguiente, siguiente - 1)]
+            rellenable &= (hasta - desde) <= pd.Timedelta(max_gap).value
+
+    sel = rellenable
+    filas = _filas_expandidas(ini[sel], largo[sel])
+    cols = np.repeat(col[sel], largo[sel])
+    p = np.repeat(previo[sel], largo[sel])
+    s = np.repeat(siguiente[sel], largo[sel])
+    c = np.repeat(cod[sel], largo[sel])
+
+    # En los extremos falta un vecino: se usa el del otro lado (bfill/ffill)
+    p_ok, s_ok = p >= 0, s < n
+    p, s = np.where(p_ok, p, s), np.where(s_ok, s, p)
+    y0, y1 = X[p, cols], X[s, cols]
+
+    # Eje de interpolación: tiempo ('time') o posición ('linear')
+    if es_temporal:
+        # Relativo al inicio para no perder precisión al pasar ns a float
+        eje = (df.index.asi8 - df.index.asi8[0]).astype(np.float64) if n else np.empty(0)
+    else:
+        eje = np.arange(n, dtype=np.float64)
+    usa_tiempo = c == ESTRATEGIAS.index('time')
+    x = np.where(usa_tiempo, eje[filas], filas)
+    x0 = np.where(usa_tiempo, eje[p], p)
+    x1 = np.where(usa_tiempo, eje[s], s)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peso = np.where(p_ok & s_ok, (x - x0) / (x1 - x0), 0.0)
+    # ffill copia el último valor válido
+    peso[c == ESTRATEGIAS.index('ffill')] = 0.0
+
+    X[filas, cols] = y0 + peso * (y1 - y0)
+    mascara[filas, cols] = True
+
+    return ResultadoImputacion(
+        valores=pd.DataFrame(X, index=df.index, columns=columnas),
+        mascara=pd.DataFrame(mascara, index=df.index, columns=columnas),
+        rachas=rachas,
+    )
+
+
+
+class MascaraCompacta:
+    """
+    Máscara de imputación empaquetada a 1 bit por valor (una fila de bytes
+    por columna). Se calcula una vez al cargar y se guarda junto al dataset
+    limpio; las consultas por ventana desempaquetan solo los bytes del rango.
+    """
+
+    def __init__(self, columnas: List[str], bits: np.ndarray, n_filas: int, version: str = ''):
+        self.columnas = list(columnas)
+        self.bits = bits
+        self.n_filas = n_filas
+        self.version = version
+        self._posicion = {c: j for j, c in enumerate(self.columnas)}
+
+    @classmethod
+    def desde_mascara(cls, mascara: pd.DataFrame, version: str = '') -> 'MascaraCompacta':
+        bits = np.packbits(mascara.to_numpy(dtype=bool).T, axis=1, bitorder='little')
+        return cls(mascara.columns.tolist(), bits, len(mascara), version)
+
+    def __contains__(self, columna: str) -> bool:
+        return columna in self._posicion
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def columna(self, columna: str, inicio: int = 0, fin: Optional[int] = None) -> np.ndarray:
+        """Valores booleanos de `columna` en las filas [inicio, fin)."""
+        fin = self.n_filas if fin is None else min(fin, self.n_filas)
+        inicio = max(0, inicio)
+        if fin <= inicio:
+            return np.zeros(0, dtype=bool)
+        fila = self.bits[self._posicion[columna]]
+        b0, b1 = inicio // 8, (fin + 7) // 8
+        valores = np.unpackbits(fila[b0:b1], bitorder='little').astype(bool)
+        return valores[inicio - b0 * 8:fin - b0 * 8]
+
+    def conteo(self, columna: str) -> int:
+        """Cantidad de valores imputados (popcount sobre los bytes)."""
+        return int(np.unpackbits(self.bits[self._posicion[columna]]).sum())
+
+    def guardar(self, path) -> None:
+        np.savez(path, bits=self.bits, columnas=np.array(self.columnas),
+                 n_filas=self.n_filas, version=self.version)
+
+    @classmethod
+    def cargar(cls, path) -> 'MascaraCompacta':
+        with np.load(path) as datos:
+            return cls(datos['columnas'].tolist(), datos['bits'],
+                       int(datos['n_filas']), str(datos['version']))
@@ -0,0 +1,151 @@
+"""
+Modo de ingesta incremental para el dataset limpio.
+Anexa solo timestamps nuevos, re-interpola únicamente la ventana final
+afectada (desde el último valor válido de cada columna) y actualiza los CSV
+y la caché Arrow en sitio, de modo que el costo escala con las filas nuevas y
+no con el histórico completo.
+"""
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from .cache import anexar_cache, huella_archivo
+from .imputation import imputar
+from .loader import (
+    CACHE_DIR,
+    CLEANED_DATA_PATH,
+    RAW_DATA_PATH,
+    cargar_datos_limpios,
+    cargar_datos_raw,
+)
+
+_BLOQUE = 64 * 1024
+
+
+@dataclass
+class ResultadoAnexo:
+    """Resumen de un append incremental."""
+    filas_nuevas: int
+    filas_reinterpoladas: int
+    inicio_ventana: Optional[pd.Timestamp]
+
+
+def _completar_derivadas(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega Date/Time y variables temporales si el lote no las trae."""
+    fechas = df.index
+    derivadas = {
+        'Date': fechas.strftime('%d/%m/%Y'),
+        'Time': fechas.strftime('%H:%M:%S'),
+        'dia': fechas.day_name(),
+        'hora': fechas.hour,
+        'mes': fechas.month,
+        'fin_de_semana': fechas.dayofweek >= 5,
+    }
+    faltantes = {k: v for k, v in derivadas.items() if k not in df.columns}
+    return df.assign(**faltantes) if faltantes else df
+
+
+def columnas_interpolables(df_clean: pd.DataFrame, df_raw: pd.DataFrame) -> List[str]:
+    """Columnas numéricas continuas que el notebook interpola."""
+    return [
+        c for c in df_clean.columns
+        if c in df_raw.columns and pd.api.types.is_float_dtype(df_clean[c])
+    ]
+
+
+def reinterpolar_ventana(ventana: pd.DataFrame, columnas: List[str]) -> pd.DataFrame:
+    """Mismo tratamiento que el Notebook 01: interpolación temporal + bfill/ffill."""
+    ventana[columnas] = imputar(ventana, columnas).valores
+    return ventana
+
+
+def _offset_desde(path: Path, marca: pd.Timestamp) -> int:
+    """
+    Offset en bytes de la primera fila con DateTime >= marca. Lee desde el
+    final en bloques crecientes, así que el costo es proporcional a la cola.
+    """
+    marca = marca.strftime('%Y-%m-%d %H:%M:%S').encode()
+    with open(path, 'rb') as f:
+        fin = f.seek(0, os.SEEK_END)
+        tam = _BLOQUE
+        while True:
+            inicio = max(0, fin - tam)
+            f.seek(inicio)
+            datos = f.read(fin - inicio)
+            desde = 0 if inicio == 0 else datos.find(b'\n') + 1
+            corte = None
+            if desde > 0 or inicio == 0:
+                while desde < len(datos):
+                    nl = datos.find(b'\n', desde)
+                    fin_linea = len(datos) if nl == -1 else nl + 1
+                    linea = datos[desde:fin_linea]
+                    # La cabecera se conserva siempre
+                    if linea.strip() and (linea.startswith(b'DateTime') or linea[:len(marca)] < marca):
+                        corte = inicio + fin_linea
+                    desde = fin_linea
+            if corte is not None or inicio == 0:
+                return corte or 0
+            tam *= 2
+
+
+def _reescribir_cola(path: Path, df: pd.DataFrame, desde: pd.Timestamp) -> None:
+    """Trunca el CSV en la primera fila >= desde y escribe `df` a continuación."""
+    offset = _offset_desde(path, desde)
+    with open(path, 'r+b') as f:
+        f.truncate(offset)
+        if offset > 0:
+            f.seek(offset - 1)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+    # En memoria no se guardan Date/Time; el CSV conserva su cabecera original
+    cabecera = pd.read_csv(path, index_col=0, nrows=0).columns
+    _completar_derivadas(df).reindex(columns=cabecera).to_csv(path, mode='a', header=False)
+
+
+def anexar_mediciones(nuevas: pd.DataFrame, path_limpio: Optional[Path] = None,
+                      path_raw: Optional[Path] = None) -> ResultadoAnexo:
+    """
+    Incorpora un lote de mediciones horarias (índice DateTime, NaN o -200 como
+    faltante) al dataset raw y al limpio. Los timestamps ya presentes se ignoran.
+    """
+    path_limpio = Path(path_limpio) if path_limpio else CLEANED_DATA_PATH
+    path_raw = Path(path_raw) if path_raw else RAW_DATA_PATH
+    df_clean = cargar_datos_limpios(str(path_limpio))
+    df_raw = cargar_datos_raw(str(path_raw))
+    if df_clean is None or df_raw is None:
+        raise FileNotFoundError("Se requiere el dataset limpio y raw para anexar.")
+
+    nuevas = nuevas[~nuevas.index.duplicated(keep='last')].sort_index()
+    nuevas = nuevas[nuevas.index > df_raw.index.max()]
+    if nuevas.empty:
+        return ResultadoAnexo(0, 0, None)
+    nuevas = _completar_derivadas(nuevas.mask(nuevas == -200))
+
+    # Ventana afectada: desde el último valor válido más antiguo entre columnas.
+    # Antes de ese punto, ningún valor interpolado depende de los datos nuevos.
+    columnas = columnas_interpolables(df_clean, df_raw)
+    ultimos = [df_raw[c].last_valid_index() for c in columnas]
+    inicio = min((u for u in ultimos if u is not None), default=df_raw.index.min())
+
+    raw_nuevas = nuevas.reindex(columns=df_raw.columns).astype(df_raw.dtypes.to_dict())
+    ventana = pd.concat([
+        df_raw.loc[inicio:].reindex(columns=df_clean.columns),
+        raw_nuevas.reindex(columns=df_clean.columns),
+    ])
+    # La primera fila se ancla con los valores limpios: están sobre la misma
+    # recta de interpolación, así que el resultado coincide con reprocesar todo
+    ventana.loc[inicio, columnas] = df_clean.loc[inicio, columnas]
+    ventana = reinterpolar_ventana(ventana, columnas).astype(df_clean.dtypes.to_dict())
+
+    huella_raw, huella_limpio = huella_archivo(path_raw), huella_archivo(path_limpio)
+    _reescribir_cola(path_raw, raw_nuevas, raw_nuevas.index[0])
+    _reescribir_cola(path_limpio, ventana, inicio)
+
+    # La caché se actualiza con un segmento delta en lugar de invalidarse
+    anexar_cache(path_raw, raw_nuevas, raw_nuevas.index[0], huella_raw, CACHE_DIR)
+    anexar_cache(path_limpio, ventana, inicio, huella_limpio, CACHE_DIR)
+
+    return ResultadoAnexo(len(nuevas), len(ventana) - len(nuevas), inicio)
@@ -0,0 +1,172 @@
+"""
+Ingesta en streaming del formato crudo UCI (`;` como separador, `,` decimal,
+`-200` como centinela de faltante y dos columnas vacías al final).
+El archivo se procesa como una cadena de generadores por chunks
+(parseo → centinela a NaN → DateTime desde Date+Time → poda), de modo que la
+memoria queda acotada por `chunksize` y no por el tamaño del archivo.
+"""
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .loader import RAW_UCI_PATH
+
+VALOR_CENTINELA = -200
+FORMATO_FECHA_UCI = '%d/%m/%Y %H.%M.%S'
+COLUMNAS_TEXTO = ('Date', 'Time')
+
+
+@dataclass
+class ContadoresIngesta:
+    """Contadores de throughput acumulados durante la ingesta."""
+    filas: int = 0
+    bytes: int = 0
+    chunks: int = 0
+    segundos: float = 0.0
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.filas / self.segundos if self.segundos else 0.0
+
+    @property
+    def bytes_por_segundo(self) -> float:
+        return self.bytes / self.segundos if self.segundos else 0.0
+
+    def resumen(self) -> dict:
+        return {
+            'filas': self.filas,
+            'bytes': self.bytes,
+            'chunks': self.chunks,
+            'segundos': round(self.segundos, 4),
+            'filas_por_segundo': round(self.filas_por_segundo, 1),
+            'bytes_por_segundo': round(self.bytes_por_segundo, 1),
+        }
+
+
+class _LectorContado:
+    """Envuelve un archivo binario y cuenta los bytes consumidos por el parser."""
+
+    def __init__(self, archivo, contadores: ContadoresIngesta):
+        self._archivo = archivo
+        self._contadores = contadores
+
+    def read(self, size: int = -1) -> bytes:
+        datos = self._archivo.read(size)
+        self._contadores.bytes += len(datos)
+        return datos
+
+    def readline(self, size: int = -1) -> bytes:
+        datos = self._archivo.readline(size)
+        self._contadores.bytes += len(datos)
+        return datos
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+
+def columnas_validas_raw(path: Path) -> List[str]:
+    """Lee solo la cabecera y descarta las columnas sin nombre (`;;` finales)."""
+    cabecera = pd.read_csv(path, sep=';', nrows=0).columns
+    return [c for c in cabecera if not c.startswith('Unnamed') and c.strip() != '']
+
+
+def _parsear(archivo, columnas: List[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Etapa 1: parseo por chunks, solo de las columnas solicitadas."""
+    dtype = {c: str for c in COLUMNAS_TEXTO if c in columnas}
+    yield from pd.read_csv(
+        archivo, sep=';', decimal=',', usecols=columnas,
+        dtype=dtype, chunksize=chunksize
+    )
+
+
+def _centinela_a_nan(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Etapa 2: convierte el centinela -200 en NaN y fija float64 en sensores."""
+    for chunk in chunks:
+        numericas = [c for c in chunk.columns if c not in COLUMNAS_TEXTO]
+        valores = chunk[numericas].to_numpy(dtype=np.float64)
+        valores[valores == VALOR_CENTINELA] = np.nan
+        chunk[numericas] = valores
+        yield chunk
+
+
+def _ensamblar_datetime(chunks: Iterable[pd.DataFrame],
+                        derivadas: bool = True) -> Iterator[pd.DataFrame]:
+    """Etapa 3: construye el índice DateTime desde Date + Time."""
+    for chunk in chunks:
+        # Las filas vacías finales del archivo UCI no tienen fecha
+        chunk = chunk[chunk['Date'].notna()]
+        fechas = pd.to_datetime(chunk['Date'] + ' ' + chunk['Time'], format=FORMATO_FECHA_UCI)
+        chunk = chunk.assign(Time=chunk['Time'].str.replace('.', ':', regex=False))
+        if derivadas:
+            chunk = chunk.assign(
+                dia=fechas.dt.day_name(),
+                hora=fechas.dt.hour,
+                mes=fechas.dt.month,
+                fin_de_semana=fechas.dt.dayofweek >= 5,
+            )
+        chunk.index = pd.DatetimeIndex(fechas, name='DateTime')
+        yield chunk
+
+
+def _podar(chunks: Iterable[pd.DataFrame],
+           columnas: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Etapa 4: elimina filas sin mediciones y proyecta las columnas pedidas."""
+    for chunk in chunks:
+        sensores = [c for c in chunk.columns if c not in COLUMNAS_TEXTO]
+        chunk = chunk.dropna(axis=0, how='all', subset=sensores)
+        if columnas is not None:
+            chunk = chunk[[c for c in columnas if c in chunk.columns]]
+        if not chunk.empty:
+            yield chunk
+
+
+def iterar_raw_uci(path: Optional[Path] = None, chunksize: int = 50_000,
+                   columnas: Optional[List[str]] = None, derivadas: bool = True,
+                   contadores: Optional[ContadoresIngesta] = None) -> Iterator[pd.DataFrame]:
+    """
+    Genera chunks limpios del archivo crudo UCI con memoria acotada.
+    `columnas` proyecta la salida (Date y Time se leen siempre para el índice).
+    `contadores` se actualiza en cada chunk con filas, bytes y tiempo.
+    """
+    path = Path(path) if path else RAW_UCI_PATH
+    contadores = contadores if contadores is not None else ContadoresIngesta()
+
+    lectura = columnas_validas_raw(path)
+    if columnas is not None:
+        lectura = [c for c in lectura if c in columnas or c in COLUMNAS_TEXTO]
+
+    with open(path, 'rb') as archivo:
+        lector = _LectorContado(archivo, contadores)
+        etapas = _parsear(lector, lectura, chunksize)
+        etapas = _centinela_a_nan(etapas)
+        etapas = _ensamblar_datetime(etapas, derivadas=derivadas)
+        etapas = _podar(etapas, columnas)
+
+        inicio = time.perf_counter()
+        for chunk in etapas:
+            contadores.filas += len(chunk)
+            contadores.chunks += 1
+            contadores.segundos = time.perf_counter() - inicio
+            yield chunk
+            # El tiempo del consumidor no cuenta como tiempo de ingesta
+            inicio = time.perf_counter() - contadores.segundos
+
+
+def ingerir_raw_uci(path: Optional[Path] = None, destino: Optional[Path] = None,
+                    chunksize: int = 50_000, columnas: Optional[List[str]] = None
+                    ) -> ContadoresIngesta:
+    """
+    Procesa el archivo crudo completo. Si se indica `destino`, cada chunk se
+    anexa a un CSV con el mismo formato que consume `cargar_datos_raw`.
+    """
+    contadores = ContadoresIngesta()
+    primero = True
+    for chunk in iterar_raw_uci(path, chunksize, columnas, contadores=contadores):
+        if destino is not None:
+            chunk.to_csv(destino, mode='w' if primero else 'a', header=primero)
+        primero = False
+    return contadores
@@ -1,7 +1,19 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
 from functools import lru_cache
+from .cache import cargar_con_cache, huella_archivo, leer_rango_cache, limpiar_cache, primer_indice
+from .imputation import MascaraCompacta, imputar
+from .rollups import RollupStore
+from .correlation import MotorCorrelacion
+from .calibration import calibrar_pares
+from .config import DatasetConfig, EjecucionConfig
+from .dataset import DatasetCompartido, FuenteDatos, recortar
+from .estaciones import CatalogoEstaciones
+from .ejecutor import ejecutor_de
+from .registry import ModeloCalibracion, RegistroModelos, parametros_de
+from .trazas import tramo, trazado
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = ROOT_DIR / 'Data' / 'processed'
@@ -9,70 +21,368 @@ DATA_DIR_RAW = ROOT_DIR / 'Data' / 'raw'
 CLEANED_DATA_PATH = DATA_DIR / 'air_quality_UCI_cleaned.csv'
 MISSING_REPORT_PATH = DATA_DIR / 'missing_values_summary.csv'
 RAW_DATA_PATH = DATA_DIR_RAW / 'AirQualityUCI_cleaned_columns_and_rows_any.csv'
+RAW_UCI_PATH = DATA_DIR_RAW / 'AirQualityUCI.csv'
+CACHE_DIR = ROOT_DIR / 'Data' / 'cache'
+MODELOS_DIR = CACHE_DIR / 'modelos'
+ESTACIONES_DIR = ROOT_DIR / 'Data' / 'estaciones'
+COLUMNA_INDICE = 'DateTime'
+PREFIJO_ESTACION = 'estacion:'
+
+# Modelos de calibración ajustados, persistidos entre sesiones y reinicios
+REGISTRO_MODELOS = RegistroModelos(MODELOS_DIR)
+# Estaciones en almacenamiento particionado (estación/año/mes) con catálogo
+CATALOGO_ESTACIONES = CatalogoEstaciones(ESTACIONES_DIR)
+# Reparto del trabajo por columna/par (rollups, lotes de modelos). Serial hasta
+# medir bench_ejecutor en varios núcleos (en uno, hilos y procesos no aceleran)
+EJECUCION = EjecucionConfig()
 
 # Función auxiliar para limpiar caché si es necesario
 def clear_cache():
     """Limpia el caché de todas las funciones de carga."""
-    cargar_datos_limpios.cache_clear()
-    cargar_datos_raw.cache_clear()
+    _cargar_versionado.cache_clear()
+    _rango_versionado.cache_clear()
+    _estacion_versionada.cache_clear()
+    _mascara_versionada.cache_clear()
+    _rollups_versionados.cache_clear()
+    _correlacion_versionada.cache_clear()
+    _calibracion_versionada.cache_clear()
     cargar_reporte_missings.cache_clear()
 
-@lru_cache(maxsize=1)
-def cargar_datos_limpios(filepath: Optional[str] = None) -> Optional[pd.DataFrame]:
+def clear_disk_cache():
+    """Elimina la caché columnar en disco (se regenera en la próxima carga)."""
+    clear_cache()
+    limpiar_cache(CACHE_DIR)
+    REGISTRO_MODELOS.limpiar()
+
+def columnas_a_leer(path: Path, columnas: Optional[Sequence[str]] = None,
+                    config: Optional[DatasetConfig] = None) -> List[str]:
+    """
+    Decide desde la cabecera qué columnas se parsean: descarta las sin nombre
+    (`Unnamed`, solo espacios), las derivables del índice (Date/Time) y, si se
+    indica, las que no están en la proyección `columnas`.
+    """
+    config = config or DatasetConfig()
+    cabecera = pd.read_csv(path, nrows=0).columns
+    leer = [
+        c for c in cabecera
+        if c != COLUMNA_INDICE and not c.startswith('Unnamed') and c.strip() != ''
+        and c not in config.columnas_derivadas
+    ]
+    if columnas is not None:
+        leer = [c for c in leer if c in columnas]
+    return leer
+
+def _podar_vacias(df: pd.DataFrame, podar_filas: bool = True) -> pd.DataFrame:
+    """Quita columnas (y filas) sin ningún dato a partir de una sola máscara de nulos."""
+    presentes = df.notna().to_numpy()
+    columnas = presentes.any(axis=0)
+    filas = presentes.any(axis=1) if podar_filas else np.ones(len(df), dtype=bool)
+    if columnas.all() and filas.all():
+        return df
+    return df.iloc[filas, columnas]
+
+def _leer_csv_datos(path: Path) -> pd.DataFrame:
+    """
+    Pipeline de lectura en una pasada: columnas decididas desde la cabecera
+    (`usecols`), esquema compacto aplicado por el parser y poda de filas y
+    columnas vacías con una única máscara de nulos.
+    """
+    config = DatasetConfig()
+    leer = columnas_a_leer(path, config=config)
+    with tramo('csv.parse', 'loader', archivo=path.name, columnas=len(leer)) as t:
+        df = pd.read_csv(path, index_col=COLUMNA_INDICE, parse_dates=[COLUMNA_INDICE],
+                         usecols=[COLUMNA_INDICE] + leer, dtype=config.dtypes_lectura(leer))
+        t.anotar(filas=len(df))
+    with tramo('limpieza.podar_vacias', 'loader'):
+        df = _podar_vacias(df)
+    # Los dtypes ya vienen del parser: aquí solo se valida (astype sin cambios no copia)
+    with tramo('limpieza.esquema', 'loader'):
+        return config.aplicar_esquema(df)
+
+def _proyeccion(columnas: Optional[Sequence[str]]) -> Optional[tuple]:
+    """Proyección normalizada (hashable y estable) para la clave de caché."""
+    return tuple(sorted(set(columnas))) if columnas else None
+
+def _timestamp(valor) -> Optional[pd.Timestamp]:
+    return None if valor is None else pd.Timestamp(valor)
+
+def _fuente(filepath: Optional[str] = None, estacion: Optional[str] = None) -> Tuple[str, str]:
+    """
+    (fuente, versión) de un CSV o de una estación del catálogo. La fuente es
+    la ruta resuelta o `estacion:<id>`; FileNotFoundError si no existe.
+    """
+    if estacion is not None:
+        try:
+            return PREFIJO_ESTACION + estacion, CATALOGO_ESTACIONES.version(estacion)
+        except KeyError:
+            raise FileNotFoundError(estacion) from None
     path = Path(filepath) if filepath else CLEANED_DATA_PATH
+    return str(path.resolve()), huella_archivo(path)
+
+def version_datos(filepath: Optional[str] = None, estacion: Optional[str] = None) -> Optional[str]:
+    """Huella actual del dataset (None si no existe); cambia con cada append."""
     try:
-        df = pd.read_csv(path, index_col='DateTime', parse_dates=['DateTime'])
-        
-        # Limpieza profunda de datos
-        # 1. Eliminar columnas completamente nulas
-        df = df.dropna(axis=1, how='all')
-        
-        # 2. Eliminar filas completamente nulas
-        df = df.dropna(axis=0, how='all')
-        
-        # 3. Eliminar columnas Unnamed
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed', na=False)]
-        
-        # 4. Eliminar columnas vacías (solo espacios)
-        df = df.loc[:, df.columns.str.strip() != '']
-        
-        # 5. Eliminar columnas con 100% valores faltantes
-        missing_pct = df.isna().sum() / len(df) * 100
-        cols_to_keep = missing_pct[missing_pct < 100].index
-        df = df[cols_to_keep]
-        
-        return df
+        return _fuente(filepath, estacion)[1]
     except FileNotFoundError:
         return None
 
-@lru_cache(maxsize=1)
-def cargar_datos_raw(filepath: Optional[str] = None) -> Optional[pd.DataFrame]:
-    path = Path(filepath) if filepath else RAW_DATA_PATH
+@lru_cache(maxsize=6)
+def _cargar_versionado(path: str, huella: str) -> pd.DataFrame:
+    # La huella forma parte de la clave: un append invalida solo esta entrada
+    # y la recarga sale de la caché Arrow actualizada, no del CSV.
+    return cargar_con_cache(Path(path), _leer_csv_datos, CACHE_DIR)
+
+@lru_cache(maxsize=16)
+def _rango_versionado(path: str, huella: str, inicio: Optional[pd.Timestamp], fin: Optional[pd.Timestamp],
+                      columnas: Optional[tuple]) -> pd.DataFrame:
+    # Solo se mapean los bloques de la caché Arrow que cubren [inicio, fin) y
+    # las columnas proyectadas. Las proyecciones salen de la entrada principal,
+    # que recibe los deltas de cada append: nunca se re-parsea el CSV por ellas.
+    df = leer_rango_cache(Path(path), CACHE_DIR, inicio, fin, columnas)
+    if df is None:
+        # Sin entrada en disco: se construye una vez (la próxima lectura ya usa bloques)
+        completo = _cargar_versionado(path, huella)
+        df = recortar(completo if columnas is None else completo[[c for c in completo.columns if c in columnas]],
+                      inicio, fin)
+    return df
+
+def _cargar(path: Path, columnas: Optional[Sequence[str]] = None,
+            inicio=None, fin=None) -> Optional[pd.DataFrame]:
     try:
-        df = pd.read_csv(path, index_col='DateTime', parse_dates=['DateTime'])
-        
-        # Limpieza profunda de datos
-        # 1. Eliminar columnas completamente nulas
-        df = df.dropna(axis=1, how='all')
-        
-        # 2. Eliminar filas completamente nulas
-        df = df.dropna(axis=0, how='all')
-        
-        # 3. Eliminar columnas Unnamed
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed', na=False)]
-        
-        # 4. Eliminar columnas vacías (solo espacios)
-        df = df.loc[:, df.columns.str.strip() != '']
-        
-        # 5. Eliminar columnas con 100% valores faltantes
-        missing_pct = df.isna().sum() / len(df) * 100
-        cols_to_keep = missing_pct[missing_pct < 100].index
-        df = df[cols_to_keep]
-        
-        return df
+        # Caché Arrow mapeada en memoria; solo se parsea el CSV si cambió
+        proyeccion = _proyeccion(columnas)
+        clave = (str(path.resolve()), huella_archivo(path))
+        if inicio is not None or fin is not None or proyeccion:
+            return _rango_versionado(*clave, _timestamp(inicio), _timestamp(fin), proyeccion)
+        # Misma firma que los demás loaders: comparten la entrada lru
+        return _cargar_versionado(*clave)
+    except FileNotFoundError:
+        return None
+
+@trazado(categoria='loader')
+def cargar_datos_limpios(filepath: Optional[str] = None, columnas: Optional[Sequence[str]] = None,
+                         inicio=None, fin=None) -> Optional[pd.DataFrame]:
+    """
+    Dataset limpio; `columnas` proyecta la caché Arrow antes de convertir a
+    pandas e `inicio`/`fin` la restringen a [inicio, fin) leyendo solo esos bloques.
+    """
+    return _cargar(Path(filepath) if filepath else CLEANED_DATA_PATH, columnas, inicio, fin)
+
+@trazado(categoria='loader')
+def cargar_datos_raw(filepath: Optional[str] = None, columnas: Optional[Sequence[str]] = None,
+                     inicio=None, fin=None) -> Optional[pd.DataFrame]:
+    """Dataset raw (con NaN); `columnas` e `inicio`/`fin` como en `cargar_datos_limpios`."""
+    return _cargar(Path(filepath) if filepath else RAW_DATA_PATH, columnas, inicio, fin)
+
+@lru_cache(maxsize=8)
+def _estacion_versionada(estacion: str, version: str, inicio=None, fin=None,
+                         columnas: Optional[tuple] = None) -> pd.DataFrame:
+    df = CATALOGO_ESTACIONES.leer(estacion, inicio, fin, columnas)
+    df.attrs['version'] = version
+    return df
+
+@trazado(categoria='loader')
+def cargar_estacion(estacion: str, inicio=None, fin=None,
+                    columnas: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Filas de [inicio, fin) de una estación del catálogo particionado; solo se
+    leen las particiones que coinciden. None si la estación no existe.
+    """
+    try:
+        version = CATALOGO_ESTACIONES.version(estacion, inicio, fin)
+    except KeyError:
+        return None
+    predicados = (_timestamp(inicio), _timestamp(fin), _proyeccion(columnas))
+    # Sin predicados, misma firma que `_frame`: comparten la entrada lru
+    if predicados == (None, None, None):
+        return _estacion_versionada(estacion, version)
+    return _estacion_versionada(estacion, version, *predicados)
+
+@trazado(categoria='loader')
+def cargar_estaciones(estaciones: Sequence[str], inicio=None, fin=None,
+                      columnas: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Varias estaciones en un frame con la columna categórica `estacion` (sin caché)."""
+    return CATALOGO_ESTACIONES.leer(list(estaciones), inicio, fin, columnas)
+
+def particionar_dataset(estacion: str, filepath: Optional[str] = None) -> int:
+    """Importa un CSV limpio al catálogo como `estacion`; retorna las particiones escritas."""
+    df = cargar_datos_limpios(filepath)
+    if df is None:
+        raise FileNotFoundError(filepath or CLEANED_DATA_PATH)
+    return len(CATALOGO_ESTACIONES.escribir(df, estacion))
+
+def fuente_datos(filepath: Optional[str] = None, estacion: Optional[str] = None) -> Optional[FuenteDatos]:
+    """
+    Fuente perezosa (CSV limpio o `estacion`) para los builders: cada ventana
+    temporal se lee del loader con el rango y las columnas empujados.
+    """
+    version = version_datos(filepath, estacion)
+    if version is None:
+        return None
+    if estacion is not None:
+        particiones = CATALOGO_ESTACIONES.particiones(estacion)
+        if not particiones:
+            return None
+        inicio = pd.Timestamp(particiones[0].inicio)
+        return FuenteDatos(lambda inicio, fin, columnas: cargar_estacion(estacion, inicio, fin, columnas),
+                           version, inicio)
+    path = Path(filepath) if filepath else CLEANED_DATA_PATH
+    inicio = primer_indice(path, CACHE_DIR)
+    if inicio is None:
+        # Sin entrada en disco: se construye una vez (también crea el índice disperso)
+        inicio = cargar_datos_limpios(filepath).index[0]
+    return FuenteDatos(lambda inicio, fin, columnas: cargar_datos_limpios(filepath, columnas, inicio, fin),
+                       version, inicio)
+
+def _frame(fuente: str, version: str) -> pd.DataFrame:
+    """Frame completo de una fuente resuelta por `_fuente`."""
+    if fuente.startswith(PREFIJO_ESTACION):
+        return _estacion_versionada(fuente[len(PREFIJO_ESTACION):], version)
+    return _cargar_versionado(fuente, version)
+
+@trazado(categoria='loader')
+def cargar_dataset(filepath: Optional[str] = None, columnas: Optional[Sequence[str]] = None,
+                   estacion: Optional[str] = None) -> Optional[DatasetCompartido]:
+    """
+    Handle inmutable del dataset para compartir entre sesiones: el CSV limpio
+    por defecto, o `estacion` desde el catálogo particionado.
+    """
+    if estacion is not None:
+        df = cargar_estacion(estacion, columnas=columnas)
+    else:
+        df = _cargar(Path(filepath) if filepath else CLEANED_DATA_PATH, columnas)
+    return DatasetCompartido(df) if df is not None else None
+
+def ruta_mascara(path_limpio: Path) -> Path:
+    """La máscara de imputación se guarda junto al CSV limpio."""
+    return path_limpio.with_name(f"{path_limpio.stem}_imputation_mask.npz")
+
+@lru_cache(maxsize=2)
+def _mascara_versionada(path_limpio: str, path_raw: str, version: str) -> MascaraCompacta:
+    destino = ruta_mascara(Path(path_limpio))
+    if destino.exists():
+        mascara = MascaraCompacta.cargar(destino)
+        if mascara.version == version:
+            return mascara
+
+    df_clean = cargar_datos_limpios(path_limpio)
+    df_raw = cargar_datos_raw(path_raw)
+    columnas = [c for c in df_clean.select_dtypes('float').columns if c in df_raw.columns]
+    mascara = imputar(df_raw, columnas).mascara.reindex(df_clean.index, fill_value=False)
+    compacta = MascaraCompacta.desde_mascara(mascara, version)
+    try:
+        compacta.guardar(destino)
+    except OSError:
+        pass
+    return compacta
+
+@trazado(categoria='loader')
+def cargar_mascara_imputacion(filepath: Optional[str] = None,
+                              raw_filepath: Optional[str] = None) -> Optional[MascaraCompacta]:
+    """
+    Máscara bit-empaquetada de valores imputados del dataset limpio. Se calcula
+    una vez por versión de los datos y se persiste junto al CSV limpio.
+    """
+    path_limpio = Path(filepath) if filepath else CLEANED_DATA_PATH
+    path_raw = Path(raw_filepath) if raw_filepath else RAW_DATA_PATH
+    try:
+        version = f"{huella_archivo(path_limpio)}-{huella_archivo(path_raw)}"
+    except FileNotFoundError:
+        return None
+    return _mascara_versionada(str(path_limpio.resolve()), str(path_raw.resolve()), version)
+
+@lru_cache(maxsize=4)
+def _rollups_versionados(fuente: str, version: str) -> RollupStore:
+    df = _frame(fuente, version)
+    config = DatasetConfig()
+    columnas = [c for c in config.columns_permitidas if c in df.columns]
+    return RollupStore(df, columnas, ejecutor=ejecutor_de(EJECUCION))
+
+@trazado(categoria='loader')
+def cargar_rollups(filepath: Optional[str] = None, estacion: Optional[str] = None) -> Optional[RollupStore]:
+    """
+    Agregados diarios/mensuales del dataset limpio (o de `estacion`),
+    materializados una vez por versión de los datos.
+    """
+    try:
+        return _rollups_versionados(*_fuente(filepath, estacion))
+    except FileNotFoundError:
+        return None
+
+@lru_cache(maxsize=4)
+def _correlacion_versionada(fuente: str, version: str) -> MotorCorrelacion:
+    df = _frame(fuente, version)
+    return MotorCorrelacion(df, df.select_dtypes('float').columns.tolist())
+
+@trazado(categoria='loader')
+def cargar_correlaciones(filepath: Optional[str] = None,
+                         estacion: Optional[str] = None) -> Optional[MotorCorrelacion]:
+    """
+    Acumuladores de co-momentos de todas las columnas numéricas continuas,
+    calculados una vez por versión de los datos (limpio por defecto; con NaN
+    en el raw se usan pares completos).
+    """
+    try:
+        return _correlacion_versionada(*_fuente(filepath, estacion))
+    except FileNotFoundError:
+        return None
+
+@lru_cache(maxsize=8)
+def _calibracion_versionada(fuente: str, version: str, pares: tuple) -> pd.DataFrame:
+    return calibrar_pares(_correlacion_versionada(fuente, version), pares)
+
+@trazado(categoria='loader')
+def cargar_calibracion(pares=None, filepath: Optional[str] = None,
+                       estacion: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Calibración lineal de los pares (sensor, referencia) indicados (por
+    defecto, `DatasetConfig.pares_calibracion`), cacheada por versión.
+    """
+    pares = tuple(tuple(p) for p in (pares or DatasetConfig().pares_calibracion))
+    try:
+        return _calibracion_versionada(*_fuente(filepath, estacion), pares)
+    except FileNotFoundError:
+        return None
+
+@trazado(categoria='loader')
+def cargar_modelo(objetivo: str, predictores, metodo: str = 'ols', config=None,
+                  filepath: Optional[str] = None,
+                  estacion: Optional[str] = None) -> Optional[ModeloCalibracion]:
+    """
+    Modelo de calibración registrado para la versión actual de los datos.
+    `config` (RLSConfig para 'rls', DriftConfig para 'deriva') forma parte de
+    la clave; solo se re-ajusta si cambian los datos o la especificación.
+    """
+    try:
+        fuente, version = _fuente(filepath, estacion)
+    except FileNotFoundError:
+        return None
+    REGISTRO_MODELOS.podar(fuente, version)
+    return REGISTRO_MODELOS.obtener_o_ajustar(_frame(fuente, version), version, objetivo, predictores,
+                                              metodo, parametros_de(config))
+
+@trazado(categoria='loader')
+def cargar_modelos(especificaciones, filepath: Optional[str] = None,
+                   estacion: Optional[str] = None) -> Optional[List[ModeloCalibracion]]:
+    """
+    Varios modelos de una vez: `especificaciones` son tuplas (objetivo,
+    predictores[, método[, config]]). Los que no están registrados se ajustan
+    repartidos según `EJECUCION` (p. ej. calibrar cientos de sensores).
+    """
+    try:
+        fuente, version = _fuente(filepath, estacion)
     except FileNotFoundError:
         return None
+    specs = []
+    for objetivo, predictores, *resto in especificaciones:
+        metodo = resto[0] if resto else 'ols'
+        config = resto[1] if len(resto) > 1 else None
+        specs.append((objetivo, predictores, metodo, parametros_de(config)))
+    REGISTRO_MODELOS.podar(fuente, version)
+    return REGISTRO_MODELOS.obtener_o_ajustar_varios(_frame(fuente, version), version, specs,
+                                                     ejecutor_de(EJECUCION))
 
+@trazado(categoria='loader')
 @lru_cache(maxsize=1)
 def cargar_reporte_missings(filepath: Optional[str] = None) -> Optional[pd.DataFrame]:
     path = Path(filepath) if filepath else MISSING_REPORT_PATH
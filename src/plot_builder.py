@@ -3,10 +3,16 @@ Abstracción de visualizaciones desacoplada.
 Sigue los principios SOLID: cada tipo de visualización es independiente y modificable.
 """
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+import functools
+import hashlib
+import json
+import threading
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Callable, Tuple
 from matplotlib.figure import Figure as MatplotlibFigure
 from .plots import (
     plot_custom_histogram,
@@ -14,58 +20,299 @@ from .plots import (
     plot_interactive_scatter,
     plot_heatmap,
     plot_missing_bars,
-    plot_comparacion_imputacion
+    plot_comparacion_imputacion,
+    plot_calidad_aire,
+    trazo_densidad
 )
+from .imputation import MascaraCompacta
+from .densidad import HistogramaBase
+from .ejecutor import Ejecutor, ejecutor_de
+from .dataset import FuenteDatos, recortar
+from .rollups import RollupStore
+from .correlation import MotorCorrelacion
+from .drift import deriva_ventanas
+from .rls import CalibradorRLS
+from .registry import ModeloCalibracion
+from .trazas import tramo
 from .config import (
     HistogramConfig,
     BoxplotConfig,
     ScatterConfig,
     HeatmapConfig,
-    ImputationComparisonConfig
+    ImputationComparisonConfig,
+    DriftConfig,
+    RLSConfig
 )
 
 
+def _tamano(valor: Any) -> int:
+    """Bytes aproximados en memoria de una figura (los arrays dominan)."""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sum(_tamano(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(_tamano(v) for v in valor) + 8 * len(valor)
+    if isinstance(valor, str):
+        return len(valor)
+    return 8
+
+
+class FigureCache:
+    """
+    Caché LRU de figuras Plotly compartida por el proceso (todas las sesiones),
+    acotada por número de entradas y por bytes de los datos de cada figura.
+    Las figuras cacheadas son de solo lectura.
+    """
+    
+    def __init__(self, max_bytes: int = 64 * 1024 ** 2, max_entradas: int = 256):
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, Tuple[go.Figure, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.desalojos = 0
+    
+    @staticmethod
+    def clave(tipo: str, config: Any, args: tuple, version: str) -> str:
+        """Hash de (tipo de builder, config congelada, selección, versión de datos)."""
+        config = asdict(config) if is_dataclass(config) else config
+        spec = json.dumps([tipo, config, args, version], sort_keys=True, default=str)
+        return hashlib.sha1(spec.encode()).hexdigest()
+    
+    def obtener_o_construir(self, clave: str, construir: Callable[[], go.Figure]) -> go.Figure:
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.hits += 1
+                return self._entradas[clave][0]
+            self.misses += 1
+        # Se construye fuera del lock: otras sesiones no esperan este render
+        with tramo('figura.construir', 'plot'):
+            fig = construir()
+        self._guardar(clave, fig, _tamano(fig.to_plotly_json()))
+        return fig
+    
+    def _guardar(self, clave: str, fig: go.Figure, tamano: int) -> None:
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                return
+            self._entradas[clave] = (fig, tamano)
+            self.bytes += tamano
+            while self.bytes > self.max_bytes or len(self._entradas) > self.max_entradas:
+                _, (_, viejo) = self._entradas.popitem(last=False)
+                self.bytes -= viejo
+                self.desalojos += 1
+    
+    def metricas(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self._entradas), 'bytes': self.bytes,
+                'hits': self.hits, 'misses': self.misses, 'desalojos': self.desalojos,
+                'tasa_hits': self.hits / total if total else 0.0,
+            }
+    
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self.bytes = 0
+            self.hits = self.misses = self.desalojos = 0
+
+
+FIGURE_CACHE = FigureCache()
+
+
+class HistogramCache:
+    """
+    Histogramas base (`HistogramaBase`, ~400 KB cada uno) por versión de datos,
+    columna y ventana, compartidos por el proceso. Cambiar la cantidad de bins
+    re-agrega la grilla fina en vez de volver a recorrer la columna.
+    """
+    
+    def __init__(self, max_entradas: int = 256):
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[tuple, HistogramaBase]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def obtener_o_calcular(self, clave: tuple, calcular: Callable[[], HistogramaBase]) -> HistogramaBase:
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.hits += 1
+                return self._entradas[clave]
+            self.misses += 1
+        with tramo('histograma.base', 'plot'):
+            base = calcular()
+        self.guardar(clave, base)
+        return base
+    
+    def guardar(self, clave: tuple, base: HistogramaBase) -> None:
+        with self._lock:
+            self._entradas[clave] = base
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+    
+    def contiene(self, clave: tuple) -> bool:
+        with self._lock:
+            return clave in self._entradas
+    
+    def metricas(self) -> Dict[str, float]:
+        with self._lock:
+            return {'entradas': len(self._entradas), 'hits': self.hits, 'misses': self.misses,
+                    'bytes': sum(b.nbytes for b in self._entradas.values())}
+    
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self.hits = self.misses = 0
+
+
+HISTOGRAM_CACHE = HistogramCache()
+
+
+# (inicio, fin) de una ventana temporal semiabierta; None en un extremo = sin límite
+Ventana = Tuple[Any, Any]
+
+
+def _build_trazado(build: Callable, nombre: str) -> Callable:
+    @functools.wraps(build)
+    def envoltura(self, *args, **kwargs):
+        with tramo(nombre, 'builder'):
+            return build(self, *args, **kwargs)
+    return envoltura
+
+
 class PlotBuilder(ABC):
     """Interfaz base para constructores de plots (Open/Closed Principle)."""
     
+    df: Optional[pd.DataFrame] = None
+    # Lectura por rango (FuenteDatos o DatasetCompartido); con ella las
+    # ventanas temporales se empujan al loader en vez de recortar en memoria
+    fuente: Optional[FuenteDatos] = None
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Cada `build` concreto queda medido como un tramo `<Builder>.build`
+        if 'build' in cls.__dict__:
+            cls.build = _build_trazado(cls.build, f'{cls.__name__}.build')
+    
     @abstractmethod
     def build(self, *args, **kwargs) -> Union[go.Figure, MatplotlibFigure]:
         """Construye y retorna un gráfico Plotly o Matplotlib."""
         pass
+    
+    def _datos(self, columnas: Optional[List[str]] = None, ventana: Optional[Ventana] = None) -> pd.DataFrame:
+        """
+        Columnas pedidas del builder; con `ventana` solo las filas de
+        [inicio, fin), leídas de `self.fuente` si existe (solo esos bloques).
+        """
+        if columnas is not None:
+            columnas = [c for c in dict.fromkeys(columnas) if c]
+        if ventana is not None and self.fuente is not None:
+            return self.fuente.leer(*ventana, columnas)
+        datos = self.df if columnas is None else self.df[columnas]
+        return datos if ventana is None else recortar(datos, *ventana)
+    
+    def _version(self) -> Optional[str]:
+        if self.df is not None:
+            return self.df.attrs.get('version')
+        return getattr(self.fuente, 'version', None)
+    
+    def _desde_cache(self, args: tuple, construir: Callable[[], go.Figure]) -> go.Figure:
+        """Sirve la figura desde FIGURE_CACHE si los datos tienen versión."""
+        version = self._version()
+        if version is None:
+            return construir()
+        clave = FigureCache.clave(type(self).__name__, getattr(self, 'config', None), args, version)
+        return FIGURE_CACHE.obtener_o_construir(clave, construir)
+
+
+def _base_columna(df: pd.DataFrame, columna: str) -> HistogramaBase:
+    return HistogramaBase.calcular(df[columna].dropna().to_numpy(dtype=np.float64))
 
 
 class HistogramBuilder(PlotBuilder):
     """Constructor para histogramas (Dependency Inversion)."""
     
-    def __init__(self, df: pd.DataFrame, config: HistogramConfig):
+    def __init__(self, df: Optional[pd.DataFrame], config: HistogramConfig,
+                 fuente: Optional[FuenteDatos] = None):
         self.df = df
         self.config = config
+        self.fuente = fuente
     
-    def build(self, column: str, **kwargs) -> go.Figure:
+    def build(self, column: str, ventana: Optional[Ventana] = None, **kwargs) -> go.Figure:
         """Construye histograma con configuración personalizable."""
         # Actualizar config si hay parámetros adicionales
         for key, value in kwargs.items():
             if hasattr(self.config, key):
                 setattr(self.config, key, value)
         
-        return plot_custom_histogram(
-            self.df,
-            column,
-            self.config.bins,
-            self.config.color,
-            self.config.log_scale,
-            height=self.config.height
-        )
+        def construir():
+            if self.config.exacto:
+                return plot_custom_histogram(
+                    self._datos([column], ventana),
+                    column,
+                    self.config.bins,
+                    self.config.color,
+                    self.config.log_scale,
+                    height=self.config.height
+                )
+            # Los bins se derivan del histograma base: el costo no depende de las filas
+            return plot_custom_histogram(
+                None,
+                column,
+                self.config.bins,
+                self.config.color,
+                self.config.log_scale,
+                height=self.config.height,
+                base=self.base(column, ventana)
+            )
+        
+        return self._desde_cache((column, ventana), construir)
+    
+    def base(self, column: str, ventana: Optional[Ventana] = None) -> HistogramaBase:
+        """Histograma fino de la columna: una pasada por versión de datos y ventana."""
+        def calcular():
+            return _base_columna(self._datos([column], ventana), column)
+        
+        version = self._version()
+        if version is None:
+            return calcular()
+        return HISTOGRAM_CACHE.obtener_o_calcular((version, column, ventana), calcular)
+    
+    def precalcular(self, columns: List[str], ventana: Optional[Ventana] = None,
+                    ejecutor: Optional[Ejecutor] = None) -> Dict[str, HistogramaBase]:
+        """Histogramas base de varias columnas repartidos en `ejecutor` (quedan en la caché)."""
+        version = self._version()
+        faltantes = [c for c in dict.fromkeys(columns)
+                     if version is None or not HISTOGRAM_CACHE.contiene((version, c, ventana))]
+        if faltantes:
+            bases = ejecutor_de(ejecutor).mapear(_base_columna, faltantes, self._datos(faltantes, ventana))
+            if version is None:
+                return dict(zip(faltantes, bases))
+            for columna, base in zip(faltantes, bases):
+                HISTOGRAM_CACHE.guardar((version, columna, ventana), base)
+        return {c: self.base(c, ventana) for c in columns}
 
 
 class BoxplotBuilder(PlotBuilder):
     """Constructor para boxplots."""
     
-    def __init__(self, df: pd.DataFrame, config: BoxplotConfig):
+    def __init__(self, df: Optional[pd.DataFrame], config: BoxplotConfig, rollups: Optional[RollupStore] = None,
+                 fuente: Optional[FuenteDatos] = None):
         self.df = df
         self.config = config
+        self.rollups = rollups
+        self.fuente = fuente
     
-    def build(self, columns: List[str], **kwargs) -> go.Figure:
+    def build(self, columns: List[str], ventana: Optional[Ventana] = None, **kwargs) -> go.Figure:
         """Construye boxplots con configuración personalizable."""
         for key, value in kwargs.items():
             if hasattr(self.config, key):
@@ -74,21 +321,35 @@ class BoxplotBuilder(PlotBuilder):
         if not columns:
             return go.Figure()
         
-        return plot_multiple_boxplots(
-            self.df,
-            columns,
-            log_scale=self.config.log_scale
-        )
+        def construir():
+            # Con rollups, los estadísticos salen de los sketches pre-calculados
+            # (también para una ventana: meses/días completos + filas de los bordes)
+            resumenes = {}
+            if self.rollups is not None:
+                resumenes = {c: self.rollups.caja(c, *(ventana or (None, None)))
+                             for c in columns if c in self.rollups.columnas}
+            faltantes = [c for c in columns if c not in resumenes]
+            return plot_multiple_boxplots(
+                self._datos(faltantes, ventana) if faltantes else None,
+                columns,
+                log_scale=self.config.log_scale,
+                resumenes=resumenes
+            )
+        
+        return self._desde_cache((list(columns), ventana), construir)
 
 
 class ScatterBuilder(PlotBuilder):
     """Constructor para scatter plots."""
     
-    def __init__(self, df: pd.DataFrame, config: ScatterConfig):
+    def __init__(self, df: Optional[pd.DataFrame], config: ScatterConfig,
+                 fuente: Optional[FuenteDatos] = None):
         self.df = df
         self.config = config
+        self.fuente = fuente
     
-    def build(self, x_col: str, y_col: str, color_col: str = 'Ninguno', **kwargs) -> go.Figure:
+    def build(self, x_col: str, y_col: str, color_col: str = 'Ninguno',
+              ventana: Optional[Ventana] = None, **kwargs) -> go.Figure:
         """Construye scatter plot con configuración personalizable."""
         for key, value in kwargs.items():
             if hasattr(self.config, key):
@@ -97,25 +358,31 @@ class ScatterBuilder(PlotBuilder):
         if x_col == y_col:
             return go.Figure()
         
-        return plot_interactive_scatter(
-            self.df,
+        color = color_col if color_col != 'Ninguno' else None
+        return self._desde_cache((x_col, y_col, color_col, ventana), lambda: plot_interactive_scatter(
+            self._datos([x_col, y_col, color], ventana),
             x_col,
             y_col,
-            color_col if color_col != 'Ninguno' else None,
+            color,
             self.config.alpha,
             self.config.size,
-            height=self.config.height
-        )
+            height=self.config.height,
+            max_points=self.config.max_points,
+            density_bins=self.config.density_bins
+        ))
 
 
 class HeatmapBuilder(PlotBuilder):
     """Constructor para heatmaps."""
     
-    def __init__(self, df: pd.DataFrame, config: HeatmapConfig):
+    def __init__(self, df: Optional[pd.DataFrame], config: HeatmapConfig, motor: Optional[MotorCorrelacion] = None,
+                 fuente: Optional[FuenteDatos] = None):
         self.df = df
         self.config = config
+        self.motor = motor
+        self.fuente = fuente
     
-    def build(self, columns: List[str], **kwargs) -> go.Figure:
+    def build(self, columns: List[str], ventana: Optional[Ventana] = None, **kwargs) -> go.Figure:
         """Construye heatmap con configuración personalizable."""
         for key, value in kwargs.items():
             if hasattr(self.config, key):
@@ -124,7 +391,15 @@ class HeatmapBuilder(PlotBuilder):
         if len(columns) < 2:
             return go.Figure()
         
-        return plot_heatmap(self.df, columns)
+        def construir():
+            # Con el motor, la sub-matriz es un slice de los acumuladores; una
+            # ventana arma un motor solo con sus filas (una pasada)
+            motor = self.motor
+            if ventana is not None or motor is None or not all(c in motor.columnas for c in columns):
+                motor = MotorCorrelacion(self._datos(columns, ventana), list(columns))
+            return plot_heatmap(None, columns, motor.matriz(columns, self.config.metodo))
+        
+        return self._desde_cache((list(columns), ventana), construir)
 
 
 class MissingDataBuilder(PlotBuilder):
@@ -142,26 +417,40 @@ class MissingDataBuilder(PlotBuilder):
 
 
 class ImputationComparisonBuilder(PlotBuilder):
-    """Constructor para comparación de imputación."""
+    """
+    Constructor para comparación de imputación.
+    Con la máscara compacta no retiene el frame raw: renderiza desde los
+    valores limpios + bits de imputación.
+    """
     
-    def __init__(self, df_clean: pd.DataFrame, df_raw: pd.DataFrame, config: ImputationComparisonConfig):
-        self.df_clean = df_clean
-        self.df_raw = df_raw
+    def __init__(self, df_clean: Optional[pd.DataFrame], df_raw: Optional[pd.DataFrame],
+                 config: ImputationComparisonConfig, mascara: Optional[MascaraCompacta] = None,
+                 fuente: Optional[FuenteDatos] = None):
+        self.df = df_clean
+        self.df_raw = df_raw if mascara is None else None
         self.config = config
+        self.mascara = mascara
+        self.fuente = fuente
     
     def build(self, columna: str, fecha_inicio=None, fecha_fin=None, **kwargs):
-        """Construye gráfico de comparación de imputación."""
+        """
+        Construye gráfico de comparación de imputación. Sin fechas muestra los
+        primeros `config.sample_days` días; solo se lee esa ventana.
+        """
         # Actualizar config si hay parámetros adicionales
         for key, value in kwargs.items():
             if hasattr(self.config, key):
                 setattr(self.config, key, value)
         
+        if fecha_inicio is None and fecha_fin is None:
+            inicio = self.df.index[0] if self.df is not None else self.fuente.inicio
+            fecha_inicio, fecha_fin = inicio, inicio + pd.Timedelta(days=self.config.sample_days)
+        
         return plot_comparacion_imputacion(
-            self.df_clean,
+            self._datos([columna], (fecha_inicio, fecha_fin)),
             self.df_raw,
             columna,
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin
+            mascara=self.mascara
         )
 
 
@@ -169,75 +458,114 @@ class PlotFactory:
     """Factory que crea builders según el tipo (Factory Pattern)."""
     
     @staticmethod
-    def create_histogram_builder(df: pd.DataFrame, config: HistogramConfig) -> HistogramBuilder:
-        return HistogramBuilder(df, config)
+    def create_histogram_builder(df: Optional[pd.DataFrame], config: HistogramConfig,
+                                 fuente: Optional[FuenteDatos] = None) -> HistogramBuilder:
+        return HistogramBuilder(df, config, fuente)
     
     @staticmethod
-    def create_boxplot_builder(df: pd.DataFrame, config: BoxplotConfig) -> BoxplotBuilder:
-        return BoxplotBuilder(df, config)
+    def create_boxplot_builder(df: Optional[pd.DataFrame], config: BoxplotConfig,
+                               rollups: Optional[RollupStore] = None,
+                               fuente: Optional[FuenteDatos] = None) -> BoxplotBuilder:
+        return BoxplotBuilder(df, config, rollups, fuente)
     
     @staticmethod
-    def create_scatter_builder(df: pd.DataFrame, config: ScatterConfig) -> ScatterBuilder:
-        return ScatterBuilder(df, config)
+    def create_scatter_builder(df: Optional[pd.DataFrame], config: ScatterConfig,
+                               fuente: Optional[FuenteDatos] = None) -> ScatterBuilder:
+        return ScatterBuilder(df, config, fuente)
     
     @staticmethod
-    def create_heatmap_builder(df: pd.DataFrame, config: HeatmapConfig) -> HeatmapBuilder:
-        return HeatmapBuilder(df, config)
+    def create_heatmap_builder(df: Optional[pd.DataFrame], config: HeatmapConfig,
+                               motor: Optional[MotorCorrelacion] = None,
+                               fuente: Optional[FuenteDatos] = None) -> HeatmapBuilder:
+        return HeatmapBuilder(df, config, motor, fuente)
     
     @staticmethod
     def create_missing_data_builder(df_missings: pd.DataFrame) -> MissingDataBuilder:
         return MissingDataBuilder(df_missings)
     
     @staticmethod
-    def create_imputation_comparison_builder(df_clean: pd.DataFrame, df_raw: pd.DataFrame, 
-                                             config: ImputationComparisonConfig) -> ImputationComparisonBuilder:
-        return ImputationComparisonBuilder(df_clean, df_raw, config)
+    def create_imputation_comparison_builder(df_clean: Optional[pd.DataFrame], df_raw: Optional[pd.DataFrame],
+                                             config: ImputationComparisonConfig,
+                                             mascara: Optional[MascaraCompacta] = None,
+                                             fuente: Optional[FuenteDatos] = None) -> ImputationComparisonBuilder:
+        return ImputationComparisonBuilder(df_clean, df_raw, config, mascara, fuente)
+
+    @staticmethod
+    def create_regression_plot(df, sensor, gt, modelo: Optional[ModeloCalibracion] = None,
+                               fuente: Optional[FuenteDatos] = None, ventana: Optional[Ventana] = None,
+                               scatter: Optional[ScatterConfig] = None):
+        return RegressionBuilder(df, sensor, gt, modelo, fuente, scatter).build(ventana)
 
     @staticmethod
-    def create_regression_plot(df, sensor, gt):
-        return RegressionBuilder(df, sensor, gt).build()
+    def create_multivariable_regression_plot(df, target, predictors, modo: str = 'lote',
+                                             config: Optional[RLSConfig] = None,
+                                             modelo: Optional[ModeloCalibracion] = None,
+                                             fuente: Optional[FuenteDatos] = None,
+                                             ventana: Optional[Ventana] = None,
+                                             scatter: Optional[ScatterConfig] = None):
+        return MultivariableRegressionBuilder(df, target, predictors, modo, config, modelo, fuente,
+                                              scatter).build(ventana)
 
     @staticmethod
-    def create_multivariable_regression_plot(df, target, predictors):
-        return MultivariableRegressionBuilder(df, target, predictors).build()
+    def create_drift_plot(df, sensor, gt, config: Optional[DriftConfig] = None,
+                          modelo: Optional[ModeloCalibracion] = None,
+                          fuente: Optional[FuenteDatos] = None, ventana: Optional[Ventana] = None):
+        return DriftBuilder(df, sensor, gt, config, modelo, fuente).build(ventana)
 
     @staticmethod
-    def create_drift_plot(df, sensor, gt):
-        return DriftBuilder(df, sensor, gt).build()
+    def create_quality_report_plot(df, columna, categoria_col, labels, config: ScatterConfig):
+        return plot_calidad_aire(df, columna, categoria_col, labels, max_points=config.max_points,
+                                 metodo=config.series_downsampling)
+
+
+def _trazo_dispersion(x: np.ndarray, y: np.ndarray, x_col: str, y_col: str, nombre: str,
+                      config: ScatterConfig) -> go.Scatter:
+    """Puntos crudos hasta `config.max_points`; sobre el presupuesto, celdas de densidad."""
+    if len(x) > config.max_points:
+        return trazo_densidad(x, y, config.density_bins, x_col, y_col, alpha=0.6, size=config.size,
+                              nombre=f'{nombre} (densidad, {len(x):,} puntos)')
+    return go.Scatter(x=x, y=y, mode='markers', name=nombre, opacity=0.6)
 
 
 class RegressionBuilder(PlotBuilder):
     """Regresión univariable lineal para Modelamiento I."""
     
-    def __init__(self, df: pd.DataFrame, sensor: str, gt: str):
+    def __init__(self, df: Optional[pd.DataFrame], sensor: str, gt: str,
+                 modelo: Optional[ModeloCalibracion] = None, fuente: Optional[FuenteDatos] = None,
+                 scatter: Optional[ScatterConfig] = None):
         self.df = df
         self.sensor = sensor
         self.gt = gt
+        self.modelo = modelo
+        self.fuente = fuente
+        self.scatter = scatter or ScatterConfig()
     
-    def build(self) -> go.Figure:
-        import numpy as np
-        
-        data = self.df[[self.sensor, self.gt]].dropna()
-        x = data[self.sensor].to_numpy()
-        y = data[self.gt].to_numpy()
-
-        # Ajuste lineal
-        a, b = np.polyfit(x, y, 1)
-        y_pred = a * x + b
+    def build(self, ventana: Optional[Ventana] = None) -> go.Figure:
+        data = self._datos([self.sensor, self.gt], ventana).dropna()
+        x = data[self.sensor].to_numpy(dtype=np.float64)
+        y = data[self.gt].to_numpy(dtype=np.float64)
+
+        # Ajuste lineal (coeficientes del registro de modelos si se entrega)
+        if self.modelo is not None:
+            a, b = self.modelo.coeficientes[0], self.modelo.intercepto
+            nombre_ajuste = f"Ajuste lineal (R²={self.modelo.metricas['r2']:.3f})"
+        else:
+            a, b = np.polyfit(x, y, 1)
+            nombre_ajuste = 'Ajuste lineal'
         
         fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=x, y=y, mode='markers', name='Datos', opacity=0.6
-        ))
+        fig.add_trace(_trazo_dispersion(x, y, self.sensor, self.gt, 'Datos', self.scatter))
         xx = np.linspace(x.min(), x.max(), 200)
         fig.add_trace(go.Scatter(
-            x=xx, y=a*xx + b, mode='lines', name='Ajuste lineal', line=dict(color='red')
+            x=xx, y=a*xx + b, mode='lines', name=nombre_ajuste, line=dict(color='red')
         ))
 
         fig.update_layout(
             title=f"{self.sensor} → {self.gt} (Modelo lineal)",
             xaxis_title=self.sensor,
-            yaxis_title=self.gt
+            yaxis_title=self.gt,
+            # Leyenda bajo el gráfico: a la derecha queda la barra de la densidad
+            legend=dict(orientation='h', yanchor='top', y=-0.15)
         )
         return fig
 
@@ -245,27 +573,47 @@ class RegressionBuilder(PlotBuilder):
 class MultivariableRegressionBuilder(PlotBuilder):
     """Regresión multivariable lineal para CO(GT)."""
     
-    def __init__(self, df: pd.DataFrame, target: str, predictors: list):
+    def __init__(self, df: Optional[pd.DataFrame], target: str, predictors: list,
+                 modo: str = 'lote', config: Optional[RLSConfig] = None,
+                 modelo: Optional[ModeloCalibracion] = None, fuente: Optional[FuenteDatos] = None,
+                 scatter: Optional[ScatterConfig] = None):
         self.df = df
         self.target = target
         self.predictors = predictors
+        self.modo = modo
+        self.config = config or RLSConfig()
+        self.modelo = modelo
+        self.fuente = fuente
+        self.scatter = scatter or ScatterConfig()
     
-    def build(self):
-        import numpy as np
-        
-        df_mv = self.df[self.predictors + [self.target]].dropna()
-        X = df_mv[self.predictors].to_numpy()
-        X_design = np.hstack([X, np.ones((X.shape[0], 1))])
-        y = df_mv[self.target].to_numpy()
-
-        coeffs, *_ = np.linalg.lstsq(X_design, y, rcond=None)
-        y_pred = X_design @ coeffs
+    def build(self, ventana: Optional[Ventana] = None):
+        df_mv = self._datos(self.predictors + [self.target], ventana).dropna()
+        X = df_mv[self.predictors].to_numpy(dtype=np.float64)
+        y = df_mv[self.target].to_numpy(dtype=np.float64)
+
+        if self.modelo is not None and self.modelo.metodo == 'rls':
+            # Predicción a un paso guardada; se alinea a las filas de la ventana
+            series = self.modelo.series
+            indice = pd.DatetimeIndex(series['indice'].astype('datetime64[ns]'))
+            y_pred = pd.Series(series['prediccion'], index=indice).reindex(df_mv.index).to_numpy()
+            titulo = f"Modelo Multivariable (RLS, λ={self.modelo.parametros['olvido']}): {self.target}"
+        elif self.modelo is not None:
+            y_pred = self.modelo.predecir(df_mv)
+            titulo = f"Modelo Multivariable: {self.target}"
+        elif self.modo == 'rls':
+            # En línea: cada predicción usa solo las filas anteriores
+            calibrador = CalibradorRLS(len(self.predictors), self.config)
+            y_pred = calibrador.ajustar(X, y)
+            titulo = f"Modelo Multivariable (RLS, λ={self.config.olvido}): {self.target}"
+        else:
+            X_design = np.hstack([X, np.ones((X.shape[0], 1))])
+            coeffs, *_ = np.linalg.lstsq(X_design, y, rcond=None)
+            y_pred = X_design @ coeffs
+            titulo = f"Modelo Multivariable: {self.target}"
 
         fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=y, y=y_pred, mode="markers", opacity=0.6,
-            name="Observado vs Predicho"
-        ))
+        fig.add_trace(_trazo_dispersion(y, y_pred, "Observado", "Predicho", "Observado vs Predicho",
+                                        self.scatter))
 
         minv, maxv = min(y.min(), y_pred.min()), max(y.max(), y_pred.max())
         fig.add_trace(go.Scatter(
@@ -274,41 +622,54 @@ class MultivariableRegressionBuilder(PlotBuilder):
         ))
 
         fig.update_layout(
-            title=f"Modelo Multivariable: {self.target}",
+            title=titulo,
             xaxis_title="Observado",
-            yaxis_title="Predicho"
+            yaxis_title="Predicho",
+            legend=dict(orientation='h', yanchor='top', y=-0.15)
         )
         return fig
 
 class DriftBuilder(PlotBuilder):
-    """Análisis del cambio de pendiente en el tiempo."""
+    """Análisis del cambio de pendiente en el tiempo (ventanas móviles)."""
     
-    def __init__(self, df: pd.DataFrame, sensor: str, gt: str):
+    def __init__(self, df: Optional[pd.DataFrame], sensor: str, gt: str, config: Optional[DriftConfig] = None,
+                 modelo: Optional[ModeloCalibracion] = None, fuente: Optional[FuenteDatos] = None):
         self.df = df
+        self.fuente = fuente
         self.sensor = sensor
         self.gt = gt
+        if config is None:
+            config = DriftConfig(**modelo.parametros) if modelo is not None else DriftConfig()
+        self.config = config
+        self.modelo = modelo
     
-    def build(self):
-        import numpy as np
-        
-        df_temp = self.df[[self.sensor, self.gt]].dropna().resample("ME")
-        slopes, dates = [], []
-
-        for period, grp in df_temp:
-            if len(grp) < 20:
-                continue
-
-            x = grp[self.sensor].to_numpy()
-            y = grp[self.gt].to_numpy()
-            
-            a, b = np.polyfit(x, y, 1)
-            slopes.append(a)
-            dates.append(period)
+    def build(self, ventana: Optional[Ventana] = None):
+        if self.modelo is not None:
+            deriva = self.modelo.tabla()
+            if ventana is not None:
+                deriva = recortar(deriva, *ventana)
+        else:
+            deriva = deriva_ventanas(self._datos([self.sensor, self.gt], ventana), self.sensor, self.gt, self.config)
+        nivel = int(self.config.nivel_confianza * 100)
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=dates, y=slopes, mode="lines+markers",
-            name="Pendiente mensual"
+            x=deriva.index, y=deriva['banda_sup'], mode='lines',
+            line=dict(width=0), showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=deriva.index, y=deriva['banda_inf'], mode='lines',
+            line=dict(width=0), fill='tonexty', fillcolor='rgba(31, 119, 180, 0.2)',
+            name=f"IC {nivel}%", hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=deriva.index, y=deriva['pendiente'], mode="lines",
+            name=f"Pendiente (ventana {self.config.ventana})", line=dict(color='#1f77b4')
+        ))
+        cambios = deriva[deriva['cambio']]
+        fig.add_trace(go.Scatter(
+            x=cambios.index, y=cambios['pendiente'], mode='markers',
+            name='Cambio detectado', marker=dict(color='red', size=10, symbol='x')
         ))
 
         fig.update_layout(
@@ -2,8 +2,13 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import List, Optional
+from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
+from .densidad import HistogramaBase, histograma_densidad
+from .downsampling import densidad_2d, reducir_serie
+from .sketches import ExtremosAcotados, KLLSketch, ResumenCaja, resumen_caja
+from .trazas import tramo
 
 class PlotConfigurator:
     @staticmethod
@@ -65,23 +70,37 @@ def plot_missing_bars(missings_df: pd.DataFrame, umbral_critico: float = 90.0):
     )
     return fig
 
-def plot_multiple_boxplots(df: pd.DataFrame, columnas: List[str], log_scale: bool = False):
+def plot_multiple_boxplots(df: pd.DataFrame, columnas: List[str], log_scale: bool = False,
+                           resumenes: Optional[Dict[str, ResumenCaja]] = None):
+    """
+    Boxplots desde estadísticos pre-calculados (cuartiles, bigotes y una lista
+    acotada de outliers). Sin `resumenes`, se derivan de un sketch por columna.
+    """
     if not columnas:
         return go.Figure()
-    data_melted = df[columnas].melt(var_name='Variable', value_name='Valor')
-    fig = px.box(
-        data_melted,
-        x='Variable',
-        y='Valor',
-        title='Comparación de Distribuciones y Outliers',
-        color='Variable',
-        color_discrete_sequence=px.colors.qualitative.Vivid,
-        points='outliers'
-    )
-    fig.update_traces(
-        hovertemplate='<b>%{x}</b><br>Valor: %{y}<br>Q1: %{q1}<br>Mediana: %{median}<br>Q3: %{q3}<extra></extra>'
-    )
+    resumenes = resumenes or {}
+    colores = px.colors.qualitative.Vivid
+    fig = go.Figure()
+    for i, col in enumerate(columnas):
+        r = resumenes.get(col)
+        if r is None:
+            valores = df[col].to_numpy()
+            r = resumen_caja(KLLSketch.desde_valores(valores), ExtremosAcotados.desde_valores(valores))
+        color = colores[i % len(colores)]
+        fig.add_trace(go.Box(
+            x=[col], q1=[r.q1], median=[r.mediana], q3=[r.q3],
+            lowerfence=[r.bigote_inf], upperfence=[r.bigote_sup],
+            name=col, marker_color=color, boxpoints=False,
+            hovertemplate=f'<b>{col}</b><br>Q1: %{{q1}}<br>Mediana: %{{median}}<br>Q3: %{{q3}}<extra></extra>'
+        ))
+        if len(r.outliers):
+            fig.add_trace(go.Scatter(
+                x=[col] * len(r.outliers), y=r.outliers, mode='markers', name=col,
+                marker=dict(color=color, size=4, opacity=0.6),
+                hovertemplate=f'<b>{col}</b><br>Valor: %{{y}}<extra>{r.n_outliers} outliers</extra>'
+            ))
     fig.update_layout(
+        title='Comparación de Distribuciones y Outliers',
         showlegend=False,
         plot_bgcolor='white',
         xaxis_title='Variable',
@@ -101,28 +120,35 @@ def plot_custom_histogram(
     bins: int = 30, 
     color: str = '#1f77b4', 
     log_scale: bool = False,
-    height: Optional[int] = None
+    height: Optional[int] = None,
+    base: Optional[HistogramaBase] = None
 ):
-    serie = df[columna].dropna()
-    if serie.empty:
+    # Con `base` (histograma fino ya calculado) no se recorre la columna
+    serie = None if base is not None else df[columna].dropna()
+    n = base.n if base is not None else len(serie)
+    if n == 0:
         return go.Figure()
     
-    nbins = bins if bins else min(80, max(10, int(len(serie) ** 0.5)))
+    nbins = bins if bins else min(80, max(10, int(n ** 0.5)))
     
     # Crear figura vacía
     fig = go.Figure()
     
-    # Calcular histograma manualmente
+    # Histograma y KDE desde una sola pasada de binning (KDE binned por FFT)
     try:
-        import numpy as np
-        counts, bin_edges = np.histogram(serie, bins=nbins)
+        with tramo('histograma.densidad', 'plot', filas=n):
+            if base is not None:
+                hd = base.resultado(nbins)
+            else:
+                hd = histograma_densidad(serie.to_numpy(dtype=np.float64), nbins)
+        bin_edges = hd.bordes
         bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
         
         # Añadir barras del histograma
         fig.add_trace(go.Bar(
             x=bin_centers,
-            y=counts,
-            name='Frecuencia',
+            y=hd.conteos,
+            name='Frecuencia (aprox.)' if hd.aproximado else 'Frecuencia',
             marker=dict(
                 color=color,
                 line=dict(color='black', width=1)
@@ -131,31 +157,23 @@ def plot_custom_histogram(
             width=(bin_edges[1] - bin_edges[0]) * 0.9
         ))
         
-        # Calcular KDE para la línea de densidad
-        try:
-            from scipy import stats
-            
-            kde = stats.gaussian_kde(serie)
-            x_range = np.linspace(serie.min(), serie.max(), 200)
-            kde_values = kde(x_range)
-            
+        # Línea de densidad (sin dispersión no hay KDE)
+        if hd.densidad is not None:
             # Escalar KDE a la altura del histograma
-            hist_max = counts.max()
-            kde_scaled = kde_values * hist_max / kde_values.max()
+            kde_scaled = hd.densidad * hd.conteos.max() / hd.densidad.max()
             
-            # Añadir línea KDE
             fig.add_trace(go.Scatter(
-                x=x_range,
+                x=hd.x,
                 y=kde_scaled,
                 mode='lines',
                 name='Densidad',
                 line=dict(color='darkblue', width=2.5),
                 hovertemplate='<b>Densidad</b><br>Valor: %{x:.2f}<extra></extra>'
             ))
-        except ImportError:
-            pass
             
     except Exception:
+        if serie is None:
+            raise
         # Fallback a histograma básico
         fig = px.histogram(
             serie, 
@@ -176,7 +194,7 @@ def plot_custom_histogram(
         plot_bgcolor='white',
         xaxis_title=columna,
         yaxis_title='Frecuencia',
-        height=height or max(600, min(950, 400 + len(serie) // 300)),
+        height=height or max(600, min(950, 400 + n // 300)),
         showlegend=True,
         bargap=0.1
     )
@@ -190,9 +208,15 @@ def plot_interactive_scatter(
     color_col: Optional[str] = None, 
     alpha: float = 0.5, 
     size: int = 5,
-    height: int = 720
+    height: int = 720,
+    max_points: Optional[int] = None,
+    density_bins: int = 120
 ):
     use_color = color_col if color_col != 'Ninguno' else None
+    if max_points is not None and len(df) > max_points:
+        # Sobre el presupuesto: se envían celdas de densidad, no puntos crudos
+        return _plot_scatter_densidad(df, x_col, y_col, use_color, alpha, size, height, density_bins)
+
     fig = px.scatter(
         df, 
         x=x_col, 
@@ -215,10 +239,68 @@ def plot_interactive_scatter(
     return fig
 
 
-def plot_heatmap(df: pd.DataFrame, columnas: List[str]):
+def trazo_densidad(x, y, bins: int, x_col: str, y_col: str, valores=None, color_col: Optional[str] = None,
+                   alpha: float = 0.5, size: int = 5, nombre: Optional[str] = None) -> go.Scatter:
+    """
+    Trazo de `densidad_2d`: un marcador por celda ocupada, coloreado por
+    log10 del conteo (o por el promedio de `valores`).
+    """
+    cx, cy, conteos, promedio = densidad_2d(x, y, bins, valores)
+    return go.Scatter(
+        x=cx,
+        y=cy,
+        mode='markers',
+        name=nombre,
+        customdata=conteos,
+        marker=dict(
+            size=size + 2,
+            color=promedio if valores is not None else np.log10(conteos),
+            colorscale='Magma' if valores is not None else 'Viridis',
+            opacity=alpha,
+            colorbar=dict(title=color_col or 'log10(n)')
+        ),
+        hovertemplate=f'<b>{x_col}:</b> %{{x:.2f}}<br><b>{y_col}:</b> %{{y:.2f}}'
+                      '<br>Puntos: %{customdata}<extra></extra>'
+    )
+
+
+def _plot_scatter_densidad(df: pd.DataFrame, x_col: str, y_col: str, color_col: Optional[str],
+                           alpha: float, size: int, height: int, bins: int):
+    """Scatter agregado por celdas: color = conteo (o promedio de `color_col`)."""
+    valores = df[color_col] if color_col else None
+    fig = go.Figure(trazo_densidad(df[x_col], df[y_col], bins, x_col, y_col, valores, color_col, alpha, size))
+    fig.update_layout(
+        title=f'Correlación: {x_col} vs {y_col} (densidad, {len(df):,} puntos)',
+        plot_bgcolor='white',
+        xaxis_title=x_col,
+        yaxis_title=y_col,
+        height=height
+    )
+    return fig
+
+
+def plot_calidad_aire(df: pd.DataFrame, columna: str, categoria_col: str,
+                      labels: List[str], max_points: Optional[int] = None, metodo: str = 'minmax'):
+    """Serie temporal de `columna` coloreada por categoría, reducida con `metodo` ('minmax' o 'lttb')."""
+    fig = go.Figure()
+    for label in labels:
+        serie = df.loc[df[categoria_col] == label, columna]
+        if max_points is not None:
+            serie = reducir_serie(serie, max_points // max(1, len(labels)), metodo)
+        fig.add_trace(go.Scatter(
+            x=serie.index, y=serie.to_numpy(),
+            mode="markers", name=label
+        ))
+
+    fig.update_layout(title=f"Calidad del aire según {columna}", xaxis_title="Tiempo", yaxis_title=columna)
+    return fig
+
+
+def plot_heatmap(df: pd.DataFrame, columnas: List[str], matriz: Optional[pd.DataFrame] = None):
     if not columnas or len(columnas) < 2:
         return go.Figure()
-    matriz = df[columnas].corr()
+    if matriz is None:
+        matriz = df[columnas].corr()
     fig = px.imshow(
         matriz,
         text_auto=True,
@@ -237,20 +319,24 @@ def plot_heatmap(df: pd.DataFrame, columnas: List[str]):
     return fig
 
 
-def plot_comparacion_imputacion(df_clean: pd.DataFrame, df_raw: pd.DataFrame, columna: str, 
-                                fecha_inicio = None, fecha_fin = None):
+def plot_comparacion_imputacion(df_clean: pd.DataFrame, df_raw: Optional[pd.DataFrame], columna: str, 
+                                fecha_inicio = None, fecha_fin = None, mascara = None):
     """
     Grafica la serie de tiempo comparando datos originales vs interpolados.
     Muestra valores reales como puntos azules y valores interpolados como línea roja.
+    Con la máscara de imputación (`MascaraCompacta`) los originales son los
+    valores limpios no imputados: no se necesita el frame raw y solo se
+    desempaqueta la ventana visible. `df_clean` puede ser ya una ventana leída
+    por rango: `attrs['fila_inicio']` la ubica dentro de la máscara.
     """
     # Filtramos por fecha si se especifica (para hacer zoom y ver los detalles)
-    if fecha_inicio is not None and fecha_fin is not None:
-        clean_segment = df_clean.loc[fecha_inicio:fecha_fin]
-        raw_segment = df_raw.loc[fecha_inicio:fecha_fin]
-    else:
-        # Si no, tomamos las primeras ~744 horas (1 mes) para que no sea muy pesado
-        clean_segment = df_clean.iloc[:744]
-        raw_segment = df_raw.iloc[:744]
+    i0, i1 = 0, len(df_clean)
+    if fecha_inicio is not None:
+        i0 = df_clean.index.searchsorted(pd.Timestamp(fecha_inicio), side='left')
+    if fecha_fin is not None:
+        i1 = df_clean.index.searchsorted(pd.Timestamp(fecha_fin), side='right')
+    clean_segment = df_clean.iloc[i0:i1]
+    desplazamiento = df_clean.attrs.get('fila_inicio', 0)
 
     fig, ax = plt.subplots(figsize=(12, 6))
     
@@ -260,8 +346,15 @@ def plot_comparacion_imputacion(df_clean: pd.DataFrame, df_raw: pd.DataFrame, co
     
     # 2. Datos Crudos Originales (Puntos azules)
     # Donde NO haya puntos azules, significa que ahí había un valor faltante
-    if columna in raw_segment.columns:
+    if mascara is not None and columna in mascara:
+        imputados = mascara.columna(columna, desplazamiento + i0, desplazamiento + i1)
+        raw_no_nulos = clean_segment[~imputados]
+        ax.scatter(raw_no_nulos.index, raw_no_nulos[columna], 
+                  color='blue', label='Dato Original (Raw)', s=30, zorder=10, alpha=0.8)
+    elif df_raw is not None and columna in df_raw.columns:
         # Filtrar solo los valores NO nulos del raw
+        raw_segment = df_raw.loc[clean_segment.index[0]:clean_segment.index[-1]] \
+            if len(clean_segment) else df_raw.iloc[:0]
         raw_no_nulos = raw_segment[raw_segment[columna].notna()]
         ax.scatter(raw_no_nulos.index, raw_no_nulos[columna], 
                   color='blue', label='Dato Original (Raw)', s=30, zorder=10, alpha=0.8)
@@ -273,4 +366,4 @@ def plot_comparacion_imputacion(df_clean: pd.DataFrame, df_raw: pd.DataFrame, co
     ax.grid(True, alpha=0.3)
     plt.tight_layout()
     
-    return fig
\ No newline at end of file
+    return fig
@@ -0,0 +1,321 @@
+"""
+Registro de modelos de calibración ajustados.
+Cada modelo se identifica por (huella del dataset, objetivo, predictores,
+método, parámetros) y se guarda en disco como un `.npz` comprimido con sus
+coeficientes, métricas y series de diagnóstico. Las predicciones y figuras
+se sirven desde lo guardado: solo se re-ajusta si cambian los datos o la
+especificación. Cuando cambia la huella de una fuente se borran los modelos
+de la huella anterior.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import DriftConfig, RLSConfig
+from .drift import deriva_ventanas
+from .ejecutor import Ejecutor, ejecutor_de
+from .rls import CalibradorRLS
+from .trazas import tramo
+
+METODOS = ('ols', 'rls', 'deriva')
+
+
+def clave_modelo(huella: str, objetivo: str, predictores: Sequence[str], metodo: str,
+                 parametros: Optional[Dict[str, Any]] = None) -> str:
+    """Identificador estable de un ajuste."""
+    spec = [huella, objetivo, list(predictores), metodo, parametros or {}]
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:20]
+
+
+@dataclass
+class ModeloCalibracion:
+    """Modelo ajustado: coeficientes, métricas y series de diagnóstico."""
+    objetivo: str
+    predictores: Tuple[str, ...]
+    metodo: str
+    huella: str
+    coeficientes: np.ndarray
+    intercepto: float
+    metricas: Dict[str, float] = field(default_factory=dict)
+    parametros: Dict[str, Any] = field(default_factory=dict)
+    series: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def clave(self) -> str:
+        return clave_modelo(self.huella, self.objetivo, self.predictores, self.metodo, self.parametros)
+
+    def predecir(self, df: pd.DataFrame) -> np.ndarray:
+        """Predicción con los coeficientes guardados (NaN donde falten predictores)."""
+        X = df[list(self.predictores)].to_numpy(dtype=np.float64)
+        return X @ self.coeficientes + self.intercepto
+
+    def tabla(self) -> pd.DataFrame:
+        """Series de diagnóstico como frame (índice temporal si se guardó)."""
+        series = dict(self.series)
+        indice = series.pop('indice', None)
+        if indice is not None:
+            indice = pd.DatetimeIndex(indice.astype('datetime64[ns]'))
+        return pd.DataFrame(series, index=indice)
+
+    def guardar(self, path: Path) -> None:
+        meta = {
+            'objetivo': self.objetivo, 'predictores': list(self.predictores),
+            'metodo': self.metodo, 'huella': self.huella, 'intercepto': self.intercepto,
+            'metricas': self.metricas, 'parametros': self.parametros,
+        }
+        tmp = path.with_suffix('.npz.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), coeficientes=self.coeficientes,
+                                **{f'serie_{k}': v for k, v in self.series.items()})
+        os.replace(tmp, path)
+
+    @classmethod
+    def cargar(cls, path: Path) -> 'ModeloCalibracion':
+        with np.load(path) as datos:
+            meta = json.loads(str(datos['meta']))
+            series = {k[len('serie_'):]: datos[k] for k in datos.files if k.startswith('serie_')}
+            return cls(meta['objetivo'], tuple(meta['predictores']), meta['metodo'], meta['huella'],
+                       datos['coeficientes'], meta['intercepto'], meta['metricas'],
+                       meta['parametros'], series)
+
+
+def _metricas(y: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    residuo = y - y_pred
+    sse = float(residuo @ residuo)
+    sst = float(((y - y.mean()) ** 2).sum())
+    return {'n': int(len(y)), 'r2': 1.0 - sse / sst if sst else float('nan'),
+            'rmse': float(np.sqrt(sse / len(y))) if len(y) else float('nan')}
+
+
+def _ajustar_ols(df: pd.DataFrame, objetivo: str, predictores: Tuple[str, ...],
+                 parametros: Dict[str, Any]):
+    datos = df[list(predictores) + [objetivo]].dropna()
+    X = datos[list(predictores)].to_numpy(dtype=np.float64)
+    y = datos[objetivo].to_numpy(dtype=np.float64)
+    coeficientes, *_ = np.linalg.lstsq(np.hstack([X, np.ones((len(X), 1))]), y, rcond=None)
+    y_pred = X @ coeficientes[:-1] + coeficientes[-1]
+    return coeficientes[:-1], float(coeficientes[-1]), _metricas(y, y_pred), {}
+
+
+def _ajustar_rls(df: pd.DataFrame, objetivo: str, predictores: Tuple[str, ...],
+                 parametros: Dict[str, Any]):
+    datos = df[list(predictores) + [objetivo]].dropna()
+    X = datos[list(predictores)].to_numpy(dtype=np.float64)
+    y = datos[objetivo].to_numpy(dtype=np.float64)
+    calibrador = CalibradorRLS(len(predictores), RLSConfig(**parametros))
+    y_pred = calibrador.ajustar(X, y)
+    # Se guardan el estado final (para continuar en línea) y la predicción a un paso
+    series = {'indice': datos.index.asi8, 'prediccion': y_pred.astype(np.float32), 'P': calibrador.P[0]}
+    return calibrador.coeficientes[0].copy(), float(calibrador.intercepto[0]), _metricas(y, y_pred), series
+
+
+def _ajustar_deriva(df: pd.DataFrame, objetivo: str, predictores: Tuple[str, ...],
+                    parametros: Dict[str, Any]):
+    deriva = deriva_ventanas(df, predictores[0], objetivo, DriftConfig(**parametros))
+    series = {'indice': deriva.index.asi8, **{c: deriva[c].to_numpy() for c in deriva.columns}}
+    validas = deriva['pendiente'].dropna()
+    coeficientes = validas.to_numpy()[-1:] if len(validas) else np.full(1, np.nan)
+    intercepto = float(deriva['intercepto'].dropna().iloc[-1]) if len(validas) else float('nan')
+    return coeficientes, intercepto, {'cambios': int(deriva['cambio'].sum())}, series
+
+
+_AJUSTADORES: Dict[str, Callable] = {'ols': _ajustar_ols, 'rls': _ajustar_rls, 'deriva': _ajustar_deriva}
+
+# (objetivo, predictores, método, parámetros) de un modelo
+Especificacion = Tuple[str, Tuple[str, ...], str, Dict[str, Any]]
+
+
+def _ajustar_especificacion(df: pd.DataFrame, especificacion: Especificacion):
+    """Tarea del ejecutor: un ajuste completo (importable por los procesos)."""
+    objetivo, predictores, metodo, parametros = especificacion
+    return _AJUSTADORES[metodo](df, objetivo, predictores, parametros)
+
+
+def _huella_guardada(path: Path) -> Optional[str]:
+    """Huella de un `.npz` leyendo solo su metadata (None si no se puede leer)."""
+    try:
+        with np.load(path) as datos:
+            return json.loads(str(datos['meta']))['huella']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class RegistroModelos:
+    """
+    Modelos respaldados por un directorio de `.npz`, con los últimos
+    `max_memoria` usados en memoria (LRU). Es compartido por todas las
+    sesiones: la memoria y el índice de huellas se protegen con un lock, y
+    cada ajuste toma además un lock por clave (una de `CANDADOS` franjas)
+    para que dos sesiones no ajusten el mismo modelo a la vez.
+    """
+
+    CANDADOS = 64
+
+    def __init__(self, directorio: Path, max_memoria: int = 64):
+        self.directorio = Path(directorio)
+        self.max_memoria = max_memoria
+        self._memoria: "OrderedDict[str, ModeloCalibracion]" = OrderedDict()
+        self._vigentes: Optional[Dict[str, str]] = None     # fuente -> huella actual
+        self._lock = threading.Lock()
+        self._candados = [threading.Lock() for _ in range(self.CANDADOS)]
+        self.ajustes = 0
+
+    def _ruta(self, clave: str) -> Path:
+        return self.directorio / f'{clave}.npz'
+
+    def _franja(self, clave: str) -> int:
+        return int(clave[:8], 16) % self.CANDADOS
+
+    def _recordar(self, modelo: ModeloCalibracion) -> None:
+        with self._lock:
+            self._memoria[modelo.clave] = modelo
+            self._memoria.move_to_end(modelo.clave)
+            while len(self._memoria) > self.max_memoria:
+                self._memoria.popitem(last=False)
+
+    def podar(self, fuente: str, huella: str) -> int:
+        """
+        Registra `huella` como la actual de `fuente`; si reemplaza a otra,
+        elimina los modelos de la anterior (en memoria y en disco). Retorna
+        cuántos archivos se eliminaron.
+        """
+        indice = self.directorio / 'vigentes.json'
+        with self._lock:
+            if self._vigentes is None:
+                try:
+                    self._vigentes = json.loads(indice.read_text())
+                except (OSError, ValueError):
+                    self._vigentes = {}
+            anterior = self._vigentes.get(fuente)
+            if anterior == huella:
+                return 0
+            self._vigentes[fuente] = huella
+            for clave in [c for c, m in self._memoria.items() if m.huella == anterior]:
+                del self._memoria[clave]
+            eliminados = 0
+            try:
+                if anterior is not None and self.directorio.exists():
+                    for archivo in self.directorio.glob('*.npz'):
+                        if _huella_guardada(archivo) == anterior:
+                            archivo.unlink()
+                            eliminados += 1
+                self.directorio.mkdir(parents=True, exist_ok=True)
+                indice.write_text(json.dumps(self._vigentes))
+            except OSError:
+                # Directorio de solo lectura: los modelos viejos quedan, nunca se piden
+                pass
+            return eliminados
+
+    def obtener(self, clave: str) -> Optional[ModeloCalibracion]:
+        with self._lock:
+            modelo = self._memoria.get(clave)
+            if modelo is not None:
+                self._memoria.move_to_end(clave)
+                return modelo
+        ruta = self._ruta(clave)
+        if not ruta.exists():
+            return None
+        try:
+            modelo = ModeloCalibracion.cargar(ruta)
+        except (OSError, ValueError, KeyError):
+            # Entrada corrupta o de un formato anterior: se re-ajusta
+            return None
+        self._recordar(modelo)
+        return modelo
+
+    def registrar(self, modelo: ModeloCalibracion) -> ModeloCalibracion:
+        # La escritura es atómica (temporal + rename); el lock solo cubre la memoria
+        try:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            modelo.guardar(self._ruta(modelo.clave))
+        except OSError:
+            # Sin permisos de escritura: el modelo se sirve desde memoria
+            pass
+        self._recordar(modelo)
+        return modelo
+
+    def _registrar_ajuste(self, modelo: ModeloCalibracion) -> ModeloCalibracion:
+        with self._lock:
+            self.ajustes += 1
+        return self.registrar(modelo)
+
+    def obtener_o_ajustar(self, df: pd.DataFrame, huella: str, objetivo: str,
+                          predictores: Sequence[str], metodo: str = 'ols',
+                          parametros: Optional[Dict[str, Any]] = None) -> ModeloCalibracion:
+        """Devuelve el modelo registrado o lo ajusta (y registra) si no existe."""
+        if metodo not in _AJUSTADORES:
+            raise ValueError(f"Método no soportado: {metodo}. Usa uno de {METODOS}.")
+        predictores, parametros = tuple(predictores), dict(parametros or {})
+        clave = clave_modelo(huella, objetivo, predictores, metodo, parametros)
+        modelo = self.obtener(clave)
+        if modelo is not None:
+            return modelo
+        with self._candados[self._franja(clave)]:
+            # Otra sesión pudo ajustarlo mientras se esperaba el lock
+            modelo = self.obtener(clave)
+            if modelo is not None:
+                return modelo
+            with tramo(f'modelo.ajuste.{metodo}', 'modelo', objetivo=objetivo, filas=len(df)):
+                coeficientes, intercepto, metricas, series = _AJUSTADORES[metodo](df, objetivo, predictores,
+                                                                                   parametros)
+            return self._registrar_ajuste(ModeloCalibracion(objetivo, predictores, metodo, huella, coeficientes,
+                                                            intercepto, metricas, parametros, series))
+
+    def obtener_o_ajustar_varios(self, df: pd.DataFrame, huella: str, especificaciones: Sequence[tuple],
+                                 ejecutor: Optional[Ejecutor] = None) -> List[ModeloCalibracion]:
+        """
+        Como `obtener_o_ajustar` para varias (objetivo, predictores, método,
+        parámetros); los que faltan se ajustan repartidos en `ejecutor`.
+        """
+        specs: List[Especificacion] = []
+        for objetivo, predictores, metodo, parametros in especificaciones:
+            if metodo not in _AJUSTADORES:
+                raise ValueError(f"Método no soportado: {metodo}. Usa uno de {METODOS}.")
+            specs.append((objetivo, tuple(predictores), metodo, dict(parametros or {})))
+        claves = [clave_modelo(huella, *spec) for spec in specs]
+        modelos = [self.obtener(clave) for clave in claves]
+        if all(m is not None for m in modelos):
+            return modelos
+        # Locks de las franjas en orden creciente: sin interbloqueos entre lotes
+        franjas = sorted({self._franja(claves[i]) for i, m in enumerate(modelos) if m is None})
+        for franja in franjas:
+            self._candados[franja].acquire()
+        try:
+            modelos = [m if m is not None else self.obtener(clave) for m, clave in zip(modelos, claves)]
+            faltantes = [i for i, m in enumerate(modelos) if m is None]
+            if faltantes:
+                columnas = list(dict.fromkeys(c for i in faltantes for c in (*specs[i][1], specs[i][0])))
+                with tramo('modelo.ajuste.lote', 'modelo', modelos=len(faltantes), filas=len(df)):
+                    ajustes = ejecutor_de(ejecutor).mapear(_ajustar_especificacion,
+                                                           [specs[i] for i in faltantes], df, columnas)
+                for i, (coeficientes, intercepto, metricas, series) in zip(faltantes, ajustes):
+                    objetivo, predictores, metodo, parametros = specs[i]
+                    modelos[i] = self._registrar_ajuste(ModeloCalibracion(objetivo, predictores, metodo, huella,
+                                                                          coeficientes, intercepto, metricas,
+                                                                          parametros, series))
+        finally:
+            for franja in reversed(franjas):
+                self._candados[franja].release()
+        return modelos
+
+    def limpiar(self) -> None:
+        """Elimina los modelos en memoria y en disco."""
+        with self._lock:
+            self._memoria.clear()
+            self._vigentes = None
+            if self.directorio.exists():
+                for archivo in [*self.directorio.glob('*.npz*'), self.directorio / 'vigentes.json']:
+                    archivo.unlink(missing_ok=True)
+
+
+def parametros_de(config) -> Dict[str, Any]:
+    """Parámetros serializables de una dataclass de configuración."""
+    return asdict(config) if config is not None else {}
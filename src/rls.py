@@ -0,0 +1,140 @@
+"""
+Calibración en línea por mínimos cuadrados recursivos (RLS).
+Cada fila nueva actualiza los coeficientes en O(p²) sin volver a leer el
+histórico; el factor de olvido λ < 1 descuenta las filas antiguas para seguir
+el drift del sensor. `BancoRLS` mantiene el estado de muchos sensores y los
+actualiza a la vez con operaciones vectorizadas; el estado se puede
+capturar, restaurar y guardar en disco.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .config import RLSConfig
+
+
+@dataclass
+class EstadoRLS:
+    """Estado completo de un banco RLS (coeficientes, covarianza y contadores)."""
+    theta: np.ndarray   # (sensores, p)
+    P: np.ndarray       # (sensores, p, p)
+    n: np.ndarray       # filas incorporadas por sensor
+    olvido: float
+
+    def copia(self) -> 'EstadoRLS':
+        return EstadoRLS(self.theta.copy(), self.P.copy(), self.n.copy(), self.olvido)
+
+
+class BancoRLS:
+    """
+    RLS para `n_sensores` modelos independientes de `n_predictores`
+    variables (más intercepto). Las filas con NaN se omiten por sensor.
+    """
+
+    def __init__(self, n_sensores: int, n_predictores: int, config: Optional[RLSConfig] = None):
+        config = config or RLSConfig()
+        p = n_predictores + 1
+        self.olvido = config.olvido
+        self.theta = np.zeros((n_sensores, p))
+        self.P = np.tile(np.eye(p) * config.delta, (n_sensores, 1, 1))
+        self.n = np.zeros(n_sensores, dtype=np.int64)
+
+    @staticmethod
+    def _diseno(X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        return np.concatenate([X, np.ones(X.shape[:-1] + (1,))], axis=-1)
+
+    def actualizar(self, X, y) -> np.ndarray:
+        """
+        Incorpora una fila por sensor (X: sensores × predictores, y: sensores).
+        Retorna la predicción previa a la actualización (error a un paso).
+        """
+        return self._paso(X, y)
+
+    def _paso(self, X, y) -> np.ndarray:
+        x = self._diseno(X)
+        y = np.asarray(y, dtype=np.float64)
+        prediccion = np.einsum('sp,sp->s', self.theta, x)
+        validos = np.isfinite(y) & np.isfinite(x).all(axis=1)
+        if validos.all():
+            # Caso común: sin filtrar, se evita copiar theta y P
+            sel = slice(None)
+        elif validos.any():
+            sel = validos
+            x, y = x[sel], y[sel]
+        else:
+            return prediccion
+
+        theta, P = self.theta[sel], self.P[sel]
+        Px = np.einsum('sij,sj->si', P, x)
+        ganancia = Px / (self.olvido + np.einsum('si,si->s', x, Px))[:, None]
+        theta += ganancia * (y - prediccion[sel])[:, None]
+        P = (P - ganancia[:, :, None] * Px[:, None, :]) / self.olvido
+        # Simetrizar evita que el redondeo acumule asimetría en P
+        self.P[sel] = (P + P.transpose(0, 2, 1)) / 2
+        self.theta[sel] = theta
+        self.n[sel] += 1
+        return prediccion
+
+    def ajustar(self, X, y) -> np.ndarray:
+        """Recorre filas en orden (X: filas × sensores × predictores, y: filas × sensores)."""
+        X, y = np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        predicciones = np.empty(y.shape)
+        for t in range(len(y)):
+            predicciones[t] = self._paso(X[t], y[t])
+        return predicciones
+
+    def predecir(self, X) -> np.ndarray:
+        return np.einsum('...sp,sp->...s', self._diseno(X), self.theta)
+
+    @property
+    def coeficientes(self) -> np.ndarray:
+        """Coeficientes de los predictores (sin intercepto), por sensor."""
+        return self.theta[:, :-1]
+
+    @property
+    def intercepto(self) -> np.ndarray:
+        return self.theta[:, -1]
+
+    def instantanea(self) -> EstadoRLS:
+        return EstadoRLS(self.theta, self.P, self.n, self.olvido).copia()
+
+    def restaurar(self, estado: EstadoRLS) -> 'BancoRLS':
+        estado = estado.copia()
+        self.theta, self.P, self.n, self.olvido = estado.theta, estado.P, estado.n, estado.olvido
+        return self
+
+    def guardar(self, path) -> None:
+        np.savez(path, theta=self.theta, P=self.P, n=self.n, olvido=self.olvido)
+
+    @classmethod
+    def cargar(cls, path) -> 'BancoRLS':
+        with np.load(path) as datos:
+            theta = datos['theta']
+            banco = cls(theta.shape[0], theta.shape[1] - 1)
+            return banco.restaurar(EstadoRLS(theta, datos['P'], datos['n'], float(datos['olvido'])))
+
+
+class CalibradorRLS(BancoRLS):
+    """RLS de un solo sensor: X es un vector de predictores por fila."""
+
+    def __init__(self, n_predictores: int, config: Optional[RLSConfig] = None):
+        super().__init__(1, n_predictores, config)
+
+    def actualizar(self, x, y) -> float:
+        return float(self._paso(np.asarray(x, dtype=np.float64)[None, :], np.atleast_1d(y))[0])
+
+    def ajustar(self, X, y) -> np.ndarray:
+        X, y = np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        return super().ajustar(X[:, None, :], y[:, None])[:, 0]
+
+    def predecir(self, X) -> np.ndarray:
+        return super().predecir(np.asarray(X, dtype=np.float64)[..., None, :])[..., 0]
+
+    @classmethod
+    def cargar(cls, path) -> 'CalibradorRLS':
+        with np.load(path) as datos:
+            theta = datos['theta']
+            calibrador = cls(theta.shape[1] - 1)
+            return calibrador.restaurar(EstadoRLS(theta, datos['P'], datos['n'], float(datos['olvido'])))
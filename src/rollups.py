@@ -0,0 +1,193 @@
+"""
+Almacén de agregados pre-calculados (horario → diario → mensual).
+Se materializa una vez al cargar: por columna, count/sum/sum² /min/max a
+grano diario y mensual, y sketches KLL y extremos mensuales (cuantiles y
+boxplots). Las consultas cubren un rango con el grano más grueso posible
+(meses completos, luego días completos) y solo leen filas horarias en los
+bordes parciales.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ejecutor import Ejecutor, ejecutor_de
+from .sketches import ExtremosAcotados, KLLSketch, ResumenCaja, fusionar_sketches, resumen_caja
+
+GRANOS = ('D', 'MS')
+ESTADISTICOS = ('count', 'sum', 'sumsq', 'min', 'max')
+
+
+def _momentos(df: pd.DataFrame, grano: str) -> pd.DataFrame:
+    """count/sum/sumsq/min/max por periodo; columnas MultiIndex (columna, estadístico)."""
+    agrupado = df.resample(grano)
+    partes = {
+        'count': agrupado.count(),
+        'sum': agrupado.sum(),
+        'sumsq': (df ** 2).resample(grano).sum(),
+        'min': agrupado.min(),
+        'max': agrupado.max(),
+    }
+    return pd.concat(partes, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+def _combinar(momentos: pd.DataFrame) -> pd.DataFrame:
+    """Reduce filas de momentos (de cualquier grano) a un resumen por columna."""
+    return pd.DataFrame({
+        'count': momentos.xs('count', axis=1, level=1).sum(),
+        'sum': momentos.xs('sum', axis=1, level=1).sum(),
+        'sumsq': momentos.xs('sumsq', axis=1, level=1).sum(),
+        'min': momentos.xs('min', axis=1, level=1).min(),
+        'max': momentos.xs('max', axis=1, level=1).max(),
+    })
+
+
+def _mensuales_columna(df: pd.DataFrame, tarea: Tuple[str, int, int]):
+    """Sketch KLL y extremos de cada mes de una columna."""
+    columna, k, m = tarea
+    serie = df[columna]
+    sketches, extremos = {}, {}
+    for periodo, grupo in serie.groupby(serie.index.to_period('M')):
+        inicio = periodo.to_timestamp()
+        valores = grupo.to_numpy()
+        sketches[inicio] = KLLSketch.desde_valores(valores, k)
+        extremos[inicio] = ExtremosAcotados.desde_valores(valores, m)
+    return sketches, extremos
+
+
+class RollupStore:
+    """Agregados por columna a grano diario y mensual."""
+
+    def __init__(self, df: pd.DataFrame, columnas: Optional[List[str]] = None,
+                 k: int = 200, m: int = 200,
+                 ejecutor: Optional[Ejecutor] = None):
+        if columnas is None:
+            columnas = df.select_dtypes('number').columns.tolist()
+        self.df = df
+        self.columnas = columnas
+        self.k = k
+        self.m = m
+        self._cajas: Dict[str, ResumenCaja] = {}
+        datos = df[columnas].astype(np.float64)
+
+        self.momentos: Dict[str, pd.DataFrame] = {g: _momentos(datos, g) for g in GRANOS}
+
+        # Sketches KLL y extremos mensuales: fusionables para cualquier rango de meses.
+        # Son independientes por columna: se reparten en `ejecutor`
+        mensuales = ejecutor_de(ejecutor).mapear(_mensuales_columna, [(c, k, m) for c in columnas], datos)
+        self.sketches: Dict[str, Dict[pd.Timestamp, KLLSketch]] = {}
+        self.extremos: Dict[str, Dict[pd.Timestamp, ExtremosAcotados]] = {}
+        for c, (sketches, extremos) in zip(columnas, mensuales):
+            self.sketches[c], self.extremos[c] = sketches, extremos
+
+    @property
+    def filas_materializadas(self) -> int:
+        return sum(len(m) for m in self.momentos.values())
+
+    def _cubrir(self, inicio: Optional[pd.Timestamp], fin: Optional[pd.Timestamp]):
+        """
+        Descompone [inicio, fin) en meses completos, días completos y tramos
+        horarios residuales en los bordes.
+        """
+        indice = self.df.index
+        inicio = pd.Timestamp(inicio) if inicio is not None else indice.min().floor('D')
+        fin = pd.Timestamp(fin) if fin is not None else indice.max().floor('D') + pd.Timedelta(days=1)
+
+        m0 = inicio if inicio == inicio.to_period('M').to_timestamp() else \
+            (inicio.to_period('M') + 1).to_timestamp()
+        m1 = fin.to_period('M').to_timestamp()
+        meses = (m0, m1) if m0 < m1 else None
+        lados = [(inicio, m0), (m1, fin)] if meses else [(inicio, fin)]
+
+        dias, horas = [], []
+        for a, b in lados:
+            if a >= b:
+                continue
+            d0, d1 = a.ceil('D'), b.floor('D')
+            if d0 < d1:
+                dias.append((d0, d1))
+                horas.extend([(a, d0), (d1, b)])
+            else:
+                horas.append((a, b))
+        horas = [(a, b) for a, b in horas if a < b]
+        return meses, dias, horas
+
+    @staticmethod
+    def _rango(frame: pd.DataFrame, a: pd.Timestamp, b: pd.Timestamp) -> pd.DataFrame:
+        """Filas con índice en [a, b) sobre un índice ordenado."""
+        i0, i1 = frame.index.searchsorted(a, 'left'), frame.index.searchsorted(b, 'left')
+        return frame.iloc[i0:i1]
+
+    def resumen(self, columnas: Optional[List[str]] = None, inicio=None, fin=None) -> pd.DataFrame:
+        """count/mean/std/min/max por columna sobre [inicio, fin)."""
+        columnas = columnas or self.columnas
+        meses, dias, horas = self._cubrir(inicio, fin)
+        bloques = []
+        if meses:
+            bloques.append(self._rango(self.momentos['MS'], *meses))
+        for a, b in dias:
+            bloques.append(self._rango(self.momentos['D'], a, b))
+        for a, b in horas:
+            tramo = self._rango(self.df, a, b)[self.columnas].astype(np.float64)
+            if not tramo.empty:
+                bloques.append(_momentos(tramo, 'h'))
+        momentos = pd.concat(bloques) if bloques else self.momentos['D'].iloc[:0]
+        total = _combinar(momentos).reindex(columnas)
+
+        count = total['count'].replace(0, np.nan)
+        media = total['sum'] / count
+        varianza = (total['sumsq'] - count * media ** 2) / (count - 1)
+        return pd.DataFrame({
+            'count': total['count'].fillna(0).astype(np.int64),
+            'mean': media,
+            'std': np.sqrt(varianza.clip(lower=0)),
+            'min': total['min'],
+            'max': total['max'],
+        })
+
+    def serie(self, columna: str, grano: str = 'MS', estadistico: str = 'mean') -> pd.Series:
+        """Serie por periodo de un estadístico (mean, std o uno de ESTADISTICOS)."""
+        m = self.momentos[grano][columna]
+        if estadistico == 'mean':
+            return m['sum'] / m['count'].replace(0, np.nan)
+        if estadistico == 'std':
+            n = m['count'].replace(0, np.nan)
+            return np.sqrt(((m['sumsq'] - m['sum'] ** 2 / n) / (n - 1)).clip(lower=0))
+        return m[estadistico]
+
+    def _bordes(self, columna: str, dias, horas) -> np.ndarray:
+        bordes = [self._rango(self.df, a, b)[columna].to_numpy() for a, b in dias + horas]
+        return np.concatenate(bordes) if bordes else np.empty(0)
+
+    def _mensuales(self, resumenes: Dict[pd.Timestamp, object], meses) -> list:
+        if not meses:
+            return []
+        return [r for t, r in resumenes.items() if meses[0] <= t < meses[1]]
+
+    def sketch(self, columna: str, inicio=None, fin=None) -> KLLSketch:
+        """Sketch del rango: sketches mensuales fusionados + filas de los bordes."""
+        meses, dias, horas = self._cubrir(inicio, fin)
+        total = fusionar_sketches(self._mensuales(self.sketches[columna], meses), self.k)
+        return total.actualizar(self._bordes(columna, dias, horas))
+
+    def cuantiles(self, columna: str, qs: Sequence[float], inicio=None, fin=None) -> np.ndarray:
+        """Cuantiles aproximados sobre [inicio, fin)."""
+        return self.sketch(columna, inicio, fin).cuantiles(qs)
+
+    def caja(self, columna: str, inicio=None, fin=None) -> ResumenCaja:
+        """Estadísticos de boxplot sobre [inicio, fin) sin leer la columna completa."""
+        if inicio is None and fin is None and columna in self._cajas:
+            return self._cajas[columna]
+        meses, dias, horas = self._cubrir(inicio, fin)
+        bordes = self._bordes(columna, dias, horas)
+        sketch = fusionar_sketches(self._mensuales(self.sketches[columna], meses), self.k)
+        partes = self._mensuales(self.extremos[columna], meses)
+        if len(bordes):
+            partes.append(ExtremosAcotados.desde_valores(bordes, self.m))
+        extremos = ExtremosAcotados(self.m)
+        for e in partes:
+            extremos.fusionar(e)
+        resumen = resumen_caja(sketch.actualizar(bordes), extremos, partes)
+        if inicio is None and fin is None:
+            self._cajas[columna] = resumen
+        return resumen
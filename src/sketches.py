@@ -0,0 +1,242 @@
+"""
+Sketch de cuantiles KLL (Karnin-Lang-Liberty) fusionable.
+Mantiene una jerarquía de compactadores: el nivel h guarda ítems de peso 2^h
+y, al superar su capacidad, se ordena y promueve la mitad (offset aleatorio)
+al nivel siguiente. El tamaño queda acotado por ~3k ítems y dos sketches se
+fusionan concatenando nivel a nivel, lo que permite combinar periodos o
+particiones sin volver a leer los datos.
+Junto al sketch, `ExtremosAcotados` conserva los m valores más bajos y más
+altos (también fusionable) para listar outliers sin recorrer la columna.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class KLLSketch:
+    """Resumen aproximado de la distribución de una columna."""
+
+    def __init__(self, k: int = 200, semilla: int = 0):
+        self.k = k
+        self.niveles: List[np.ndarray] = [np.empty(0)]
+        self.n = 0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self._rng = np.random.default_rng(semilla)
+
+    @classmethod
+    def desde_valores(cls, valores, k: int = 200, semilla: int = 0) -> 'KLLSketch':
+        return cls(k, semilla).actualizar(valores)
+
+    def _capacidad(self, nivel: int) -> int:
+        profundidad = len(self.niveles) - nivel - 1
+        return max(8, int(np.ceil(self.k * (2 / 3) ** profundidad)))
+
+    def actualizar(self, valores) -> 'KLLSketch':
+        """Incorpora un lote de valores (los NaN se ignoran)."""
+        v = np.asarray(valores, dtype=np.float64).ravel()
+        v = v[~np.isnan(v)]
+        if v.size == 0:
+            return self
+        self.n += v.size
+        self.minimo = min(self.minimo, float(v.min()))
+        self.maximo = max(self.maximo, float(v.max()))
+        self.niveles[0] = np.concatenate([self.niveles[0], v])
+        self._compactar()
+        return self
+
+    def _compactar(self) -> None:
+        hubo_cambios = True
+        while hubo_cambios:
+            hubo_cambios = False
+            for h in range(len(self.niveles)):
+                nivel = self.niveles[h]
+                if len(nivel) <= self._capacidad(h):
+                    continue
+                if h + 1 == len(self.niveles):
+                    self.niveles.append(np.empty(0))
+                nivel = np.sort(nivel)
+                # Con largo impar, un ítem queda en el nivel para no perder peso
+                resto, nivel = (nivel[-1:], nivel[:-1]) if len(nivel) % 2 else (nivel[:0], nivel)
+                offset = int(self._rng.integers(2))
+                self.niveles[h + 1] = np.concatenate([self.niveles[h + 1], nivel[offset::2]])
+                self.niveles[h] = resto
+                hubo_cambios = True
+
+    def fusionar(self, otro: 'KLLSketch') -> 'KLLSketch':
+        """Incorpora otro sketch (in place) y retorna self."""
+        if otro.n == 0:
+            return self
+        while len(self.niveles) < len(otro.niveles):
+            self.niveles.append(np.empty(0))
+        for h, nivel in enumerate(otro.niveles):
+            self.niveles[h] = np.concatenate([self.niveles[h], nivel])
+        self.n += otro.n
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        self._compactar()
+        return self
+
+    def copia(self) -> 'KLLSketch':
+        nuevo = KLLSketch(self.k)
+        nuevo.niveles = [nivel.copy() for nivel in self.niveles]
+        nuevo.n, nuevo.minimo, nuevo.maximo = self.n, self.minimo, self.maximo
+        return nuevo
+
+    @property
+    def tamano(self) -> int:
+        """Ítems retenidos (independiente de n salvo un factor logarítmico)."""
+        return sum(len(nivel) for nivel in self.niveles)
+
+    def _ponderados(self) -> Tuple[np.ndarray, np.ndarray]:
+        valores = np.concatenate(self.niveles)
+        pesos = np.concatenate([np.full(len(nivel), 2.0 ** h) for h, nivel in enumerate(self.niveles)])
+        orden = np.argsort(valores, kind='stable')
+        return valores[orden], np.cumsum(pesos[orden])
+
+    def cuantiles(self, qs: Iterable[float]) -> np.ndarray:
+        """Cuantiles aproximados; q=0 y q=1 retornan el mínimo y máximo exactos."""
+        qs = np.asarray(list(qs), dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        valores, acumulado = self._ponderados()
+        idx = np.searchsorted(acumulado, qs * acumulado[-1], side='left')
+        resultado = valores[np.clip(idx, 0, len(valores) - 1)]
+        resultado[qs <= 0] = self.minimo
+        resultado[qs >= 1] = self.maximo
+        return resultado
+
+    def cdf(self, x) -> np.ndarray:
+        """Fracción aproximada de valores <= x."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.n == 0:
+            return np.full(x.shape, np.nan)
+        valores, acumulado = self._ponderados()
+        idx = np.searchsorted(valores, x, side='right')
+        acumulado = np.concatenate([[0.0], acumulado])
+        return acumulado[idx] / acumulado[-1]
+
+
+def fusionar_sketches(sketches: Iterable[KLLSketch], k: int = 200) -> KLLSketch:
+    """Fusiona varios sketches en uno nuevo sin modificar los originales."""
+    total = KLLSketch(k)
+    for sketch in sketches:
+        total.fusionar(sketch)
+    return total
+
+
+class ExtremosAcotados:
+    """Los `m` valores más bajos y los `m` más altos vistos (fusionable)."""
+
+    def __init__(self, m: int = 200):
+        self.m = m
+        self.bajos = np.empty(0)
+        self.altos = np.empty(0)
+
+    @classmethod
+    def desde_valores(cls, valores, m: int = 200) -> 'ExtremosAcotados':
+        return cls(m).actualizar(valores)
+
+    def actualizar(self, valores) -> 'ExtremosAcotados':
+        v = np.asarray(valores, dtype=np.float64).ravel()
+        v = v[~np.isnan(v)]
+        return self._combinar(v, v)
+
+    def fusionar(self, otro: 'ExtremosAcotados') -> 'ExtremosAcotados':
+        # Cada lado solo con su par: con ≤ 2m valores vistos `bajos` y `altos`
+        # de `otro` se solapan y pasarlos ambos contaría dos veces el solape
+        return self._combinar(otro.bajos, otro.altos)
+
+    def _combinar(self, bajos: np.ndarray, altos: np.ndarray) -> 'ExtremosAcotados':
+        bajos = np.concatenate([self.bajos, bajos])
+        altos = np.concatenate([self.altos, altos])
+        # partition evita ordenar el lote completo
+        if len(bajos) > self.m:
+            bajos = np.partition(bajos, self.m - 1)[:self.m]
+        if len(altos) > self.m:
+            altos = np.partition(altos, len(altos) - self.m)[-self.m:]
+        self.bajos, self.altos = np.sort(bajos), np.sort(altos)
+        return self
+
+
+@dataclass
+class ResumenCaja:
+    """Estadísticos de un boxplot (convención de Tukey, bigotes a 1.5·IQR)."""
+    q1: float
+    mediana: float
+    q3: float
+    bigote_inf: float
+    bigote_sup: float
+    outliers: np.ndarray      # lista acotada a los extremos conservados
+    n_outliers: int           # exacto por partes o estimado desde el sketch
+    n: int
+
+
+def _exactos(partes: Sequence[ExtremosAcotados], limite_inf: float,
+             limite_sup: float) -> Tuple[Optional[int], Optional[int]]:
+    """Outliers por lado sumados por parte; None si alguna parte no alcanza el límite."""
+    n_bajos = n_altos = 0
+    for parte in partes:
+        fuera = int((parte.bajos < limite_inf).sum())
+        if n_bajos is not None and (fuera < len(parte.bajos) or len(parte.bajos) < parte.m):
+            n_bajos += fuera
+        else:
+            n_bajos = None
+        fuera = int((parte.altos > limite_sup).sum())
+        if n_altos is not None and (fuera < len(parte.altos) or len(parte.altos) < parte.m):
+            n_altos += fuera
+        else:
+            n_altos = None
+    return n_bajos, n_altos
+
+
+def resumen_caja(sketch: KLLSketch, extremos: ExtremosAcotados,
+                 partes: Sequence[ExtremosAcotados] = ()) -> ResumenCaja:
+    """
+    Cuartiles y bigotes desde el sketch; outliers desde los extremos. Con
+    `partes` (los extremos de cada partición que se fusionaron en
+    `extremos`) el conteo es exacto mientras ninguna parte se sature.
+    """
+    q1, mediana, q3 = sketch.cuantiles([0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    limite_inf, limite_sup = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    valores, _ = sketch._ponderados()
+    bajos, altos = extremos.bajos, extremos.altos
+
+    def _bigote(exactos: np.ndarray, dentro: np.ndarray, tomar_min: bool) -> float:
+        # El bigote es el valor real más extremo dentro del límite: exacto si
+        # los extremos conservados lo alcanzan, aproximado por el sketch si no
+        if exactos.size:
+            return float(exactos.min() if tomar_min else exactos.max())
+        return float(dentro.min() if tomar_min else dentro.max())
+
+    dentro = valores[(valores >= limite_inf) & (valores <= limite_sup)]
+    if dentro.size == 0:
+        dentro = np.array([mediana])
+    bigote_inf = _bigote(bajos[bajos >= limite_inf] if bajos.size and bajos[-1] >= limite_inf
+                         else np.empty(0), dentro, True)
+    bigote_sup = _bigote(altos[altos <= limite_sup] if altos.size and altos[0] <= limite_sup
+                         else np.empty(0), dentro, False)
+
+    out_bajos, out_altos = bajos[bajos < limite_inf], altos[altos > limite_sup]
+    outliers = np.concatenate([out_bajos, out_altos])
+    # Conteo exacto por lado si los extremos conservados no se saturaron, o
+    # sumando las partes; si no, estimado desde la CDF del sketch
+    por_partes = _exactos(partes, limite_inf, limite_sup) if partes else (None, None)
+    if len(out_bajos) < len(bajos) or len(bajos) < extremos.m:
+        n_bajos = len(out_bajos)
+    elif por_partes[0] is not None:
+        n_bajos = por_partes[0]
+    else:
+        n_bajos = max(len(out_bajos), int(round(float(sketch.cdf(limite_inf)) * sketch.n)))
+    if len(out_altos) < len(altos) or len(altos) < extremos.m:
+        n_altos = len(out_altos)
+    elif por_partes[1] is not None:
+        n_altos = por_partes[1]
+    else:
+        n_altos = max(len(out_altos), int(round((1 - float(sketch.cdf(limite_sup))) * sketch.n)))
+    n_outliers = n_bajos + n_altos
+    return ResumenCaja(float(q1), float(mediana), float(q3), bigote_inf, bigote_sup,
+                       outliers, n_outliers, sketch.n)
@@ -0,0 +1,230 @@
+"""
+Trazas de tiempo livianas para las rutas calientes (loaders, builders,
+vistas del dashboard). `tramo(nombre)` es un context manager que registra
+inicio y duración en la grabación activa del hilo/contexto; sin grabación
+activa devuelve un objeto nulo compartido, así que el costo desactivado es
+una lectura de `ContextVar`. `grabar()` abre una grabación (p. ej. un rerun
+de Streamlit) con resumen por tramo (tiempo total y propio) y exportación a
+JSON o al formato Chrome trace (chrome://tracing, Perfetto).
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+
+class Tramo:
+    """Un intervalo medido; `padre` es la posición del tramo que lo contiene."""
+    __slots__ = ('nombre', 'categoria', 'inicio', 'duracion', 'hilo', 'padre', 'atributos')
+
+    def __init__(self, nombre: str, categoria: str, inicio: int, hilo: int, padre: Optional[int],
+                 atributos: Dict[str, Any]):
+        self.nombre = nombre
+        self.categoria = categoria
+        self.inicio = inicio        # ns (perf_counter_ns)
+        self.duracion = 0           # ns; 0 mientras está abierto
+        self.hilo = hilo
+        self.padre = padre
+        self.atributos = atributos
+
+
+class Grabacion:
+    """Tramos de una ejecución (un rerun, un script), en orden de apertura."""
+
+    def __init__(self, nombre: str = 'traza'):
+        self.nombre = nombre
+        self.tramos: List[Tramo] = []
+        self.inicio = time.perf_counter_ns()
+        self.fin: Optional[int] = None
+        self._abiertos: Dict[int, List[int]] = {}   # hilo -> pila de tramos abiertos
+        self._lock = threading.Lock()
+        self._token = None
+
+    @property
+    def duracion_ms(self) -> float:
+        return ((self.fin or time.perf_counter_ns()) - self.inicio) / 1e6
+
+    def _abrir(self, nombre: str, categoria: str, atributos: Dict[str, Any]) -> int:
+        hilo = threading.get_ident()
+        with self._lock:
+            pila = self._abiertos.setdefault(hilo, [])
+            indice = len(self.tramos)
+            self.tramos.append(Tramo(nombre, categoria, time.perf_counter_ns(), hilo,
+                                     pila[-1] if pila else None, atributos))
+            pila.append(indice)
+        return indice
+
+    def _cerrar(self, indice: int, error: Optional[type] = None) -> None:
+        fin = time.perf_counter_ns()
+        tramo = self.tramos[indice]
+        tramo.duracion = fin - tramo.inicio
+        if error is not None:
+            tramo.atributos['error'] = error.__name__
+        with self._lock:
+            pila = self._abiertos.get(tramo.hilo)
+            if pila and pila[-1] == indice:
+                pila.pop()
+
+    def resumen(self) -> pd.DataFrame:
+        """Por nombre de tramo: llamadas, tiempo total, propio (sin hijos) y máximo, en ms."""
+        columnas = ['categoria', 'llamadas', 'total_ms', 'propio_ms', 'max_ms', 'porcentaje']
+        if not self.tramos:
+            return pd.DataFrame(columns=columnas)
+        hijos = [0] * len(self.tramos)
+        for tramo in self.tramos:
+            if tramo.padre is not None:
+                hijos[tramo.padre] += tramo.duracion
+        tabla = pd.DataFrame({
+            'nombre': [t.nombre for t in self.tramos],
+            'categoria': [t.categoria for t in self.tramos],
+            'duracion': [t.duracion / 1e6 for t in self.tramos],
+            'propio': [(t.duracion - h) / 1e6 for t, h in zip(self.tramos, hijos)],
+        })
+        resumen = tabla.groupby('nombre', sort=False).agg(
+            categoria=('categoria', 'first'), llamadas=('duracion', 'size'), total_ms=('duracion', 'sum'),
+            propio_ms=('propio', 'sum'), max_ms=('duracion', 'max'))
+        resumen['porcentaje'] = resumen['propio_ms'] / max(self.duracion_ms, 1e-9) * 100
+        return resumen.sort_values('propio_ms', ascending=False)[columnas].round(3)
+
+    def a_json(self) -> Dict[str, Any]:
+        return {
+            'nombre': self.nombre, 'duracion_ms': round(self.duracion_ms, 3),
+            'tramos': [{'nombre': t.nombre, 'categoria': t.categoria,
+                        'inicio_ms': round((t.inicio - self.inicio) / 1e6, 4),
+                        'duracion_ms': round(t.duracion / 1e6, 4), 'padre': t.padre,
+                        'hilo': t.hilo, 'atributos': t.atributos} for t in self.tramos],
+        }
+
+    def a_chrome(self) -> Dict[str, Any]:
+        """Eventos completos ('X') en microsegundos, como los lee chrome://tracing."""
+        pid = os.getpid()
+        eventos = [{'name': t.nombre, 'cat': t.categoria or 'general', 'ph': 'X', 'pid': pid, 'tid': t.hilo,
+                    'ts': (t.inicio - self.inicio) / 1e3, 'dur': t.duracion / 1e3, 'args': t.atributos}
+                   for t in self.tramos]
+        return {'traceEvents': eventos, 'displayTimeUnit': 'ms', 'otherData': {'grabacion': self.nombre}}
+
+    def guardar(self, path: Path, formato: str = 'chrome') -> Path:
+        """Escribe la grabación como `chrome` (trace events) o `json` (tramos con jerarquía)."""
+        if formato not in ('chrome', 'json'):
+            raise ValueError(f"Formato no soportado: {formato}. Usa 'chrome' o 'json'.")
+        datos = self.a_chrome() if formato == 'chrome' else self.a_json()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(datos, default=str))
+        return path
+
+
+_ACTUAL: ContextVar[Optional[Grabacion]] = ContextVar('grabacion_actual', default=None)
+
+
+class _TramoActivo:
+    __slots__ = ('_grabacion', '_nombre', '_categoria', '_atributos', '_indice')
+
+    def __init__(self, grabacion: Grabacion, nombre: str, categoria: str, atributos: Dict[str, Any]):
+        self._grabacion = grabacion
+        self._nombre = nombre
+        self._categoria = categoria
+        self._atributos = atributos
+
+    def __enter__(self) -> '_TramoActivo':
+        self._indice = self._grabacion._abrir(self._nombre, self._categoria, self._atributos)
+        return self
+
+    def __exit__(self, tipo, valor, traza) -> None:
+        self._grabacion._cerrar(self._indice, tipo)
+
+    def anotar(self, **atributos) -> None:
+        """Agrega atributos conocidos dentro del tramo (filas, hit de caché, ...)."""
+        self._atributos.update(atributos)
+
+
+class _TramoNulo:
+    __slots__ = ()
+
+    def __enter__(self) -> '_TramoNulo':
+        return self
+
+    def __exit__(self, tipo, valor, traza) -> None:
+        return None
+
+    def anotar(self, **atributos) -> None:
+        pass
+
+
+_NULO = _TramoNulo()
+
+
+def activa() -> Optional[Grabacion]:
+    return _ACTUAL.get()
+
+
+def tramo(nombre: str, categoria: str = '', **atributos):
+    """Context manager que mide el bloque; no hace nada sin grabación activa."""
+    grabacion = _ACTUAL.get()
+    if grabacion is None:
+        return _NULO
+    return _TramoActivo(grabacion, nombre, categoria, atributos)
+
+
+def trazado(nombre: Optional[str] = None, categoria: str = '') -> Callable:
+    """
+    Decorador: cada llamada es un tramo con el nombre calificado de la
+    función. Sobre `lru_cache` también mide los hits y conserva
+    `cache_clear`/`cache_info`.
+    """
+    def decorador(funcion: Callable) -> Callable:
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            grabacion = _ACTUAL.get()
+            if grabacion is None:
+                return funcion(*args, **kwargs)
+            with _TramoActivo(grabacion, etiqueta, categoria, {}):
+                return funcion(*args, **kwargs)
+        for atributo in ('cache_clear', 'cache_info'):
+            if hasattr(funcion, atributo):
+                setattr(envoltura, atributo, getattr(funcion, atributo))
+        return envoltura
+    return decorador
+
+
+def iniciar(nombre: str = 'traza') -> Grabacion:
+    """Activa una grabación nueva en el contexto actual (hasta `terminar`)."""
+    grabacion = Grabacion(nombre)
+    grabacion._token = _ACTUAL.set(grabacion)
+    return grabacion
+
+
+def terminar(grabacion: Grabacion) -> Grabacion:
+    grabacion.fin = time.perf_counter_ns()
+    token, grabacion._token = grabacion._token, None
+    if token is not None:
+        try:
+            _ACTUAL.reset(token)
+        except ValueError:
+            # Token de otro contexto (p. ej. el rerun fue interrumpido): se desactiva igual
+            _ACTUAL.set(None)
+    return grabacion
+
+
+@contextmanager
+def grabar(nombre: str = 'traza') -> Iterator[Grabacion]:
+    """Graba los tramos del bloque: `with grabar('script') as g: ...; g.guardar(...)`."""
+    grabacion = iniciar(nombre)
+    try:
+        yield grabacion
+    finally:
+        terminar(grabacion)
+
+
+def desactivar() -> None:
+    """Descarta la grabación activa del contexto (p. ej. una que quedó abierta en un rerun cortado)."""
+    _ACTUAL.set(None)